@@ -0,0 +1,202 @@
+"""Per-process admission control for Flask requests.
+
+Every route belongs to a cost class. Each admitted request holds `weight` units of a
+shared budget (sized to the DB pool by default) until its teardown. Some routes also
+have a cap on how many of them may run at once. A request that can't get in right away
+waits up to its class's queue timeout. After that it is turned away:
+
+    429  the route's own concurrency cap is full (that endpoint is busy, others are fine)
+    503  the shared budget or the wait queue is full (the whole process is overloaded)
+
+Both carry Retry-After. Priority routes may also draw on ADMISSION_RESERVED units that
+other classes can't touch, and they are admitted ahead of other waiters. That keeps
+health checks answering during a spike. Login has a class of its own with
+ADMISSION_AUTH_RESERVED units held back from standard and expensive routes, so a
+flood of expensive requests can't lock users out. Limits apply per worker process.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+import metrics
+from db import PG_POOL_MAX
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") != "0"
+# Budget units per process; a standard request holds one, roughly one pooled connection
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", str(PG_POOL_MAX)))
+# Units only priority routes may use
+ADMISSION_RESERVED = int(os.getenv("ADMISSION_RESERVED", "2"))
+# Units only the auth class (and priority routes) may use
+ADMISSION_AUTH_RESERVED = int(os.getenv("ADMISSION_AUTH_RESERVED", "2"))
+# Requests allowed to wait at once before new ones are rejected without waiting
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", str(PG_POOL_MAX * 2)))
+
+CostClass = namedtuple("CostClass", ("name", "weight", "queue_timeout_s", "priority"))
+
+COST_CLASSES = {
+    "priority": CostClass("priority", 1, 5.0, True),
+    "standard": CostClass("standard", 1, 2.0, False),
+    # Full roster scans and PBKDF2: shed sooner rather than queue long
+    "expensive": CostClass("expensive", 4, 0.5, False),
+    # One connection per login; the hashing pool bounds its CPU and sheds with its own 503
+    "auth": CostClass("auth", 1, 2.0, False),
+}
+DEFAULT_CLASS = "standard"
+
+# Flask endpoint name -> cost class. Endpoints mapped to None skip admission: /metrics,
+# and the SSE stream, which parks on the shared listener rather than a DB connection.
+ROUTE_CLASSES = {
+    "metrics_endpoint": None,
+    "senior_notifications_stream": None,
+    "home": "priority",
+    "health_check": "priority",
+    "logout": "priority",
+    "login": "auth",
+    "signup_student": "expensive",
+    "signup_senior": "expensive",
+    "student_matches": "expensive",
+    "get_matches": "expensive",
+    "get_matches_batch": "expensive",
+    "admin_overview": "expensive",
+    "dashboard": "expensive",
+}
+
+# Cost class -> units held back from every other non-priority class
+CLASS_RESERVES = {
+    "auth": ADMISSION_AUTH_RESERVED,
+}
+
+# Endpoint -> most concurrent requests per process, on top of the shared budget
+ROUTE_LIMITS = {
+    "get_matches_batch": 2,
+}
+
+
+class Rejected(Exception):
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, capacity=ADMISSION_CAPACITY, reserved=ADMISSION_RESERVED, max_queue=ADMISSION_MAX_QUEUE,
+                 route_limits=None, class_reserves=None):
+        self.capacity = capacity
+        self.reserved = min(reserved, capacity - 1)
+        self.max_queue = max_queue
+        self.route_limits = ROUTE_LIMITS if route_limits is None else route_limits
+        # Trimmed so standard routes always keep at least one unit
+        self.class_reserves = {}
+        spare = capacity - self.reserved - 1
+        for name, units in (CLASS_RESERVES if class_reserves is None else class_reserves).items():
+            self.class_reserves[name] = max(0, min(units, spare))
+            spare -= self.class_reserves[name]
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._route_active = {}
+        self._waiting = 0
+        self._waiting_priority = 0
+
+    def _limit(self, cost):
+        if cost.priority:
+            return self.capacity
+        held_back = sum(units for name, units in self.class_reserves.items() if name != cost.name)
+        return self.capacity - self.reserved - held_back
+
+    def weight(self, cost):
+        """
+        Units cost holds. Capped at what its class may use, so a small pool (low
+        PG_POOL_MAX) still admits expensive routes, one at a time, instead of never.
+        """
+        return min(cost.weight, self._limit(cost))
+
+    def _fits(self, cost):
+        if self._in_use + self.weight(cost) > self._limit(cost):
+            return False
+        # Priority waiters go first; everyone else waits until none are queued
+        return cost.priority or self._waiting_priority == 0
+
+    def _route_full(self, route):
+        limit = self.route_limits.get(route)
+        return limit is not None and self._route_active.get(route, 0) >= limit
+
+    def acquire(self, route, cost):
+        """
+        Blocks for up to cost.queue_timeout_s until route may run. Returns a ticket for release().
+        Raises Rejected when the request should be turned away.
+        """
+        started = time.perf_counter()
+        with self._cond:
+            if self._route_full(route):
+                raise Rejected(429, "route_limit", self._retry_after(cost))
+            if not self._fits(cost):
+                if self._waiting >= self.max_queue:
+                    raise Rejected(503, "queue_full", self._retry_after(cost))
+                deadline = started + cost.queue_timeout_s
+                self._waiting += 1
+                self._waiting_priority += cost.priority
+                try:
+                    while not self._fits(cost) or self._route_full(route):
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            if self._route_full(route):
+                                raise Rejected(429, "route_limit", self._retry_after(cost))
+                            raise Rejected(503, "timeout", self._retry_after(cost))
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._waiting_priority -= cost.priority
+            self._in_use += self.weight(cost)
+            self._route_active[route] = self._route_active.get(route, 0) + 1
+        metrics.ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, cost_class=cost.name)
+        return route, cost
+
+    def release(self, ticket):
+        route, cost = ticket
+        with self._cond:
+            self._in_use -= self.weight(cost)
+            self._route_active[route] -= 1
+            self._cond.notify_all()
+
+    def _retry_after(self, cost):
+        # Roughly how long the queue stays busy; at least a second, as Retry-After is whole seconds
+        return max(1, math.ceil(cost.queue_timeout_s * 2))
+
+    def snapshot(self):
+        with self._cond:
+            return self._in_use, self._waiting
+
+
+ADMISSION = AdmissionController()
+
+
+def cost_class_for(endpoint):
+    """
+    Returns the CostClass for a Flask endpoint name, or None when it skips admission.
+    """
+    name = ROUTE_CLASSES.get(endpoint, DEFAULT_CLASS)
+    return COST_CLASSES[name] if name else None
+
+
+def _collect_admission():
+    in_use, waiting = ADMISSION.snapshot()
+    return [
+        (("in_use",), in_use),
+        (("capacity",), ADMISSION.capacity),
+        (("reserved",), ADMISSION.reserved),
+        (("auth_reserved",), ADMISSION.class_reserves.get("auth", 0)),
+        (("waiting",), waiting),
+    ]
+
+
+metrics.REGISTRY.register_collector(
+    "admission_units",
+    "Admission budget units in use, capacity, priority reserve and queued requests.",
+    _collect_admission,
+    labelnames=("state",),
+)
@@ -1,23 +1,61 @@
 import os
+import queue
+import time
 from datetime import date, datetime
 from decimal import Decimal
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask.json.provider import DefaultJSONProvider
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from db import execute_query, create_student, create_senior, get_senior_by_id, get_all_students
-from matching import MatchingEngine
-
-try:
-    import googlemaps
-except Exception:
-    googlemaps = None
+from db import (
+    execute_query,
+    transaction,
+    create_student,
+    create_senior,
+    get_senior_by_id,
+    get_seniors_by_ids,
+    get_open_seniors,
+    get_all_students,
+    pin_reads,
+    unpin_reads,
+)
+from matching import MatchingEngine, score_seniors_for_student
+from migrations import ensure_schema_ready
+from singleflight import SingleFlight
+from passwords import (
+    LOGIN_EMAIL_THROTTLE,
+    LOGIN_IP_THROTTLE,
+    SIGNUP_IP_THROTTLE,
+    HashingOverloaded,
+    hash_password,
+    needs_rehash,
+    upgrade_hash_later,
+    verify_password,
+)
+from geocoding import create_geocoding_service
+from compression import compress_response, iter_json, should_stream
+from roster_snapshot import current_snapshot
+from jobs import NEEDS_REBUILD_SQL, enqueue, enqueue_geocoding
+from admission import ADMISSION, ADMISSION_ENABLED, Rejected, cost_class_for
+from notifications import MATCH_LISTENER, SSE_HEARTBEAT_S, sse_event
+from map_clusters import cluster_points, grid_cell_degrees, parse_bbox, parse_zoom, session_heatmap
+from packed_points import BINARY, encode_binary, negotiate_points_format, pack_points
+from sync import SyncExpired, changes_since, current_version, parse_cursor
+import metrics
+from slow_queries import SLOW_QUERIES
 
 app = Flask(__name__)
 CORS(app)
 
+# Proxies in front of the app whose X-Forwarded-For is trusted. The auth throttles key on
+# request.remote_addr; behind a proxy that is the proxy's address for every user, so set
+# this to the number of proxy hops or one client's failures lock everyone out.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
 # Create a custom JSON provider that knows how to handle Decimals and Dates
 class CustomJSONProvider(DefaultJSONProvider):
     def default(self, obj):
@@ -30,29 +68,35 @@ class CustomJSONProvider(DefaultJSONProvider):
 # Tell Flask to use our custom provider
 app.json = CustomJSONProvider(app)
 
+# Concurrent identical roster loads / scoring runs share one in-flight result
+roster_flight = SingleFlight()
+match_flight = SingleFlight()
+
+for _name, _flight in (("roster", roster_flight), ("match", match_flight)):
+    metrics.REGISTRY.register_collector(
+        f"singleflight_{_name}_calls_total",
+        f"{_name.title()} single-flight calls by outcome.",
+        lambda flight=_flight: [(("executed",), flight.executed), (("coalesced",), flight.coalesced)],
+        metric_type="counter",
+        labelnames=("outcome",),
+    )
 
-def geocode_address(address):
-    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-    if not api_key:
-        return None, None, "Missing GOOGLE_MAPS_API_KEY"
-    if googlemaps is None:
-        return None, None, "googlemaps library not installed"
+STUDENT_MATCH_PAGE_SIZE = 20
+SENIOR_MATCH_PAGE_SIZE = 3
+MAX_MATCH_PAGE_SIZE = 100
+MAX_MATCH_BATCH_SENIORS = int(os.getenv("MAX_MATCH_BATCH_SENIORS", "500"))
 
-    client = googlemaps.Client(key=api_key)
-    try:
-        results = client.geocode(address)
-    except Exception as exc:
-        return None, None, f"Geocoding error: {exc}"
+MAX_TASK_BATCH_SIZE = 100
+TASK_BATCH_OPS = ("create", "update", "delete")
+TASK_STATUSES = ("open", "done")
 
-    if not results:
-        return None, None, "No geocoding results"
 
-    location = results[0].get("geometry", {}).get("location", {})
-    lat = location.get("lat")
-    lng = location.get("lng")
-    if lat is None or lng is None:
-        return None, None, "Geocoding returned no coordinates"
-    return lat, lng, None
+# One long-lived geocoder per process (keeps the Maps HTTP session warm)
+geocoder = create_geocoding_service()
+
+
+def geocode_address(address):
+    return geocoder.geocode(address)
 
 
 def serialize_row(row):
@@ -65,74 +109,102 @@ def serialize_rows(rows):
     return [serialize_row(r) for r in (rows or [])]
 
 
-def ensure_auth_schema():
-    execute_query(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            user_id SERIAL PRIMARY KEY,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role VARCHAR(20) NOT NULL,
-            student_id INT REFERENCES students(student_id) ON DELETE SET NULL,
-            senior_id INT REFERENCES seniors(senior_id) ON DELETE SET NULL,
-            created_at TIMESTAMP DEFAULT NOW()
-        );
-        """,
-        commit=True,
-    )
-    execute_query(
-        """
-        CREATE TABLE IF NOT EXISTS auth_tokens (
-            token TEXT PRIMARY KEY,
-            user_id INT REFERENCES users(user_id) ON DELETE CASCADE,
-            created_at TIMESTAMP DEFAULT NOW()
-        );
-        """,
-        commit=True,
-    )
-    execute_query(
-        """
-        CREATE TABLE IF NOT EXISTS senior_tasks (
-            task_id SERIAL PRIMARY KEY,
-            senior_id INT REFERENCES seniors(senior_id) ON DELETE CASCADE,
-            task_text TEXT NOT NULL,
-            status VARCHAR(20) DEFAULT 'open',
-            created_at TIMESTAMP DEFAULT NOW()
-        );
-        """,
-        commit=True,
-    )
-    execute_query(
-        """
-        CREATE TABLE IF NOT EXISTS matches (
-            match_id SERIAL PRIMARY KEY,
-            student_id INT REFERENCES students(student_id) ON DELETE CASCADE,
-            senior_id INT REFERENCES seniors(senior_id) ON DELETE CASCADE,
-            status VARCHAR(20) DEFAULT 'selected',
-            created_at TIMESTAMP DEFAULT NOW()
-        );
-        """,
-        commit=True,
-    )
-    existing_admin = execute_query(
-        "SELECT user_id FROM users WHERE email = %s;",
-        ("admin@mail.mcgill.ca",),
-        fetch_one=True,
+# Registered before every other hook: admission rejections and schema-check failures end
+# the request inside an earlier before_request, and those responses must be timed too
+@app.before_request
+def start_request_timer():
+    if metrics.ENABLED:
+        g.request_started = time.perf_counter()
+
+
+def observe_request(status):
+    started = g.pop("request_started", None)
+    if started is None:
+        return
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=request.url_rule.rule if request.url_rule else "<unmatched>",
+        status=str(status),
     )
-    if not existing_admin:
-        password_hash = generate_password_hash("admin123", method="pbkdf2:sha256")
-        execute_query(
-            """
-            INSERT INTO users (email, password_hash, role)
-            VALUES (%s, %s, 'admin');
-            """,
-            ("admin@mail.mcgill.ca", password_hash),
-            commit=True,
-        )
 
 
-# Ensure auth tables exist even when app is imported (e.g., flask run)
-ensure_auth_schema()
+@app.after_request
+def record_request_timing(response):
+    observe_request(response.status_code)
+    return response
+
+
+@app.teardown_request
+def record_unfinished_request(exc):
+    # An exception that propagated past the error handlers never reached after_request
+    observe_request(500)
+
+
+@app.before_request
+def admit_request():
+    """
+    Runs first so an overloaded process turns requests away before they touch the pool.
+    """
+    if not ADMISSION_ENABLED or request.endpoint is None:
+        return None
+    cost = cost_class_for(request.endpoint)
+    if cost is None:
+        return None
+    try:
+        g.admission_ticket = ADMISSION.acquire(request.endpoint, cost)
+    except Rejected as e:
+        metrics.ADMISSION_REJECTIONS.inc(route=request.endpoint, reason=e.reason)
+        response = jsonify({"error": "Server busy, please retry."})
+        response.status_code = e.status
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+    return None
+
+
+@app.teardown_request
+def release_admission(_exc):
+    ticket = g.pop("admission_ticket", None)
+    if ticket is not None:
+        ADMISSION.release(ticket)
+
+
+# Schema changes are applied by `python backend/migrations.py`; the app only verifies the
+# version, lazily on the first request and once per deployment (AUTO_MIGRATE=1 applies
+# pending migrations at that point, handy for throwaway databases). A check that fails
+# or raises is retried on the next request.
+_schema_checked = False
+
+
+@app.before_request
+def verify_schema_once():
+    global _schema_checked
+    if not _schema_checked:
+        _schema_checked = ensure_schema_ready(auto_migrate=os.getenv("AUTO_MIGRATE") == "1")
+
+
+@app.before_request
+def choose_read_target():
+    pin_reads()
+
+
+@app.teardown_request
+def release_read_target(_exc):
+    unpin_reads()
+
+
+def too_many_attempts(retry_after):
+    response = jsonify({"error": "Too many attempts. Try again later."})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def auth_busy():
+    response = jsonify({"error": "Server busy, please retry."})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
 
 
 def get_bearer_token():
@@ -142,20 +214,80 @@ def get_bearer_token():
     return None
 
 
-def get_current_user():
-    token = get_bearer_token()
+CURRENT_USER_SQL = """
+    SELECT u.user_id, u.email, u.role, u.student_id, u.senior_id
+    FROM auth_tokens t
+    JOIN users u ON t.user_id = u.user_id
+    WHERE t.token = %s;
+"""
+
+
+def get_current_user(token=None):
+    token = token or get_bearer_token()
     if not token:
         return None
-    return execute_query(
-        """
-        SELECT u.user_id, u.email, u.role, u.student_id, u.senior_id
-        FROM auth_tokens t
-        JOIN users u ON t.user_id = u.user_id
-        WHERE t.token = %s;
-        """,
-        (token,),
+    user = execute_query(CURRENT_USER_SQL, (token,), fetch_one=True)
+    if user is None:
+        # A token minted moments ago may not have reached the replica yet
+        user = execute_query(CURRENT_USER_SQL, (token,), fetch_one=True, use_primary=True)
+    return user
+
+
+# Profile row, user row and first auth token in one statement. The NOT EXISTS guard makes a
+# duplicate email insert nothing; a concurrent duplicate fails the whole statement instead.
+SIGNUP_SQL = """
+WITH profile AS (
+    INSERT INTO {table} (first_name, last_name, {email_column}, phone, address, latitude, longitude, {tags_column}, languages)
+    SELECT %(first_name)s, %(last_name)s, %(email)s, %(phone)s, %(address)s, %(latitude)s, %(longitude)s, '{{}}', '{{}}'
+    WHERE NOT EXISTS (SELECT 1 FROM users WHERE email = %(email)s)
+    RETURNING {id_column}
+), account AS (
+    INSERT INTO users (email, password_hash, role, {id_column})
+    SELECT %(email)s, %(password_hash)s, %(role)s, {id_column} FROM profile
+    RETURNING user_id, email, role, student_id, senior_id
+), first_token AS (
+    INSERT INTO auth_tokens (token, user_id)
+    SELECT %(token)s, user_id FROM account
+)
+SELECT user_id, email, role, student_id, senior_id, %(token)s AS token FROM account;
+"""
+
+SIGNUP_SQL_BY_ROLE = {
+    "student": SIGNUP_SQL.format(
+        table="students", email_column="mcgill_email", tags_column="skills", id_column="student_id"
+    ),
+    "senior": SIGNUP_SQL.format(
+        table="seniors", email_column="email", tags_column="needs", id_column="senior_id"
+    ),
+}
+
+
+def signup(role, data, email, password_hash):
+    """
+    Creates the profile, user and token for a new account. Returns (user, token),
+    or (None, None) when the email is already registered.
+    """
+    token = os.urandom(24).hex()
+    user = execute_query(
+        SIGNUP_SQL_BY_ROLE[role],
+        {
+            "role": role,
+            "email": email,
+            "password_hash": password_hash,
+            "token": token,
+            "first_name": data.get("first_name"),
+            "last_name": data.get("last_name"),
+            "phone": data.get("phone"),
+            "address": data.get("address"),
+            "latitude": data.get("latitude"),
+            "longitude": data.get("longitude"),
+        },
+        commit=True,
         fetch_one=True,
     )
+    if not user:
+        return None, None
+    return user, user.pop("token")
 
 
 def create_auth_token(user_id):
@@ -168,43 +300,220 @@ def create_auth_token(user_id):
     return token
 
 
-def update_senior_needs_from_tasks(senior_id):
-    tasks = execute_query(
-        """
-        SELECT task_text
-        FROM senior_tasks
-        WHERE senior_id = %s AND status = 'open'
-        ORDER BY task_id;
-        """,
-        (senior_id,),
-        fetch_all=True,
+# Appended to a statement whose first CTE is `changed` (task_id, task_text, status, live).
+# Rebuilds seniors.needs from the pre-statement task rows plus the changed rows, so the
+# task write and the needs patch go to Postgres as one round-trip. pg_notify wakes the
+# roster snapshot writer (roster_snapshot.py --watch) so matching sees the new needs.
+NEEDS_SYNC_CTE = """
+, synced AS (
+    UPDATE seniors
+    SET needs = ARRAY(
+        SELECT t.task_text
+        FROM (
+            SELECT task_id, task_text
+            FROM senior_tasks
+            WHERE senior_id = %(senior_id)s AND status = 'open'
+              AND task_id NOT IN (SELECT task_id FROM changed)
+            UNION ALL
+            SELECT task_id, task_text
+            FROM changed
+            WHERE live AND status = 'open'
+        ) t
+        ORDER BY t.task_id
     )
-    needs = [t["task_text"] for t in (tasks or [])]
-    execute_query(
-        "UPDATE seniors SET needs = %s WHERE senior_id = %s;",
-        (needs, senior_id),
+    WHERE senior_id = %(senior_id)s AND EXISTS (SELECT 1 FROM changed)
+    RETURNING senior_id, pg_notify('senior_needs_changed', senior_id::text) AS notified
+)
+"""
+
+
+def write_task_with_needs_sync(changed_sql, params):
+    """
+    Runs a senior_tasks write and the needs patch in one statement.
+    Returns the changed task, or None when nothing matched.
+    """
+    return execute_query(
+        f"""
+        WITH changed AS ({changed_sql})
+        {NEEDS_SYNC_CTE}
+        SELECT task_id, task_text, status FROM changed;
+        """,
+        params,
         commit=True,
+        fetch_one=True,
     )
 
 
-def score_seniors_for_student(student, seniors):
-    engine = MatchingEngine()
-    scored = []
-    for senior in seniors:
-        score = engine.calculate_score(senior, student)
-        scored.append(
-            {
-                "senior_id": senior.get("senior_id"),
-                "first_name": senior.get("first_name"),
-                "last_name": senior.get("last_name"),
-                "total_score": score.get("total_score"),
-                "distance_km": score.get("distance_km"),
-                "common_skills": score.get("common_skills"),
-                "needs": senior.get("needs", []),
-            }
-        )
-    scored.sort(key=lambda x: x["total_score"], reverse=True)
-    return scored
+def validate_task_operations(operations):
+    """
+    Returns an error message for the first malformed operation, or None if the batch is valid.
+    """
+    if not isinstance(operations, list) or not operations:
+        return "operations must be a non-empty list."
+    if len(operations) > MAX_TASK_BATCH_SIZE:
+        return f"At most {MAX_TASK_BATCH_SIZE} operations per batch."
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in TASK_BATCH_OPS:
+            return f"Operation {i}: op must be one of {', '.join(TASK_BATCH_OPS)}."
+        task_text, task_id, status = op.get("task_text"), op.get("task_id"), op.get("status")
+        if task_text is not None and not isinstance(task_text, str):
+            return f"Operation {i}: task_text must be a string."
+        if op["op"] == "create" and not (task_text or "").strip():
+            return f"Operation {i}: task_text is required."
+        # bool is an int subclass; true/false are not task ids
+        if op["op"] in ("update", "delete") and (not isinstance(task_id, int) or isinstance(task_id, bool)):
+            return f"Operation {i}: task_id is required."
+        if status is not None and status not in TASK_STATUSES:
+            return f"Operation {i}: status must be one of {', '.join(TASK_STATUSES)}."
+        if op["op"] == "update" and not status and not task_text:
+            return f"Operation {i}: nothing to update."
+    return None
+
+
+def apply_task_operations(cursor, senior_id, operations):
+    """
+    Applies create/update/delete operations inside an open transaction.
+    Returns one result per operation; task_id is None when the task was not found.
+    """
+    results = []
+    for op in operations:
+        if op["op"] == "create":
+            cursor.execute(
+                """
+                INSERT INTO senior_tasks (senior_id, task_text)
+                VALUES (%s, %s)
+                RETURNING task_id;
+                """,
+                (senior_id, op["task_text"].strip()),
+            )
+        elif op["op"] == "update":
+            cursor.execute(
+                """
+                UPDATE senior_tasks
+                SET task_text = COALESCE(%s, task_text),
+                    status = COALESCE(%s, status)
+                WHERE task_id = %s AND senior_id = %s
+                RETURNING task_id;
+                """,
+                (op.get("task_text"), op.get("status"), op["task_id"], senior_id),
+            )
+        else:
+            cursor.execute(
+                "DELETE FROM senior_tasks WHERE task_id = %s AND senior_id = %s RETURNING task_id;",
+                (op["task_id"], senior_id),
+            )
+        row = cursor.fetchone()
+        results.append({"op": op["op"], "task_id": row["task_id"] if row else None})
+    return results
+
+
+def load_senior_roster():
+    return roster_flight.do(
+        "seniors",
+        lambda: execute_query("SELECT * FROM seniors;", fetch_all=True),
+    )
+
+
+def parse_match_page_args(default_limit):
+    """
+    Reads the shared match paging contract from the query string:
+    limit, offset (or the opaque cursor returned as next_cursor), min_score, max_distance_km.
+    Raises ValueError on bad input.
+    """
+    args = request.args
+    try:
+        limit = int(args.get("limit", default_limit))
+        offset = int(args.get("cursor") or args.get("offset") or 0)
+        min_score = float(args["min_score"]) if args.get("min_score") else None
+        max_distance_km = float(args["max_distance_km"]) if args.get("max_distance_km") else None
+    except ValueError:
+        raise ValueError("limit, offset/cursor, min_score and max_distance_km must be numeric.")
+    if limit < 1 or offset < 0:
+        raise ValueError("limit must be positive and offset must not be negative.")
+    return {
+        "limit": min(limit, MAX_MATCH_PAGE_SIZE),
+        "offset": offset,
+        "min_score": min_score,
+        "max_distance_km": max_distance_km,
+    }
+
+
+def match_page_payload(matches, total, page_args):
+    next_offset = page_args["offset"] + len(matches)
+    return {
+        "matches": matches,
+        "total": total,
+        "limit": page_args["limit"],
+        "offset": page_args["offset"],
+        "next_cursor": str(next_offset) if next_offset < total else None,
+    }
+
+
+def packed_point_list(rows, id_column, fields=()):
+    packed = pack_points(rows, id_column, fields)
+    packed["unplaced"] = serialize_rows(packed["unplaced"])
+    return packed
+
+
+def json_response(payload):
+    """
+    jsonify, except that a payload with long top-level lists is streamed in chunks.
+    """
+    if not should_stream(payload):
+        return jsonify(payload)
+    dumps = lambda obj: app.json.dumps(obj, separators=(",", ":"))  # noqa: E731
+    return Response(iter_json(payload, dumps), mimetype="application/json")
+
+
+def negotiated_json(payload, points_format):
+    response = json_response(payload)
+    if points_format:
+        response.mimetype = points_format
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def sync_changes(tables, **scope):
+    """
+    Reads ?since= and returns (since, version, changes). since comes back None when the
+    client asked for, or needs, a full payload; version is the cursor to return either way.
+    """
+    since = parse_cursor(request.args.get("since"))
+    if since is not None:
+        # The cursor may come from either server; the primary has every change it covers
+        pin_reads("primary")
+        try:
+            version, changes = changes_since(since, tables, **scope)
+            return since, version, changes
+        except SyncExpired:
+            pass
+        except RuntimeError as e:
+            print(f"⚠️ Delta sync unavailable, sending full payload: {e}")
+    # Taken before the full read so anything committed meanwhile is sent again next poll
+    return None, current_version(), None
+
+
+def delta_section(change, query, params, id_column):
+    """
+    Loads the upserted rows of one table's change set; query takes the id list as its
+    last parameter. Upserted ids it no longer returns (e.g. a match that is no longer
+    'selected') are sent as tombstones too.
+    """
+    rows = execute_query(query, (*params, change["upserted"]), fetch_all=True) if change["upserted"] else []
+    found = {row[id_column] for row in rows or []}
+    gone = [row_id for row_id in change["upserted"] if row_id not in found]
+    return {"upserted": serialize_rows(rows), "deleted": change["deleted"] + gone}
+
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 
 @app.route('/')
 def home():
@@ -238,6 +547,10 @@ def signup_student():
     if missing:
         return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
 
+    retry_after = SIGNUP_IP_THROTTLE.hit(request.remote_addr)
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     email = data.get('email', '').strip().lower()
     existing = execute_query("SELECT user_id FROM users WHERE email = %s;", (email,), fetch_one=True)
     if existing:
@@ -251,35 +564,16 @@ def signup_student():
         elif geo_err:
             return jsonify({"error": f"Geocoding failed: {geo_err}"}), 400
 
-    student = create_student({
-        "first_name": data.get("first_name"),
-        "last_name": data.get("last_name"),
-        "email": email,
-        "phone": data.get("phone"),
-        "address": data.get("address"),
-        "latitude": data.get("latitude"),
-        "longitude": data.get("longitude"),
-        "skills": [],
-        "languages": [],
-    })
-    if not student:
-        return jsonify({"error": "Failed to create student."}), 500
+    # Hash before creating any rows so an overloaded hasher leaves nothing half-written
+    try:
+        password_hash = hash_password(data.get("password"))
+    except HashingOverloaded:
+        return auth_busy()
 
-    password_hash = generate_password_hash(data.get("password"), method="pbkdf2:sha256")
-    user = execute_query(
-        """
-        INSERT INTO users (email, password_hash, role, student_id)
-        VALUES (%s, %s, 'student', %s)
-        RETURNING user_id, email, role, student_id, senior_id;
-        """,
-        (email, password_hash, student["student_id"]),
-        commit=True,
-        fetch_one=True,
-    )
+    user, token = signup("student", data, email, password_hash)
     if not user:
-        return jsonify({"error": "Failed to create user."}), 500
-
-    token = create_auth_token(user["user_id"])
+        # Lost a race with another signup for this email, or the insert failed
+        return jsonify({"error": "Failed to create student. The email may already be registered."}), 409
     return jsonify({"token": token, "user": serialize_row(user)}), 201
 
 
@@ -291,6 +585,10 @@ def signup_senior():
     if missing:
         return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
 
+    retry_after = SIGNUP_IP_THROTTLE.hit(request.remote_addr)
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     email = data.get('email', '').strip().lower()
     existing = execute_query("SELECT user_id FROM users WHERE email = %s;", (email,), fetch_one=True)
     if existing:
@@ -304,35 +602,16 @@ def signup_senior():
         elif geo_err:
             return jsonify({"error": f"Geocoding failed: {geo_err}"}), 400
 
-    senior = create_senior({
-        "first_name": data.get("first_name"),
-        "last_name": data.get("last_name"),
-        "email": email,
-        "phone": data.get("phone"),
-        "address": data.get("address"),
-        "latitude": data.get("latitude"),
-        "longitude": data.get("longitude"),
-        "needs": [],
-        "languages": [],
-    })
-    if not senior:
-        return jsonify({"error": "Failed to create senior."}), 500
+    # Hash before creating any rows so an overloaded hasher leaves nothing half-written
+    try:
+        password_hash = hash_password(data.get("password"))
+    except HashingOverloaded:
+        return auth_busy()
 
-    password_hash = generate_password_hash(data.get("password"), method="pbkdf2:sha256")
-    user = execute_query(
-        """
-        INSERT INTO users (email, password_hash, role, senior_id)
-        VALUES (%s, %s, 'senior', %s)
-        RETURNING user_id, email, role, student_id, senior_id;
-        """,
-        (email, password_hash, senior["senior_id"]),
-        commit=True,
-        fetch_one=True,
-    )
+    user, token = signup("senior", data, email, password_hash)
     if not user:
-        return jsonify({"error": "Failed to create user."}), 500
-
-    token = create_auth_token(user["user_id"])
+        # Lost a race with another signup for this email, or the insert failed
+        return jsonify({"error": "Failed to create senior. The email may already be registered."}), 409
     return jsonify({"token": token, "user": serialize_row(user)}), 201
 
 
@@ -344,14 +623,31 @@ def login():
     if not email or not password:
         return jsonify({"error": "Email and password are required."}), 400
 
+    retry_after = max(LOGIN_IP_THROTTLE.hit(request.remote_addr), LOGIN_EMAIL_THROTTLE.hit(email))
+    if retry_after:
+        return too_many_attempts(retry_after)
+
     user = execute_query(
         "SELECT user_id, email, role, password_hash, student_id, senior_id FROM users WHERE email = %s;",
         (email,),
         fetch_one=True,
     )
-    if not user or not check_password_hash(user["password_hash"], password):
+    try:
+        valid = bool(user) and verify_password(user["password_hash"], password)
+    except HashingOverloaded:
+        return auth_busy()
+    if not valid:
         return jsonify({"error": "Invalid credentials."}), 401
 
+    LOGIN_EMAIL_THROTTLE.reset(email)
+    if needs_rehash(user["password_hash"]):
+        user_id, old_hash = user["user_id"], user["password_hash"]
+        upgrade_hash_later(password, lambda new_hash: execute_query(
+            "UPDATE users SET password_hash = %s WHERE user_id = %s AND password_hash = %s;",
+            (new_hash, user_id, old_hash),
+            commit=True,
+        ))
+
     token = create_auth_token(user["user_id"])
     user.pop("password_hash", None)
     return jsonify({"token": token, "user": serialize_row(user)}), 200
@@ -383,14 +679,13 @@ def student_profile():
     data = request.get_json() or {}
     skills = data.get("skills", [])
     languages = data.get("languages", [])
-    execute_query(
-        "UPDATE students SET skills = %s, languages = %s WHERE student_id = %s;",
+    profile = execute_query(
+        """
+        UPDATE students SET skills = %s, languages = %s WHERE student_id = %s
+        RETURNING student_id, first_name, last_name, skills, languages;
+        """,
         (skills, languages, user["student_id"]),
         commit=True,
-    )
-    profile = execute_query(
-        "SELECT student_id, first_name, last_name, skills, languages FROM students WHERE student_id = %s;",
-        (user["student_id"],),
         fetch_one=True,
     )
     return jsonify({"student": serialize_row(profile)}), 200
@@ -402,14 +697,37 @@ def student_matches():
     if not user or user.get("role") != "student":
         return jsonify({"error": "Unauthorized."}), 401
 
-    student = execute_query(
-        "SELECT * FROM students WHERE student_id = %s;",
-        (user["student_id"],),
-        fetch_one=True,
-    )
-    seniors = execute_query("SELECT * FROM seniors;", fetch_all=True)
-    matches = score_seniors_for_student(student, seniors or [])
-    return jsonify({"matches": matches})
+    try:
+        page_args = parse_match_page_args(STUDENT_MATCH_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    student_id = user["student_id"]
+
+    def compute_matches():
+        student = execute_query(
+            "SELECT * FROM students WHERE student_id = %s;",
+            (student_id,),
+            fetch_one=True,
+        )
+        snapshot = current_snapshot()
+        if snapshot and student and student.get("latitude") is not None and student.get("longitude") is not None:
+            return snapshot.senior_matches_for_student(student, **page_args)
+        seniors = load_senior_roster()
+        return score_seniors_for_student(student, seniors or [], **page_args)
+
+    flight_key = ("student_matches", student_id) + tuple(sorted(page_args.items()))
+    matches, total = match_flight.do(flight_key, compute_matches)
+    return json_response(match_page_payload(matches, total, page_args))
+
+
+SELECTION_SQL = """
+    SELECT m.match_id, m.senior_id, m.status, m.created_at,
+           s.first_name, s.last_name, s.phone, s.latitude, s.longitude, s.address
+    FROM matches m
+    JOIN seniors s ON m.senior_id = s.senior_id
+    WHERE m.student_id = %s AND m.status = 'selected'
+"""
 
 
 @app.route('/api/student/selection', methods=['GET'])
@@ -418,48 +736,56 @@ def student_selection():
     if not user or user.get("role") != "student":
         return jsonify({"error": "Unauthorized."}), 401
 
-    selections = execute_query(
-        """
-        SELECT m.match_id, m.senior_id, m.status, m.created_at,
-               s.first_name, s.last_name, s.phone, s.latitude, s.longitude, s.address
-        FROM matches m
-        JOIN seniors s ON m.senior_id = s.senior_id
-        WHERE m.student_id = %s AND m.status = 'selected'
-        ORDER BY m.created_at DESC
-        """,
-        (user["student_id"],),
-        fetch_all=True,
-    )
+    try:
+        since, version, changes = sync_changes(
+            ("matches", "students"), student_id=user["student_id"], selected_by=user["student_id"]
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if since is not None:
+        delta = {}
+        if "matches" in changes or "seniors" in changes:
+            selections = delta_section(
+                changes.get("matches", {"upserted": [], "deleted": []}),
+                SELECTION_SQL + " AND m.match_id = ANY(%s);",
+                (user["student_id"],),
+                "match_id",
+            )
+            senior_ids = changes["seniors"]["upserted"] if "seniors" in changes else []
+            if senior_ids:
+                # A selected senior's own edit (phone, address, geocoded coordinates) resends their selection
+                rows = execute_query(
+                    SELECTION_SQL + " AND m.senior_id = ANY(%s);",
+                    (user["student_id"], senior_ids),
+                    fetch_all=True,
+                )
+                sent = {row["match_id"] for row in selections["upserted"]}
+                selections["upserted"] += [row for row in serialize_rows(rows) if row["match_id"] not in sent]
+            enqueue_geocoding(selections["upserted"], "seniors")
+            delta["selections"] = selections
+        payload = {"version": version, "changes": delta}
+        # Student fields are only resent when the student's own row changed
+        if "students" not in changes:
+            return jsonify(payload)
+    else:
+        selections = execute_query(
+            SELECTION_SQL + " ORDER BY m.created_at DESC;",
+            (user["student_id"],),
+            fetch_all=True,
+        )
+        enqueue_geocoding(selections, "seniors")
+        payload = {"version": version, "selections": serialize_rows(selections)}
+
     student = execute_query(
         "SELECT phone, latitude, longitude, address FROM students WHERE student_id = %s;",
         (user["student_id"],),
         fetch_one=True,
     )
-    if student and (student.get("latitude") is None or student.get("longitude") is None):
-        lat, lng, geo_err = geocode_address(student.get("address"))
-        if lat is not None and lng is not None:
-            execute_query(
-                "UPDATE students SET latitude = %s, longitude = %s WHERE student_id = %s;",
-                (lat, lng, user["student_id"]),
-                commit=True,
-            )
-            student["latitude"] = lat
-            student["longitude"] = lng
-
-    if selections:
-        for sel in selections:
-            if sel.get("latitude") is None or sel.get("longitude") is None:
-                lat, lng, geo_err = geocode_address(sel.get("address"))
-                if lat is not None and lng is not None:
-                    execute_query(
-                        "UPDATE seniors SET latitude = %s, longitude = %s WHERE senior_id = %s;",
-                        (lat, lng, sel.get("senior_id")),
-                        commit=True,
-                    )
-                    sel["latitude"] = lat
-                    sel["longitude"] = lng
-    return jsonify({
-        "selections": serialize_rows(selections),
+    if student:
+        student["student_id"] = user["student_id"]
+        enqueue_geocoding([student], "students")
+    payload.update({
         "student_phone": student.get("phone") if student else None,
         "student_address": student.get("address") if student else None,
         "student_location": {
@@ -467,6 +793,34 @@ def student_selection():
             "longitude": student.get("longitude"),
         } if student else None,
     })
+    return jsonify(payload)
+
+
+# Reads both profiles, checks for an existing selection and inserts the match in one
+# statement; the insert is skipped when the senior is missing or already selected
+SELECT_SENIOR_SQL = """
+WITH student AS (
+    SELECT student_id, first_name, last_name, phone, address, latitude, longitude
+    FROM students WHERE student_id = %(student_id)s
+), senior AS (
+    SELECT senior_id, first_name, last_name, phone, address, latitude, longitude
+    FROM seniors WHERE senior_id = %(senior_id)s
+), existing AS (
+    SELECT match_id FROM matches
+    WHERE student_id = %(student_id)s AND senior_id = %(senior_id)s AND status = 'selected'
+    LIMIT 1
+), inserted AS (
+    INSERT INTO matches (student_id, senior_id, status)
+    SELECT student.student_id, senior.senior_id, 'selected'
+    FROM student, senior
+    WHERE NOT EXISTS (SELECT 1 FROM existing)
+    RETURNING match_id
+)
+SELECT (SELECT row_to_json(student) FROM student) AS student,
+       (SELECT row_to_json(senior) FROM senior) AS senior,
+       (SELECT match_id FROM existing) AS existing_match_id,
+       (SELECT match_id FROM inserted) AS match_id;
+"""
 
 
 @app.route('/api/student/select', methods=['POST'])
@@ -480,67 +834,31 @@ def student_select():
     if not senior_id:
         return jsonify({"error": "senior_id is required."}), 400
 
-    # Ensure student has coordinates
-    student_coords = execute_query(
-        "SELECT student_id, address, latitude, longitude FROM students WHERE student_id = %s;",
-        (user["student_id"],),
-        fetch_one=True,
-    )
-    if student_coords and (student_coords.get("latitude") is None or student_coords.get("longitude") is None):
-        lat, lng, geo_err = geocode_address(student_coords.get("address"))
-        if lat is not None and lng is not None:
-            execute_query(
-                "UPDATE students SET latitude = %s, longitude = %s WHERE student_id = %s;",
-                (lat, lng, user["student_id"]),
-                commit=True,
-            )
-
-    # Ensure senior has coordinates
-    senior_coords = execute_query(
-        "SELECT senior_id, address, latitude, longitude FROM seniors WHERE senior_id = %s;",
-        (senior_id,),
-        fetch_one=True,
-    )
-    if senior_coords and (senior_coords.get("latitude") is None or senior_coords.get("longitude") is None):
-        lat, lng, geo_err = geocode_address(senior_coords.get("address"))
-        if lat is not None and lng is not None:
-            execute_query(
-                "UPDATE seniors SET latitude = %s, longitude = %s WHERE senior_id = %s;",
-                (lat, lng, senior_id),
-                commit=True,
-            )
-
-    existing = execute_query(
-        "SELECT match_id FROM matches WHERE student_id = %s AND senior_id = %s AND status = 'selected';",
-        (user["student_id"], senior_id),
+    row = execute_query(
+        SELECT_SENIOR_SQL,
+        {"student_id": user["student_id"], "senior_id": senior_id},
+        commit=True,
         fetch_one=True,
     )
-    if existing:
+    if not row:
+        return jsonify({"error": "Failed to select senior."}), 500
+    if not row["senior"]:
+        return jsonify({"error": "Senior not found."}), 404
+    if not row["student"]:
+        return jsonify({"error": "Student profile not found."}), 404
+
+    student, senior = row["student"], row["senior"]
+    # Extra round-trip (a geocoding enqueue) only when a profile still lacks coordinates
+    enqueue_geocoding([student], "students")
+    enqueue_geocoding([senior], "seniors")
+    if row["existing_match_id"]:
         return jsonify({"message": "Already selected."}), 200
 
-    execute_query(
-        """
-        INSERT INTO matches (student_id, senior_id, status)
-        VALUES (%s, %s, 'selected');
-        """,
-        (user["student_id"], senior_id),
-        commit=True,
-    )
-
-    senior = execute_query(
-        "SELECT senior_id, first_name, last_name, phone FROM seniors WHERE senior_id = %s;",
-        (senior_id,),
-        fetch_one=True,
-    )
-    student = execute_query(
-        "SELECT student_id, first_name, last_name, phone FROM students WHERE student_id = %s;",
-        (user["student_id"],),
-        fetch_one=True,
-    )
+    contact = ("first_name", "last_name", "phone")
     return jsonify({
         "message": "Senior selected.",
-        "senior": serialize_row(senior),
-        "student": serialize_row(student),
+        "senior": {"senior_id": senior["senior_id"], **{k: senior.get(k) for k in contact}},
+        "student": {"student_id": student["student_id"], **{k: student.get(k) for k in contact}},
     }), 201
 
 
@@ -582,34 +900,18 @@ def student_map_data():
         fetch_all=True,
     )
 
-    # Attempt server-side geocode if coordinates are missing
-    if student and (student.get("latitude") is None or student.get("longitude") is None):
-        lat, lng, geo_err = geocode_address(student.get("address"))
-        if lat is not None and lng is not None:
-            execute_query(
-                "UPDATE students SET latitude = %s, longitude = %s WHERE student_id = %s;",
-                (lat, lng, user["student_id"]),
-                commit=True,
-            )
-            student["latitude"] = lat
-            student["longitude"] = lng
+    # Rows still missing coordinates are geocoded by the job worker and placed on a later
+    # load. The enqueue's dedup key and failed-key cooldown keep repeat polls from writing.
+    if student:
+        enqueue_geocoding([student], "students")
+    enqueue_geocoding(seniors, "seniors")
 
-    for senior in seniors or []:
-        if senior.get("latitude") is None or senior.get("longitude") is None:
-            lat, lng, geo_err = geocode_address(senior.get("address"))
-            if lat is not None and lng is not None:
-                execute_query(
-                    "UPDATE seniors SET latitude = %s, longitude = %s WHERE senior_id = %s;",
-                    (lat, lng, senior.get("senior_id")),
-                    commit=True,
-                )
-                senior["latitude"] = lat
-                senior["longitude"] = lng
-
-    return jsonify({
-        "student": serialize_row(student),
-        "seniors": serialize_rows(seniors),
-    })
+    points_format = negotiate_points_format(request.accept_mimetypes, allow_binary=False)
+    if points_format:
+        senior_points = packed_point_list(seniors, "senior_id", ("first_name", "last_name", "address"))
+    else:
+        senior_points = serialize_rows(seniors)
+    return negotiated_json({"student": serialize_row(student), "seniors": senior_points}, points_format)
 
 
 @app.route('/api/senior/tasks', methods=['GET', 'POST'])
@@ -619,29 +921,41 @@ def senior_tasks():
         return jsonify({"error": "Unauthorized."}), 401
 
     if request.method == 'GET':
+        try:
+            since, version, changes = sync_changes(("senior_tasks",), senior_id=user["senior_id"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if since is not None:
+            delta = {}
+            if "senior_tasks" in changes:
+                delta["tasks"] = delta_section(
+                    changes["senior_tasks"],
+                    "SELECT task_id, task_text, status FROM senior_tasks WHERE senior_id = %s AND task_id = ANY(%s);",
+                    (user["senior_id"],),
+                    "task_id",
+                )
+            return jsonify({"version": version, "changes": delta})
+
         tasks = execute_query(
             "SELECT task_id, task_text, status FROM senior_tasks WHERE senior_id = %s ORDER BY task_id;",
             (user["senior_id"],),
             fetch_all=True,
         )
-        return jsonify({"tasks": serialize_rows(tasks)})
+        return jsonify({"tasks": serialize_rows(tasks), "version": version})
 
     data = request.get_json() or {}
     task_text = (data.get("task_text") or "").strip()
     if not task_text:
         return jsonify({"error": "Task text is required."}), 400
 
-    task = execute_query(
+    task = write_task_with_needs_sync(
         """
         INSERT INTO senior_tasks (senior_id, task_text)
-        VALUES (%s, %s)
-        RETURNING task_id, task_text, status;
+        VALUES (%(senior_id)s, %(task_text)s)
+        RETURNING task_id, task_text, status, TRUE AS live
         """,
-        (user["senior_id"], task_text),
-        commit=True,
-        fetch_one=True,
+        {"senior_id": user["senior_id"], "task_text": task_text},
     )
-    update_senior_needs_from_tasks(user["senior_id"])
     return jsonify({"task": serialize_row(task)}), 201
 
 
@@ -652,12 +966,14 @@ def update_senior_task(task_id):
         return jsonify({"error": "Unauthorized."}), 401
 
     if request.method == 'DELETE':
-        execute_query(
-            "DELETE FROM senior_tasks WHERE task_id = %s AND senior_id = %s;",
-            (task_id, user["senior_id"]),
-            commit=True,
+        write_task_with_needs_sync(
+            """
+            DELETE FROM senior_tasks
+            WHERE task_id = %(task_id)s AND senior_id = %(senior_id)s
+            RETURNING task_id, task_text, status, FALSE AS live
+            """,
+            {"task_id": task_id, "senior_id": user["senior_id"]},
         )
-        update_senior_needs_from_tasks(user["senior_id"])
         return jsonify({"message": "Task deleted."}), 200
 
     data = request.get_json() or {}
@@ -665,49 +981,168 @@ def update_senior_task(task_id):
     task_text = data.get("task_text")
     if not status and not task_text:
         return jsonify({"error": "Nothing to update."}), 400
+    if task_text is not None and not isinstance(task_text, str):
+        return jsonify({"error": "task_text must be a string."}), 400
+    if status is not None and status not in TASK_STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(TASK_STATUSES)}."}), 400
 
-    execute_query(
+    task = write_task_with_needs_sync(
         """
         UPDATE senior_tasks
-        SET task_text = COALESCE(%s, task_text),
-            status = COALESCE(%s, status)
-        WHERE task_id = %s AND senior_id = %s;
+        SET task_text = COALESCE(%(task_text)s, task_text),
+            status = COALESCE(%(status)s, status)
+        WHERE task_id = %(task_id)s AND senior_id = %(senior_id)s
+        RETURNING task_id, task_text, status, TRUE AS live
         """,
-        (task_text, status, task_id, user["senior_id"]),
-        commit=True,
-    )
-    update_senior_needs_from_tasks(user["senior_id"])
-    task = execute_query(
-        "SELECT task_id, task_text, status FROM senior_tasks WHERE task_id = %s;",
-        (task_id,),
-        fetch_one=True,
+        {"task_text": task_text, "status": status, "task_id": task_id, "senior_id": user["senior_id"]},
     )
     return jsonify({"task": serialize_row(task)}), 200
 
 
-@app.route('/api/senior/notifications', methods=['GET'])
-def senior_notifications():
+@app.route('/api/senior/tasks/batch', methods=['POST'])
+def senior_tasks_batch():
     user = get_current_user()
     if not user or user.get("role") != "senior":
         return jsonify({"error": "Unauthorized."}), 401
 
-    notifications = execute_query(
+    data = request.get_json() or {}
+    operations = data.get("operations")
+    error = validate_task_operations(operations)
+    if error:
+        return jsonify({"error": error}), 400
+
+    senior_id = user["senior_id"]
+    try:
+        with transaction() as cursor:
+            results = apply_task_operations(cursor, senior_id, operations)
+            # One needs rebuild for the whole batch, committed with it like the single-task writes
+            cursor.execute(NEEDS_REBUILD_SQL, {"senior_id": senior_id})
+            cursor.execute(
+                "SELECT task_id, task_text, status FROM senior_tasks WHERE senior_id = %s ORDER BY task_id;",
+                (senior_id,),
+            )
+            tasks = cursor.fetchall()
+    except Exception as e:
+        return jsonify({"error": f"Batch failed, no changes were saved: {e}"}), 500
+
+    return jsonify({"results": results, "tasks": serialize_rows(tasks)}), 200
+
+
+def fetch_senior_notifications(senior_id, since=None, use_primary=False):
+    """
+    Selected matches for a senior, newest first. With since, only rows after that match_id.
+    """
+    return execute_query(
         """
         SELECT m.match_id, m.created_at, st.first_name, st.last_name, st.phone AS student_phone
         FROM matches m
         JOIN students st ON m.student_id = st.student_id
-        WHERE m.senior_id = %s AND m.status = 'selected'
-        ORDER BY m.created_at DESC;
+        WHERE m.senior_id = %s AND m.status = 'selected' AND m.match_id > %s
+        ORDER BY m.match_id DESC;
         """,
-        (user["senior_id"],),
+        (senior_id, since or 0),
         fetch_all=True,
-    )
-    senior = execute_query(
-        "SELECT phone FROM seniors WHERE senior_id = %s;",
-        (user["senior_id"],),
-        fetch_one=True,
-    )
-    return jsonify({"notifications": serialize_rows(notifications), "senior_phone": senior.get("phone") if senior else None})
+        use_primary=use_primary,
+    ) or []
+
+
+def parse_since(value):
+    if value in (None, ""):
+        return None
+    since = int(value)
+    if since < 0:
+        raise ValueError("since must be a non-negative match_id")
+    return since
+
+
+@app.route('/api/senior/notifications', methods=['GET'])
+def senior_notifications():
+    user = get_current_user()
+    if not user or user.get("role") != "senior":
+        return jsonify({"error": "Unauthorized."}), 401
+
+    try:
+        since = parse_since(request.args.get("since"))
+    except ValueError:
+        return jsonify({"error": "since must be a non-negative match_id."}), 400
+
+    notifications = fetch_senior_notifications(user["senior_id"], since=since)
+    last_match_id = max([since or 0] + [n["match_id"] for n in notifications])
+    payload = {"notifications": serialize_rows(notifications), "last_match_id": last_match_id}
+    # Incremental polls only need the new rows; the phone comes with the first full load
+    if since is None:
+        senior = execute_query(
+            "SELECT phone FROM seniors WHERE senior_id = %s;",
+            (user["senior_id"],),
+            fetch_one=True,
+        )
+        payload["senior_phone"] = senior.get("phone") if senior else None
+    return jsonify(payload)
+
+
+@app.route('/api/senior/notifications/stream', methods=['GET'])
+def senior_notifications_stream():
+    # EventSource cannot send headers, so the token may also come as a query parameter
+    user = get_current_user(token=request.args.get("token"))
+    if not user or user.get("role") != "senior":
+        return jsonify({"error": "Unauthorized."}), 401
+
+    try:
+        since = parse_since(request.headers.get("Last-Event-ID") or request.args.get("since"))
+    except ValueError:
+        return jsonify({"error": "since must be a non-negative match_id."}), 400
+
+    senior_id = user["senior_id"]
+    if since is None:
+        # A fresh stream starts after what the page already loaded with the plain GET
+        latest = execute_query(
+            "SELECT COALESCE(MAX(match_id), 0) AS match_id FROM matches WHERE senior_id = %s;",
+            (senior_id,),
+            fetch_one=True,
+        )
+        since = latest["match_id"] if latest else 0
+
+    wakeups = MATCH_LISTENER.subscribe(senior_id)
+    if wakeups is None:
+        response = jsonify({"error": "Too many open streams, poll with ?since instead."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    def stream():
+        last_id = since
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                # Runs first to catch up, then after every wakeup and every heartbeat: a NOTIFY
+                # sent while the listener was (re)connecting is never delivered, so each quiet
+                # interval is a re-check. Reads go to the primary, which a NOTIFY never outruns;
+                # the request's own pin is gone by the time the body streams.
+                for row in reversed(fetch_senior_notifications(senior_id, since=last_id, use_primary=True)):
+                    last_id = row["match_id"]
+                    yield sse_event("match_selected", app.json.dumps(serialize_row(row)), event_id=last_id)
+                try:
+                    wakeups.get(timeout=SSE_HEARTBEAT_S)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            MATCH_LISTENER.unsubscribe(senior_id, wakeups)
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# (response key, table, primary key, columns)
+ADMIN_OVERVIEW_TABLES = (
+    ("students", "students", "student_id", "*"),
+    ("seniors", "seniors", "senior_id", "*"),
+    ("tasks", "senior_tasks", "task_id", "*"),
+    ("sessions", "sessions", "session_id", "*"),
+    ("matches", "matches", "match_id", "*"),
+    ("users", "users", "user_id", "user_id, email, role, student_id, senior_id"),
+)
 
 
 @app.route('/api/admin/overview', methods=['GET'])
@@ -716,19 +1151,44 @@ def admin_overview():
     if not user or user.get("role") != "admin":
         return jsonify({"error": "Unauthorized."}), 401
 
-    students = execute_query("SELECT * FROM students;", fetch_all=True)
-    seniors = execute_query("SELECT * FROM seniors;", fetch_all=True)
-    tasks = execute_query("SELECT * FROM senior_tasks;", fetch_all=True)
-    sessions = execute_query("SELECT * FROM sessions;", fetch_all=True)
-    matches = execute_query("SELECT * FROM matches;", fetch_all=True)
-    users = execute_query("SELECT user_id, email, role, student_id, senior_id FROM users;", fetch_all=True)
+    try:
+        since, version, changes = sync_changes(tuple(table for _, table, _, _ in ADMIN_OVERVIEW_TABLES))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if since is not None:
+        delta = {
+            key: delta_section(changes[table], f"SELECT {columns} FROM {table} WHERE {id_column} = ANY(%s);", (), id_column)
+            for key, table, id_column, columns in ADMIN_OVERVIEW_TABLES
+            if table in changes
+        }
+        return jsonify({"version": version, "changes": delta})
+
+    payload = {
+        key: serialize_rows(execute_query(f"SELECT {columns} FROM {table};", fetch_all=True))
+        for key, table, _, columns in ADMIN_OVERVIEW_TABLES
+    }
+    payload["version"] = version
+    return json_response(payload)
+
+
+@app.route('/api/admin/slow-queries', methods=['GET', 'DELETE'])
+def admin_slow_queries():
+    user = get_current_user()
+    if not user or user.get("role") != "admin":
+        return jsonify({"error": "Unauthorized."}), 401
+
+    if request.method == 'DELETE':
+        SLOW_QUERIES.reset()
+        return jsonify({"message": "Slow query log cleared."}), 200
+
+    limit = request.args.get("limit", default=20, type=int)
+    order_by = request.args.get("order_by", "total_ms")
+    if order_by not in ("total_ms", "max_ms", "calls"):
+        return jsonify({"error": "order_by must be total_ms, max_ms or calls."}), 400
     return jsonify({
-        "students": serialize_rows(students),
-        "seniors": serialize_rows(seniors),
-        "tasks": serialize_rows(tasks),
-        "sessions": serialize_rows(sessions),
-        "matches": serialize_rows(matches),
-        "users": serialize_rows(users),
+        "threshold_ms": SLOW_QUERIES.threshold_ms,
+        "statements": SLOW_QUERIES.top(limit=max(1, min(limit, 100)), order_by=order_by),
     })
 
 
@@ -738,43 +1198,8 @@ def admin_backfill_geocode():
     if not user or user.get("role") != "admin":
         return jsonify({"error": "Unauthorized."}), 401
 
-    updated_students = 0
-    updated_seniors = 0
-
-    students = execute_query(
-        "SELECT student_id, address, latitude, longitude FROM students;",
-        fetch_all=True,
-    )
-    for student in students or []:
-        if student.get("latitude") is None or student.get("longitude") is None:
-            lat, lng, geo_err = geocode_address(student.get("address"))
-            if lat is not None and lng is not None:
-                execute_query(
-                    "UPDATE students SET latitude = %s, longitude = %s WHERE student_id = %s;",
-                    (lat, lng, student.get("student_id")),
-                    commit=True,
-                )
-                updated_students += 1
-
-    seniors = execute_query(
-        "SELECT senior_id, address, latitude, longitude FROM seniors;",
-        fetch_all=True,
-    )
-    for senior in seniors or []:
-        if senior.get("latitude") is None or senior.get("longitude") is None:
-            lat, lng, geo_err = geocode_address(senior.get("address"))
-            if lat is not None and lng is not None:
-                execute_query(
-                    "UPDATE seniors SET latitude = %s, longitude = %s WHERE senior_id = %s;",
-                    (lat, lng, senior.get("senior_id")),
-                    commit=True,
-                )
-                updated_seniors += 1
-
-    return jsonify({
-        "updated_students": updated_students,
-        "updated_seniors": updated_seniors,
-    }), 200
+    job_id = enqueue("backfill_geocode", dedup_key="backfill_geocode")
+    return jsonify({"queued": job_id is not None, "job_id": job_id}), 202
 
 
 @app.route('/api/students', methods=['POST'])
@@ -883,14 +1308,13 @@ def senior_profile():
     if not isinstance(languages, list):
         return jsonify({"error": "Languages must be a list"}), 400
 
-    execute_query(
-        "UPDATE seniors SET languages = %s WHERE senior_id = %s;",
+    senior = execute_query(
+        """
+        UPDATE seniors SET languages = %s WHERE senior_id = %s
+        RETURNING senior_id, first_name, last_name, email, phone, address, languages;
+        """,
         (languages, senior_id),
         commit=True,
-    )
-    senior = execute_query(
-        "SELECT senior_id, first_name, last_name, email, phone, address, languages FROM seniors WHERE senior_id = %s;",
-        (senior_id,),
         fetch_one=True,
     )
     return jsonify({"message": "Profile updated", "senior": serialize_row(senior)})
@@ -911,20 +1335,98 @@ def list_seniors():
 
 @app.route('/api/matches/<int:senior_id>', methods=['GET'])
 def get_matches(senior_id):
+    try:
+        page_args = parse_match_page_args(SENIOR_MATCH_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     senior = get_senior_by_id(senior_id)
     if not senior:
         return jsonify({"error": "Senior not found"}), 404
 
-    students = get_all_students()
-    if not students:
-        return jsonify({"message": "No students available"}), 200
+    snapshot = current_snapshot()
+    if snapshot and snapshot.students.n and senior.get("latitude") is not None and senior.get("longitude") is not None:
+        matches, total = snapshot.student_matches_for_senior(senior, **page_args)
+    else:
+        students = get_all_students()
+        if not students:
+            return jsonify({"message": "No students available"}), 200
 
-    engine = MatchingEngine()
-    matches = engine.find_matches(senior, students)
+        engine = MatchingEngine()
+        matches, total = engine.find_matches_page(senior, students, **page_args)
 
+    payload = match_page_payload(matches, total, page_args)
+    payload["senior"] = serialize_row(senior)
+    return jsonify(payload)
+
+
+@app.route('/api/matches/batch', methods=['POST'])
+def get_matches_batch():
+    """
+    Top-K students for many seniors from one roster fetch. Body:
+    {"senior_ids": [..]} or {"seniors": "open"}, plus optional limit, min_score, max_distance_km.
+    """
+    user = get_current_user()
+    if not user or user.get("role") != "admin":
+        return jsonify({"error": "Unauthorized."}), 401
+
+    data = request.get_json() or {}
+    try:
+        limit = int(data.get("limit", SENIOR_MATCH_PAGE_SIZE))
+        min_score = float(data["min_score"]) if data.get("min_score") is not None else None
+        max_distance_km = float(data["max_distance_km"]) if data.get("max_distance_km") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit, min_score and max_distance_km must be numeric."}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive."}), 400
+    limit = min(limit, MAX_MATCH_PAGE_SIZE)
+
+    truncated = False
+    if data.get("seniors") == "open":
+        seniors = get_open_seniors(MAX_MATCH_BATCH_SENIORS + 1)
+        if seniors is None:
+            return jsonify({"error": "Failed to load seniors."}), 500
+        truncated = len(seniors) > MAX_MATCH_BATCH_SENIORS
+        seniors = seniors[:MAX_MATCH_BATCH_SENIORS]
+        missing = []
+    else:
+        senior_ids = data.get("senior_ids")
+        if not isinstance(senior_ids, list) or not senior_ids:
+            return jsonify({"error": "Provide senior_ids as a non-empty list, or seniors: \"open\"."}), 400
+        if len(senior_ids) > MAX_MATCH_BATCH_SENIORS:
+            return jsonify({"error": f"At most {MAX_MATCH_BATCH_SENIORS} seniors per batch."}), 400
+        try:
+            senior_ids = list(dict.fromkeys(int(senior_id) for senior_id in senior_ids))
+        except (TypeError, ValueError):
+            return jsonify({"error": "senior_ids must be integers."}), 400
+        seniors = get_seniors_by_ids(senior_ids)
+        if seniors is None:
+            return jsonify({"error": "Failed to load seniors."}), 500
+        found = {senior["senior_id"] for senior in seniors}
+        missing = [senior_id for senior_id in senior_ids if senior_id not in found]
+
+    filters = {"limit": limit, "min_score": min_score, "max_distance_km": max_distance_km}
+    snapshot = current_snapshot()
+    if snapshot and all(s.get("latitude") is not None and s.get("longitude") is not None for s in seniors):
+        # The mapped roster replaces the fetch entirely
+        ranked = {s["senior_id"]: snapshot.student_matches_for_senior(s, **filters) for s in seniors}
+    else:
+        students = get_all_students() if seniors else []
+        if students is None:
+            return jsonify({"error": "Failed to load students."}), 500
+        ranked = MatchingEngine().find_matches_batch(seniors, students, **filters)
     return jsonify({
-        "senior": serialize_row(senior),
-        "matches": matches
+        "results": [
+            {
+                "senior": serialize_row(senior),
+                "matches": ranked[senior["senior_id"]][0],
+                "total": ranked[senior["senior_id"]][1],
+            }
+            for senior in seniors
+        ],
+        "missing": missing,
+        "limit": limit,
+        "truncated": truncated,
     })
 
 
@@ -979,9 +1481,48 @@ def create_session_endpoint():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
+
+RECENT_SESSIONS_LIMIT = 8
+RECENT_SESSIONS_SQL = """
+    SELECT
+        se.session_id,
+        se.student_id,
+        se.senior_id,
+        se.session_time,
+        se.duration_minutes,
+        se.status,
+        se.latitude,
+        se.longitude,
+        se.notes,
+        s.first_name AS student_first_name,
+        s.last_name AS student_last_name,
+        sr.first_name AS senior_first_name,
+        sr.last_name AS senior_last_name
+    FROM sessions se
+    LEFT JOIN students s ON se.student_id = s.student_id
+    LEFT JOIN seniors sr ON se.senior_id = sr.senior_id
+    {window}
+    ORDER BY se.session_time DESC NULLS LAST
+    LIMIT %s;
+""" % RECENT_SESSIONS_LIMIT
+
+DASHBOARD_POINTS_SQL = """
+    SELECT {id_column}, first_name, last_name, latitude, longitude
+    FROM {table}
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+"""
+
+
 @app.route('/api/dashboard', methods=['GET'])
 def dashboard():
+    try:
+        since, version, changes = sync_changes(("students", "seniors", "sessions"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if since is not None and not changes:
+        return jsonify({"version": version, "changes": {}})
+
     totals = execute_query(
         """
         SELECT
@@ -993,60 +1534,80 @@ def dashboard():
         fetch_one=True,
     )
 
+    # The hot window prunes to the last month's partitions onward; older ones are only
+    # read when that window has fewer rows than the feed shows
     recent_sessions = execute_query(
-        """
-        SELECT
-            se.session_id,
-            se.student_id,
-            se.senior_id,
-            se.session_time,
-            se.duration_minutes,
-            se.status,
-            se.latitude,
-            se.longitude,
-            se.notes,
-            s.first_name AS student_first_name,
-            s.last_name AS student_last_name,
-            sr.first_name AS senior_first_name,
-            sr.last_name AS senior_last_name
-        FROM sessions se
-        LEFT JOIN students s ON se.student_id = s.student_id
-        LEFT JOIN seniors sr ON se.senior_id = sr.senior_id
-        ORDER BY se.session_time DESC NULLS LAST
-        LIMIT 8;
-        """,
+        RECENT_SESSIONS_SQL.format(window="WHERE se.session_time >= date_trunc('month', NOW()) - INTERVAL '1 month'"),
         fetch_all=True,
-    )
-
-    students = execute_query(
-        """
-        SELECT student_id, first_name, last_name, latitude, longitude
-        FROM students
-        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-        ORDER BY student_id;
-        """,
-        fetch_all=True,
-    )
-
-    seniors = execute_query(
-        """
-        SELECT senior_id, first_name, last_name, latitude, longitude
-        FROM seniors
-        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-        ORDER BY senior_id;
-        """,
-        fetch_all=True,
-    )
+    ) or []
+    if len(recent_sessions) < RECENT_SESSIONS_LIMIT:
+        recent_sessions = execute_query(RECENT_SESSIONS_SQL.format(window=""), fetch_all=True)
+
+    # Map views that use /api/map/clusters skip the per-person point lists
+    include_points = request.args.get("points", "true").lower() not in ("0", "false")
+
+    if since is not None:
+        # Totals and the recent feed are small, so they are resent whole when anything moved
+        delta = {"totals": serialize_row(totals)}
+        if "sessions" in changes:
+            delta["recent_sessions"] = serialize_rows(recent_sessions)
+        for table, id_column in (("students", "student_id"), ("seniors", "senior_id")):
+            if include_points and table in changes:
+                delta[table] = delta_section(
+                    changes[table],
+                    DASHBOARD_POINTS_SQL.format(table=table, id_column=id_column)
+                    + f" AND {id_column} = ANY(%s);",
+                    (),
+                    id_column,
+                )
+        return jsonify({"version": version, "changes": delta})
 
-    return jsonify({
+    payload = {
+        "version": version,
         "totals": serialize_row(totals),
         "recent_sessions": serialize_rows(recent_sessions),
-        "students": serialize_rows(students),
-        "seniors": serialize_rows(seniors),
+    }
+    points_format = negotiate_points_format(request.accept_mimetypes) if include_points else None
+    if include_points:
+        point_lists = {}
+        for table, id_column in (("students", "student_id"), ("seniors", "senior_id")):
+            point_lists[table] = execute_query(
+                DASHBOARD_POINTS_SQL.format(table=table, id_column=id_column) + f" ORDER BY {id_column};",
+                fetch_all=True,
+            ) or []
+        if points_format == BINARY:
+            # Coordinates only; totals and the feed come from the JSON request with points=false
+            body = encode_binary([
+                ("students", point_lists["students"], "student_id"),
+                ("seniors", point_lists["seniors"], "senior_id"),
+            ])
+            return Response(body, mimetype=BINARY, headers={"Vary": "Accept", "X-Sync-Version": str(version)})
+        for table, id_column in (("students", "student_id"), ("seniors", "senior_id")):
+            if points_format:
+                payload[table] = packed_point_list(point_lists[table], id_column, ("first_name", "last_name"))
+            else:
+                payload[table] = serialize_rows(point_lists[table])
+    return negotiated_json(payload, points_format)
+
+
+@app.route('/api/map/clusters', methods=['GET'])
+def map_clusters():
+    try:
+        bbox = parse_bbox(request.args.get("bbox"))
+        zoom = parse_zoom(request.args.get("zoom", ""))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cell = grid_cell_degrees(zoom, bbox)
+    active_only = request.args.get("sessions", "all") == "active"
+    return jsonify({
+        "zoom": zoom,
+        "cell_degrees": cell,
+        "clusters": serialize_rows(cluster_points(bbox, cell)),
+        "heatmap": serialize_rows(session_heatmap(bbox, cell, active_only=active_only)),
     })
 
 
 if __name__ == '__main__':
-    ensure_auth_schema()
     port = int(os.getenv("PORT", "5001"))
     app.run(debug=True, port=port)
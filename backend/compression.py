@@ -0,0 +1,171 @@
+"""Response compression and chunked JSON streaming.
+
+compress_response (an after_request hook) picks br or gzip from Accept-Encoding.
+- Buffered bodies are compressed only from COMPRESS_MIN_BYTES up.
+- Streamed bodies are compressed chunk by chunk as they go out.
+- Server-sent events are left alone, since a compressor would hold events back.
+Brotli is used when the optional `brotli` package is installed.
+
+Levels are tuned for CPU, not ratio. On the admin overview in
+scripts/bench_compression.py, gzip 5 lands within 2% of level 6's size for about 70%
+of its CPU; level 9 costs 5x the CPU for 5% fewer bytes. Brotli 4 is the usual
+on-the-fly setting; re-run the benchmark with brotli installed before changing it.
+"""
+
+import os
+import time
+import zlib
+
+import metrics
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") != "0"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+# Lists longer than this are streamed in chunks of this many rows
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "500"))
+
+COMPRESSIBLE_EXTRA = {"application/vnd.marletmeets.points", "application/javascript"}
+
+
+def _load_brotli():
+    try:
+        import brotli
+    except Exception:
+        return None
+    return brotli
+
+
+brotli = _load_brotli()
+
+
+def offered_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def choose_encoding(accept_encodings):
+    """
+    Returns "br", "gzip" or None for a request's parsed Accept-Encoding.
+    Ties go to brotli, which is smaller at the same CPU cost.
+    """
+    best, best_quality = None, 0
+    for encoding in offered_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(mimetype):
+    if not mimetype or mimetype == "text/event-stream":
+        return False
+    return mimetype.startswith("text/") or mimetype.endswith("json") or mimetype in COMPRESSIBLE_EXTRA
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_bytes(data, encoding):
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _record(encoding, raw, sent, cpu_s):
+    metrics.COMPRESSION_BYTES.inc(raw, encoding=encoding, stage="raw")
+    metrics.COMPRESSION_BYTES.inc(sent, encoding=encoding, stage="sent")
+    metrics.COMPRESSION_CPU_SECONDS.observe(cpu_s, encoding=encoding)
+
+
+def _compress_stream(chunks, encoding):
+    compressor = _Compressor(encoding)
+    raw = sent = 0
+    cpu_s = 0.0
+    for chunk in chunks:
+        started = time.thread_time()
+        out = compressor.compress(chunk)
+        cpu_s += time.thread_time() - started
+        raw += len(chunk)
+        if out:
+            sent += len(out)
+            yield out
+    started = time.thread_time()
+    out = compressor.finish()
+    cpu_s += time.thread_time() - started
+    sent += len(out)
+    _record(encoding, raw, sent, cpu_s)
+    if out:
+        yield out
+
+
+def compress_response(response, request):
+    """
+    Compresses response in place when the client accepts it and it is worth it.
+    """
+    if not COMPRESS_ENABLED or request.method == "HEAD":
+        return response
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if not is_compressible(response.mimetype):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        started = time.thread_time()
+        body = compress_bytes(data, encoding)
+        _record(encoding, len(data), len(body), time.thread_time() - started)
+        response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def iter_json(payload, dumps, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Yields payload (a dict) as JSON text, with keys sorted like jsonify. Top-level lists
+    longer than chunk_rows go out chunk_rows items at a time, so the full document is
+    never built as one string.
+    """
+    yield "{"
+    for i, key in enumerate(sorted(payload)):
+        value = payload[key]
+        prefix = ("," if i else "") + dumps(key) + ":"
+        if isinstance(value, list) and len(value) > chunk_rows:
+            yield prefix + "["
+            for start in range(0, len(value), chunk_rows):
+                yield ("," if start else "") + ",".join(dumps(item) for item in value[start:start + chunk_rows])
+            yield "]"
+        else:
+            yield prefix + dumps(value)
+    yield "}"
+
+
+def should_stream(payload, chunk_rows=STREAM_CHUNK_ROWS):
+    return any(isinstance(value, list) and len(value) > chunk_rows for value in payload.values())
@@ -1,42 +1,235 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+import metrics
+from slow_queries import SLOW_QUERIES, is_read_only
+
 load_dotenv()
 
-# Initialize Connection Pool
-try:
-    connection_pool = psycopg2.pool.ThreadedConnectionPool(
-        1,
-        20,
-        user=os.getenv("PG_USER"),
-        password=os.getenv("PG_PASSWORD"),
-        host=os.getenv("PG_HOST"),
-        port=os.getenv("PG_PORT"),
-        database=os.getenv("PG_DB")
-    )
-    if connection_pool:
-        print("✅ PostgreSQL connection pool created successfully")
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "20"))
+
+# The pool is created on first use, so importing this module never touches the network
+connection_pool = None
+_pool_lock = threading.Lock()
+
+
+def connection_settings():
+    return {
+        "user": os.getenv("PG_USER"),
+        "password": os.getenv("PG_PASSWORD"),
+        "host": os.getenv("PG_HOST"),
+        "port": os.getenv("PG_PORT"),
+        "database": os.getenv("PG_DB"),
+    }
+
 
-except (Exception, psycopg2.DatabaseError) as error:
-    print("❌ Error while connecting to PostgreSQL", error)
+def get_pool():
+    global connection_pool
+    if connection_pool is None:
+        with _pool_lock:
+            if connection_pool is None:
+                try:
+                    connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                        PG_POOL_MIN,
+                        PG_POOL_MAX,
+                        **connection_settings()
+                    )
+                    print("✅ PostgreSQL connection pool created successfully")
+                except (Exception, psycopg2.DatabaseError) as error:
+                    # Left unset so the next call retries instead of failing forever
+                    print("❌ Error while connecting to PostgreSQL", error)
+    return connection_pool
 
 
 def get_db_connection():
-    return connection_pool.getconn()
+    db_pool = get_pool()
+    if db_pool is None:
+        return None
+    return db_pool.getconn()
 
 
 def release_db_connection(conn):
     connection_pool.putconn(conn)
 
-def execute_query(query, params=None, commit=False, fetch_one=False, fetch_all=False):
-    conn = get_db_connection()
+
+# Optional read replica: set PG_REPLICA_HOST (other PG_REPLICA_* default to the primary's)
+REPLICA_MAX_LAG_S = float(os.getenv("REPLICA_MAX_LAG_S", "2"))
+REPLICA_CHECK_INTERVAL_S = float(os.getenv("REPLICA_CHECK_INTERVAL_S", "5"))
+
+replica_pool = None
+_replica_pool_lock = threading.Lock()
+
+
+def replica_configured():
+    return bool(os.getenv("PG_REPLICA_HOST"))
+
+
+def replica_settings():
+    settings = connection_settings()
+    for key, env in (("host", "PG_REPLICA_HOST"), ("port", "PG_REPLICA_PORT"), ("user", "PG_REPLICA_USER"),
+                     ("password", "PG_REPLICA_PASSWORD"), ("database", "PG_REPLICA_DB")):
+        if os.getenv(env):
+            settings[key] = os.getenv(env)
+    return settings
+
+
+def get_replica_pool():
+    global replica_pool
+    if replica_pool is None and replica_configured():
+        with _replica_pool_lock:
+            if replica_pool is None:
+                try:
+                    replica_pool = psycopg2.pool.ThreadedConnectionPool(
+                        PG_POOL_MIN,
+                        PG_POOL_MAX,
+                        **replica_settings()
+                    )
+                    print("✅ PostgreSQL replica connection pool created successfully")
+                except (Exception, psycopg2.DatabaseError) as error:
+                    print("❌ Error while connecting to the PostgreSQL replica", error)
+    return replica_pool
+
+
+class ReplicaHealth:
+    """
+    Replay lag of the replica, re-checked at most every interval_s by whichever caller
+    notices the reading is stale. Unreachable or lagging replicas are skipped until the next check.
+    """
+
+    # On a standby that has replayed everything it received, lag is 0 even if the primary is idle.
+    # A server that is not a standby (e.g. a second local instance for testing) reports NULL.
+    LAG_SQL = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp())
+        END AS lag_s;
+    """
+
+    def __init__(self, max_lag_s=REPLICA_MAX_LAG_S, interval_s=REPLICA_CHECK_INTERVAL_S):
+        self.max_lag_s = max_lag_s
+        self.interval_s = interval_s
+        self.lag_s = None
+        self.healthy = False
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def usable(self):
+        now = time.monotonic()
+        stale = self.checked_at is None or now - self.checked_at >= self.interval_s
+        if stale and self._lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._lock.release()
+        return self.healthy
+
+    def check(self):
+        self.checked_at = time.monotonic()
+        db_pool = get_replica_pool()
+        conn = None
+        try:
+            conn = db_pool.getconn() if db_pool else None
+            if conn is None:
+                self.healthy, self.lag_s = False, None
+                return
+            with conn.cursor() as cursor:
+                cursor.execute(self.LAG_SQL)
+                self.lag_s = float(cursor.fetchone()[0] or 0)
+            conn.rollback()
+            self.healthy = self.lag_s <= self.max_lag_s
+            if not self.healthy:
+                print(f"⚠️ Replica lag {self.lag_s:.1f}s over {self.max_lag_s}s, reading from primary")
+        except Exception as e:
+            print(f"⚠️ Replica check failed, reading from primary: {e}")
+            self.healthy, self.lag_s = False, None
+        finally:
+            if conn is not None:
+                db_pool.putconn(conn)
+
+    def mark_failed(self):
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+REPLICA_HEALTH = ReplicaHealth()
+
+metrics.REGISTRY.register_collector(
+    "db_replica_lag_seconds",
+    "Replay lag of the read replica at the last check.",
+    lambda: [((), REPLICA_HEALTH.lag_s)] if REPLICA_HEALTH.lag_s is not None else [],
+)
+
+# Per-thread read target for the current request, so every read in it sees one server
+_routing = threading.local()
+
+
+def pin_reads(target=None):
+    """
+    Fixes the read target for the rest of the current thread's request (see app.py hooks);
+    without a target, the replica is chosen when it is configured and healthy.
+    """
+    if target is None:
+        target = "replica" if replica_configured() and REPLICA_HEALTH.usable() else "primary"
+    _routing.target = target
+
+
+def unpin_reads():
+    _routing.target = None
+
+
+def _read_target(query, commit, use_primary):
+    if commit or use_primary or not replica_configured() or not is_read_only(query):
+        return "primary"
+    pinned = getattr(_routing, "target", None)
+    if pinned:
+        return pinned
+    return "replica" if REPLICA_HEALTH.usable() else "primary"
+
+
+def _connection_for(target):
+    if target == "replica":
+        db_pool = get_replica_pool()
+        return db_pool.getconn() if db_pool else None
+    return get_db_connection()
+
+
+def _release_for(target, conn):
+    if target == "replica":
+        replica_pool.putconn(conn)
+    else:
+        release_db_connection(conn)
+
+def execute_query(query, params=None, commit=False, fetch_one=False, fetch_all=False, use_primary=False):
+    """
+    Runs one statement on a pooled connection. Plain reads go to the read replica when one is
+    configured and healthy; pass use_primary=True where a read must see this request's writes.
+    """
+    target = _read_target(query, commit, use_primary)
+    wait_started = time.perf_counter()
+    conn = _connection_for(target)
+    if conn is None and target == "replica":
+        target = "primary"
+        conn = get_db_connection()
+    metrics.DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - wait_started)
     if not conn:
         return None
-    
+    metrics.DB_QUERIES.inc(target=target)
+    if commit and getattr(_routing, "target", None):
+        # Later reads in this request must see the write
+        _routing.target = "primary"
+
+    statement = metrics.statement_fingerprint(query) if metrics.ENABLED else None
     cursor = conn.cursor(cursor_factory=RealDictCursor)
+    started = time.perf_counter()
     try:
         cursor.execute(query, params)
         
@@ -50,17 +243,64 @@ def execute_query(query, params=None, commit=False, fetch_one=False, fetch_all=F
         # 2. Commit the changes SECOND
         if commit:
             conn.commit()
-            
+
+        duration = time.perf_counter() - started
+        rows = len(result) if fetch_all and result else max(cursor.rowcount, 0)
+        metrics.DB_QUERY_ROWS.inc(rows, statement=statement)
+        if SLOW_QUERIES.is_slow(duration):
+            statement = statement or metrics.statement_fingerprint(query)
+            plan = None
+            if SLOW_QUERIES.should_explain(statement, query):
+                plan = explain_analyze(conn, cursor, query, params)
+            SLOW_QUERIES.record(statement, query, params, duration, rows, plan)
         return result
         
     except Exception as e:
-        print(f"❌ Database Error: {e}")
-        return None
+        metrics.DB_QUERY_ERRORS.inc(statement=statement)
+        if target != "replica":
+            print(f"❌ Database Error: {e}")
+            return None
+        # e.g. a recovery conflict on the standby; the primary can always answer
+        print(f"⚠️ Replica query failed, retrying on primary: {e}")
+        REPLICA_HEALTH.mark_failed()
     finally:
+        metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - started, statement=statement)
         if cursor:
             cursor.close()
         if conn:
-            connection_pool.putconn(conn)
+            _release_for(target, conn)
+    return execute_query(query, params, commit, fetch_one, fetch_all, use_primary=True)
+
+def explain_analyze(conn, cursor, query, params):
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+        return "\n".join(row["QUERY PLAN"] for row in cursor.fetchall())
+    except Exception as e:
+        conn.rollback()
+        return f"EXPLAIN failed: {e}"
+
+@contextmanager
+def transaction():
+    """
+    Yields a RealDictCursor whose statements commit together, or roll back if the block raises.
+    """
+    wait_started = time.perf_counter()
+    conn = get_db_connection()
+    metrics.DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - wait_started)
+    if not conn:
+        raise psycopg2.OperationalError("Database unavailable")
+    if getattr(_routing, "target", None):
+        _routing.target = "primary"
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        release_db_connection(conn)
 
 def create_student(data):
     query = """
@@ -149,6 +389,22 @@ def get_senior_by_id(senior_id):
     result = execute_query(query, (senior_id,), fetch_one=True)
     return result
 
+def get_seniors_by_ids(senior_ids):
+    query = "SELECT * FROM seniors WHERE senior_id = ANY(%s) ORDER BY senior_id;"
+    return execute_query(query, (list(senior_ids),), fetch_all=True)
+
+def get_open_seniors(limit):
+    # Seniors no student has selected yet
+    query = """
+    SELECT s.* FROM seniors s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM matches m WHERE m.senior_id = s.senior_id AND m.status = 'selected'
+    )
+    ORDER BY s.senior_id
+    LIMIT %s;
+    """
+    return execute_query(query, (limit,), fetch_all=True)
+
 def get_all_students():
     query = "SELECT * FROM students;"
     return execute_query(query, fetch_all=True)
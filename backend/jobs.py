@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""Postgres-backed background jobs.
+
+Run a worker:  python backend/jobs.py                  # poll until SIGTERM/Ctrl+C
+               python backend/jobs.py --once           # drain ready jobs, then exit
+               python backend/jobs.py --prune-days 7   # delete finished jobs older than that
+
+Request handlers call enqueue() and return; any number of worker processes claim ready
+rows with FOR UPDATE SKIP LOCKED, so they never block on or double-claim each other.
+A claim is a lease: the row stays 'running' until locked_until, and a worker that dies
+mid-job simply lets the lease lapse so another worker picks it up. Workers claim a batch
+at a time but renew each job's lease just before running it, so the window covers the
+run itself, not the wait behind the rest of the batch. attempts doubles as a fencing
+token, so a worker whose lease was taken over cannot renew, complete or fail the job
+afterwards. Failures are retried with exponential backoff up to max_attempts.
+
+A dedup_key collapses repeated enqueues while a job is still waiting; once it is
+running, a new enqueue queues a successor so changes made meanwhile are not lost.
+Handlers must therefore be idempotent.
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import sys
+import time
+
+from db import execute_query, transaction
+from geocoding import create_geocoding_service
+
+JOB_VISIBILITY_S = float(os.getenv("JOB_VISIBILITY_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_S = float(os.getenv("JOB_BACKOFF_BASE_S", "5"))
+JOB_BACKOFF_MAX_S = float(os.getenv("JOB_BACKOFF_MAX_S", "600"))
+JOB_POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "1"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+# After a key's job fails for good, enqueues for that key are ignored this long
+JOB_FAILED_COOLDOWN_S = float(os.getenv("JOB_FAILED_COOLDOWN_S", "3600"))
+# Rows one backfill_geocode run places before queueing the next chunk
+GEOCODE_BACKFILL_CHUNK = int(os.getenv("GEOCODE_BACKFILL_CHUNK", "200"))
+
+# Rows the geocoding jobs may write: table -> primary key column
+GEOCODE_TABLES = {
+    "students": "student_id",
+    "seniors": "senior_id",
+}
+
+ENQUEUE_SQL = """
+INSERT INTO jobs (kind, payload, dedup_key, run_at, max_attempts)
+SELECT %(kind)s, item.payload::jsonb, item.dedup_key,
+       NOW() + make_interval(secs => %(delay_s)s), %(max_attempts)s
+FROM unnest(%(payloads)s::text[], %(dedup_keys)s::text[]) AS item (payload, dedup_key)
+WHERE item.dedup_key IS NULL OR NOT EXISTS (
+    SELECT 1 FROM jobs f
+    WHERE f.dedup_key = item.dedup_key AND f.status = 'failed'
+      AND f.finished_at > NOW() - make_interval(secs => %(failed_cooldown_s)s)
+)
+ON CONFLICT (dedup_key) WHERE status = 'queued' DO NOTHING
+RETURNING job_id;
+"""
+
+CLAIM_SQL = """
+WITH next AS (
+    SELECT job_id
+    FROM jobs
+    WHERE kind = ANY(%(kinds)s)
+      AND (
+          (status = 'queued' AND run_at <= NOW())
+          OR (status = 'running' AND locked_until < NOW() AND attempts < max_attempts)
+      )
+    ORDER BY run_at, job_id
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE jobs j
+SET status = 'running',
+    attempts = j.attempts + 1,
+    locked_until = NOW() + make_interval(secs => %(visibility_s)s)
+FROM next
+WHERE j.job_id = next.job_id
+RETURNING j.job_id, j.kind, j.payload, j.attempts, j.max_attempts;
+"""
+
+# Restarts the visibility window of claimed jobs that are about to run; attempts fences out
+# a job another worker re-claimed after its lease lapsed
+RENEW_SQL = """
+UPDATE jobs j
+SET locked_until = NOW() + make_interval(secs => %(visibility_s)s)
+FROM unnest(%(job_ids)s::bigint[], %(attempts)s::int[]) AS held (job_id, attempts)
+WHERE j.job_id = held.job_id AND j.attempts = held.attempts AND j.status = 'running'
+RETURNING j.job_id;
+"""
+
+# Leases that lapsed on the final attempt: the worker died every time, so stop retrying
+REAP_SQL = """
+UPDATE jobs
+SET status = 'failed', finished_at = NOW(), locked_until = NULL,
+    last_error = COALESCE(last_error, 'visibility timeout')
+WHERE status = 'running' AND locked_until < NOW() AND attempts >= max_attempts;
+"""
+
+COMPLETE_SQL = """
+UPDATE jobs
+SET status = 'done', finished_at = NOW(), locked_until = NULL
+WHERE job_id = %s AND status = 'running' AND attempts = %s;
+"""
+
+# A retry whose dedup key already has a queued successor is dropped: the successor does the same work
+FAIL_SQL = """
+UPDATE jobs
+SET status = CASE
+        WHEN attempts >= max_attempts THEN 'failed'
+        WHEN dedup_key IS NOT NULL AND EXISTS (
+            SELECT 1 FROM jobs d WHERE d.dedup_key = jobs.dedup_key AND d.status = 'queued'
+        ) THEN 'superseded'
+        ELSE 'queued'
+    END,
+    finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END,
+    run_at = NOW() + make_interval(secs => %(delay_s)s),
+    locked_until = NULL,
+    last_error = %(error)s
+WHERE job_id = %(job_id)s AND status = 'running' AND attempts = %(attempt)s
+RETURNING status;
+"""
+
+HANDLERS = {}
+# Kinds whose claimed jobs are handed to their handler together
+BATCH_KINDS = set()
+
+
+def job_handler(kind, batch=False):
+    """
+    Registers fn to run jobs of kind. A batch handler receives the payloads of every job
+    of its kind in a claimed batch and returns one error (None for success) per payload.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        if batch:
+            BATCH_KINDS.add(kind)
+        return fn
+    return register
+
+
+def enqueue_many(kind, items, delay_s=0, max_attempts=JOB_MAX_ATTEMPTS, cursor=None):
+    """
+    items: list of (payload dict, dedup_key or None). Returns the ids of jobs actually queued;
+    items whose dedup_key already has a queued job are skipped.
+    With cursor, the insert joins the caller's transaction and only exists if it commits.
+    """
+    if not items:
+        return []
+    params = {
+        "kind": kind,
+        "payloads": [json.dumps(payload or {}) for payload, _ in items],
+        "dedup_keys": [dedup_key for _, dedup_key in items],
+        "delay_s": delay_s,
+        "max_attempts": max_attempts,
+        "failed_cooldown_s": JOB_FAILED_COOLDOWN_S,
+    }
+    if cursor is not None:
+        cursor.execute(ENQUEUE_SQL, params)
+        rows = cursor.fetchall()
+    else:
+        rows = execute_query(ENQUEUE_SQL, params, commit=True, fetch_all=True) or []
+    return [row["job_id"] for row in rows]
+
+
+def enqueue(kind, payload=None, dedup_key=None, delay_s=0, max_attempts=JOB_MAX_ATTEMPTS, cursor=None):
+    """
+    Queues one job. Returns its job_id, or None when it was deduplicated (or the insert failed).
+    """
+    job_ids = enqueue_many(kind, [(payload, dedup_key)], delay_s, max_attempts, cursor)
+    return job_ids[0] if job_ids else None
+
+
+def backoff_seconds(attempt):
+    """
+    Exponential backoff, jittered over its upper half and capped at JOB_BACKOFF_MAX_S.
+    """
+    ceiling = min(JOB_BACKOFF_MAX_S, JOB_BACKOFF_BASE_S * 2 ** max(0, attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def claim(kinds, limit=JOB_BATCH_SIZE, visibility_s=JOB_VISIBILITY_S):
+    with transaction() as cursor:
+        cursor.execute(REAP_SQL)
+        cursor.execute(CLAIM_SQL, {"kinds": list(kinds), "limit": limit, "visibility_s": visibility_s})
+        return cursor.fetchall()
+
+
+def renew(jobs, visibility_s=JOB_VISIBILITY_S):
+    """
+    Extends the lease of each claimed job just before it runs, so a job that waited behind
+    others in its batch starts with a full window. Returns the jobs still held; one whose
+    lease was taken over by another worker is dropped.
+    """
+    if not jobs:
+        return []
+    rows = execute_query(
+        RENEW_SQL,
+        {
+            "job_ids": [job["job_id"] for job in jobs],
+            "attempts": [job["attempts"] for job in jobs],
+            "visibility_s": visibility_s,
+        },
+        commit=True,
+        fetch_all=True,
+    )
+    if rows is None:
+        raise RuntimeError("could not renew job leases")
+    held = {row["job_id"] for row in rows}
+    return [job for job in jobs if job["job_id"] in held]
+
+
+def run_job(job):
+    """
+    Runs one claimed job and records the outcome. Returns "done", "queued", "failed" or "superseded",
+    or None when the lease had already been taken over.
+    """
+    if job["kind"] in BATCH_KINDS:
+        return run_batch([job])[0]
+    try:
+        HANDLERS[job["kind"]](job["payload"])
+    except Exception as e:
+        return finish(job, e)
+    return finish(job)
+
+
+def run_batch(jobs):
+    """
+    Runs claimed jobs of one batch kind with a single handler call and records each outcome.
+    Returns one status per job, as run_job does.
+    """
+    try:
+        errors = HANDLERS[jobs[0]["kind"]]([job["payload"] for job in jobs])
+    except Exception as e:
+        errors = [e] * len(jobs)
+    return [finish(job, error) for job, error in zip(jobs, errors)]
+
+
+def split_batches(jobs):
+    """
+    Groups claimed jobs into run units: all jobs of a batch kind together, any other job alone.
+    """
+    units = {}
+    for job in jobs:
+        key = job["kind"] if job["kind"] in BATCH_KINDS else ("job", job["job_id"])
+        units.setdefault(key, []).append(job)
+    return list(units.values())
+
+
+def finish(job, e=None):
+    """
+    Records a job's outcome: done, or with e the failure and its retry.
+    """
+    if e is not None:
+        row = execute_query(
+            FAIL_SQL,
+            {
+                "job_id": job["job_id"],
+                "attempt": job["attempts"],
+                "delay_s": backoff_seconds(job["attempts"]),
+                "error": f"{type(e).__name__}: {e}"[:2000],
+            },
+            commit=True,
+            fetch_one=True,
+        )
+        status = row["status"] if row else None
+        print(f"⚠️ Job {job['job_id']} ({job['kind']}) attempt {job['attempts']} failed: {e} -> {status}")
+        return status
+    execute_query(COMPLETE_SQL, (job["job_id"], job["attempts"]), commit=True)
+    return "done"
+
+
+def prune(days):
+    """
+    Deletes finished jobs older than days. Returns the number of rows removed.
+    """
+    row = execute_query(
+        """
+        WITH pruned AS (
+            DELETE FROM jobs
+            WHERE finished_at < NOW() - make_interval(days => %s)
+               OR (status = 'superseded' AND run_at < NOW() - make_interval(days => %s))
+            RETURNING 1
+        )
+        SELECT COUNT(*) AS removed FROM pruned;
+        """,
+        (days, days),
+        commit=True,
+        fetch_one=True,
+    )
+    return row["removed"] if row else 0
+
+
+# Handlers
+
+_geocoder = None
+
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = create_geocoding_service()
+    return _geocoder
+
+
+def enqueue_geocoding(rows, table, cursor=None):
+    """
+    Queues a geocode job for every row (dicts with the table's id column) still missing coordinates.
+    """
+    id_column = GEOCODE_TABLES[table]
+    ids = dict.fromkeys(
+        row[id_column] for row in rows or []
+        if row.get("latitude") is None or row.get("longitude") is None
+    )
+    items = [({"table": table, "id": row_id}, f"geocode:{table}:{row_id}") for row_id in ids]
+    return enqueue_many("geocode_row", items, cursor=cursor)
+
+
+def fill_coordinates(addresses):
+    """
+    Geocodes {(table, id): address} with one lookup per distinct address and writes the
+    results, one UPDATE per table. Only gaps are filled, so a concurrent profile edit with
+    real coordinates wins. Returns {(table, id): error} for the rows left unplaced.
+    """
+    results = get_geocoder().geocode_many(list(addresses.values()))
+    placed = {}
+    failures = {}
+    for (table, row_id), address in addresses.items():
+        lat, lng, error = results.get(address, (None, None, "no address"))
+        if lat is None or lng is None:
+            failures[(table, row_id)] = RuntimeError(error or "no result")
+        else:
+            placed.setdefault(table, []).append((row_id, lat, lng))
+
+    for table, values in placed.items():
+        id_column = GEOCODE_TABLES[table]
+        ids, lats, lngs = zip(*values)
+        written = execute_query(
+            f"""
+            UPDATE {table} t
+            SET latitude = v.latitude, longitude = v.longitude
+            FROM unnest(%s::int[], %s::float8[], %s::float8[]) AS v (id, latitude, longitude)
+            WHERE t.{id_column} = v.id AND (t.latitude IS NULL OR t.longitude IS NULL)
+            RETURNING t.{id_column};
+            """,
+            (list(ids), list(lats), list(lngs)),
+            commit=True,
+            fetch_all=True,
+        )
+        if written is None:
+            raise RuntimeError(f"could not write {table} coordinates")
+    return failures
+
+
+@job_handler("geocode_row", batch=True)
+def geocode_rows(payloads):
+    """
+    Places every row named in a batch of geocode_row jobs. A failed lookup fails only that row's job.
+    """
+    addresses = {}
+    for table, id_column in GEOCODE_TABLES.items():
+        ids = [payload["id"] for payload in payloads if payload["table"] == table]
+        if not ids:
+            continue
+        rows = execute_query(
+            f"""
+            SELECT {id_column} AS id, address FROM {table}
+            WHERE {id_column} = ANY(%s) AND (latitude IS NULL OR longitude IS NULL);
+            """,
+            (ids,),
+            fetch_all=True,
+            use_primary=True,
+        )
+        if rows is None:
+            raise RuntimeError(f"could not read {table}")
+        addresses.update(((table, row["id"]), row["address"]) for row in rows)
+    # Rows already placed (or deleted) since the enqueue are simply done
+    failures = fill_coordinates(addresses) if addresses else {}
+    return [failures.get((payload["table"], payload["id"])) for payload in payloads]
+
+
+@job_handler("backfill_geocode")
+def backfill_geocode(payload):
+    """
+    Places one chunk of rows missing coordinates, then queues the next chunk, so each run
+    stays well inside its lease. Rows that can't be geocoded are logged and left for a later backfill.
+    """
+    tables = list(GEOCODE_TABLES)
+    table = payload.get("table", tables[0])
+    after = payload.get("after", 0)
+    id_column = GEOCODE_TABLES[table]
+    rows = execute_query(
+        f"""
+        SELECT {id_column} AS id, address FROM {table}
+        WHERE (latitude IS NULL OR longitude IS NULL) AND {id_column} > %s
+        ORDER BY {id_column}
+        LIMIT %s;
+        """,
+        (after, GEOCODE_BACKFILL_CHUNK),
+        fetch_all=True,
+        use_primary=True,
+    )
+    if rows is None:
+        raise RuntimeError(f"could not read {table}")
+
+    if rows:
+        failures = fill_coordinates({(table, row["id"]): row["address"] for row in rows})
+        if failures:
+            print(f"⚠️ Backfill left {len(failures)} {table} rows unplaced, e.g. {next(iter(failures.values()))}")
+        successor = {"table": table, "after": rows[-1]["id"]}
+    elif tables.index(table) + 1 < len(tables):
+        successor = {"table": tables[tables.index(table) + 1], "after": 0}
+    else:
+        return
+    enqueue("backfill_geocode", successor, f"backfill_geocode:{successor['table']}:{successor['after']}")
+
+
+NEEDS_REBUILD_SQL = """
+UPDATE seniors
+SET needs = ARRAY(
+    SELECT task_text
+    FROM senior_tasks
+    WHERE senior_id = %(senior_id)s AND status = 'open'
+    ORDER BY task_id
+)
+WHERE senior_id = %(senior_id)s
+RETURNING senior_id, pg_notify('senior_needs_changed', senior_id::text) AS notified;
+"""
+
+
+@job_handler("rebuild_needs")
+def rebuild_needs(payload):
+    # Task writes rebuild inline; this repairs a senior queued by hand (or by an older deploy)
+    execute_query(NEEDS_REBUILD_SQL, {"senior_id": payload["senior_id"]}, commit=True)
+
+
+def work(kinds, once=False, batch_size=JOB_BATCH_SIZE, poll_interval_s=JOB_POLL_INTERVAL_S):
+    """
+    Claims and runs jobs until stopped (or, with once, until nothing is ready). Returns jobs run.
+    """
+    stopping = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.append(True))
+
+    processed = 0
+    while not stopping:
+        try:
+            jobs = claim(kinds, batch_size)
+        except Exception as e:
+            print(f"❌ Job claim failed: {e}")
+            jobs = []
+        for unit in split_batches(jobs):
+            # Jobs claimed but not started before a stop go back to the queue when their lease lapses
+            if stopping:
+                break
+            try:
+                held = renew(unit)
+            except Exception as e:
+                print(f"❌ Job lease renewal failed: {e}")
+                break
+            for job in unit:
+                if job not in held:
+                    print(f"⚠️ Job {job['job_id']} ({job['kind']}) lease was taken over, skipping")
+            if not held:
+                continue
+            if held[0]["kind"] in BATCH_KINDS:
+                run_batch(held)
+            else:
+                run_job(held[0])
+            processed += len(held)
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll_interval_s)
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background jobs from the jobs table.")
+    parser.add_argument("--once", action="store_true", help="exit when no job is ready")
+    parser.add_argument("--kinds", help="comma-separated job kinds to run (default: all)")
+    parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL_S)
+    parser.add_argument("--prune-days", type=int, help="delete finished jobs older than this and exit")
+    args = parser.parse_args(argv)
+
+    if args.prune_days is not None:
+        removed = prune(args.prune_days)
+        print(f"Removed {removed} finished jobs older than {args.prune_days} days.")
+        return 0
+
+    kinds = args.kinds.split(",") if args.kinds else sorted(HANDLERS)
+    unknown = [kind for kind in kinds if kind not in HANDLERS]
+    if unknown:
+        print(f"❌ Unknown job kinds: {', '.join(unknown)}")
+        return 1
+    print(f"✅ Worker started for {', '.join(kinds)}")
+    processed = work(kinds, args.once, args.batch_size, args.poll_interval)
+    print(f"Worker stopped after {processed} jobs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import os
+
+from db import execute_query
+
+# Grid cells per 256px map tile, i.e. one cluster per ~64px square on screen
+CELLS_PER_TILE = 4
+# Upper bound on cells per response, whatever the bbox and zoom
+MAX_MAP_CELLS = int(os.getenv("MAX_MAP_CELLS", "2000"))
+MAX_ZOOM = 22
+ACTIVE_SESSION_STATUSES = ("scheduled", "active")
+
+# The (latitude, longitude) indexes from migration 5 serve the bbox filters
+CLUSTERS_SQL = """
+SELECT kind,
+       COUNT(*) AS count,
+       AVG(latitude)::float AS latitude,
+       AVG(longitude)::float AS longitude,
+       CASE WHEN COUNT(*) = 1 THEN MIN(id) END AS id
+FROM (
+    SELECT 'student' AS kind, student_id AS id, latitude, longitude
+    FROM students
+    WHERE latitude BETWEEN %(south)s AND %(north)s AND longitude BETWEEN %(west)s AND %(east)s
+    UNION ALL
+    SELECT 'senior' AS kind, senior_id AS id, latitude, longitude
+    FROM seniors
+    WHERE latitude BETWEEN %(south)s AND %(north)s AND longitude BETWEEN %(west)s AND %(east)s
+) points
+GROUP BY kind, floor(latitude / %(cell)s), floor(longitude / %(cell)s)
+ORDER BY count DESC
+LIMIT %(max_cells)s;
+"""
+
+HEATMAP_SQL = """
+SELECT COUNT(*) AS weight,
+       ((floor(latitude / %(cell)s) + 0.5) * %(cell)s)::float AS latitude,
+       ((floor(longitude / %(cell)s) + 0.5) * %(cell)s)::float AS longitude
+FROM sessions
+WHERE latitude BETWEEN %(south)s AND %(north)s AND longitude BETWEEN %(west)s AND %(east)s
+  AND (%(statuses)s IS NULL OR status = ANY(%(statuses)s))
+GROUP BY floor(latitude / %(cell)s), floor(longitude / %(cell)s)
+ORDER BY weight DESC
+LIMIT %(max_cells)s;
+"""
+
+
+def parse_bbox(value):
+    """
+    Parses "west,south,east,north" in degrees. Raises ValueError when malformed.
+    """
+    try:
+        west, south, east, north = (float(part) for part in (value or "").split(","))
+    except ValueError:
+        raise ValueError("bbox must be west,south,east,north")
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise ValueError("bbox must be west,south,east,north within world bounds, west < east")
+    return {"west": west, "south": south, "east": east, "north": north}
+
+
+def parse_zoom(value):
+    """
+    Parses an integer zoom level. Raises ValueError when malformed or out of range.
+    """
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"zoom must be an integer between 0 and {MAX_ZOOM}")
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}")
+    return zoom
+
+
+def grid_cell_degrees(zoom, bbox, max_cells=MAX_MAP_CELLS):
+    """
+    Cell edge in degrees for this zoom, doubled until the bbox fits in max_cells cells.
+    """
+    cell = 360.0 / (2 ** zoom) / CELLS_PER_TILE
+    width = bbox["east"] - bbox["west"]
+    height = bbox["north"] - bbox["south"]
+    while (width / cell) * (height / cell) > max_cells:
+        cell *= 2
+    return cell
+
+
+def cluster_points(bbox, cell, max_cells=MAX_MAP_CELLS):
+    """
+    Students and seniors inside bbox bucketed into cell-sized squares. Single-person
+    buckets carry the person's id so the map can still open their details.
+    """
+    return execute_query(CLUSTERS_SQL, {**bbox, "cell": cell, "max_cells": max_cells}, fetch_all=True) or []
+
+
+def session_heatmap(bbox, cell, active_only=False, max_cells=MAX_MAP_CELLS):
+    params = {
+        **bbox,
+        "cell": cell,
+        "max_cells": max_cells,
+        "statuses": list(ACTIVE_SESSION_STATUSES) if active_only else None,
+    }
+    return execute_query(HEATMAP_SQL, params, fetch_all=True) or []
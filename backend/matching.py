@@ -1,3 +1,4 @@
+import heapq
 import math
 
 class MatchingEngine:
@@ -70,18 +71,95 @@ class MatchingEngine:
             "common_skills": list(senior_needs.intersection(student_skills))
         }
     
-    def find_matches(self, senior, all_students, limit=3):
+    def select_top(self, scored, limit=None, offset=0, min_score=None, max_distance_km=None):
+        """
+        Filters scored candidates and returns (page, total_matching).
+        Only the first offset + limit entries are ranked (heap selection), not the whole list.
+        """
+        candidates = [
+            s for s in scored
+            if (min_score is None or s['total_score'] >= min_score)
+            and (max_distance_km is None or s['distance_km'] <= max_distance_km)
+        ]
+        total = len(candidates)
+
+        if limit is None:
+            candidates.sort(key=lambda x: x['total_score'], reverse=True)
+            return candidates[offset:], total
+
+        # nlargest keeps ties in input order, same as the stable sort it replaces
+        top = heapq.nlargest(offset + limit, candidates, key=lambda x: x['total_score'])
+        return top[offset:], total
+
+    def find_matches_page(self, senior, all_students, limit=3, offset=0, min_score=None, max_distance_km=None):
+        """
+        Returns (page, total_matching) of ranked students for a senior
+        """
+        scored_students = (self.calculate_score(senior, student) for student in all_students)
+        return self.select_top(
+            scored_students,
+            limit=limit,
+            offset=offset,
+            min_score=min_score,
+            max_distance_km=max_distance_km,
+        )
+
+    def find_matches_batch(self, seniors, all_students, limit=3, min_score=None, max_distance_km=None):
+        """
+        Ranks students for several seniors in one pass over all_students.
+        Returns {senior_id: (top matches, total_matching)}; ties keep roster order, as in select_top.
+        """
+        heaps = {senior['senior_id']: [] for senior in seniors}
+        totals = dict.fromkeys(heaps, 0)
+        for index, student in enumerate(all_students):
+            for senior in seniors:
+                scored = self.calculate_score(senior, student)
+                if min_score is not None and scored['total_score'] < min_score:
+                    continue
+                if max_distance_km is not None and scored['distance_km'] > max_distance_km:
+                    continue
+                senior_id = senior['senior_id']
+                totals[senior_id] += 1
+                # Bounded min-heap of the best `limit`; -index ranks earlier students first on ties
+                entry = (scored['total_score'], -index, scored)
+                heap = heaps[senior_id]
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+        return {
+            senior_id: ([entry[2] for entry in sorted(heap, key=lambda e: e[:2], reverse=True)], totals[senior_id])
+            for senior_id, heap in heaps.items()
+        }
+
+    def find_matches(self, senior, all_students, limit=3, **filters):
         """
         Returns the top N matches for a senior
         """
-        scored_students = []
-        for student in all_students:
-            score_data = self.calculate_score(senior, student)
-            scored_students.append(score_data)
+        matches, _ = self.find_matches_page(senior, all_students, limit=limit, **filters)
+        return matches
+
 
-        # Sort by total_score (Highest first)
-        scored_students.sort(key=lambda x: x['total_score'], reverse=True)
-        
-        return scored_students[:limit]
+def score_seniors_for_student(student, seniors, limit=None, offset=0, min_score=None, max_distance_km=None):
+    engine = MatchingEngine()
 
+    def scored():
+        for senior in seniors:
+            score = engine.calculate_score(senior, student)
+            yield {
+                "senior_id": senior.get("senior_id"),
+                "first_name": senior.get("first_name"),
+                "last_name": senior.get("last_name"),
+                "total_score": score.get("total_score"),
+                "distance_km": score.get("distance_km"),
+                "common_skills": score.get("common_skills"),
+                "needs": senior.get("needs", []),
+            }
 
+    return engine.select_top(
+        scored(),
+        limit=limit,
+        offset=offset,
+        min_score=min_score,
+        max_distance_km=max_distance_km,
+    )
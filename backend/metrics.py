@@ -0,0 +1,188 @@
+import hashlib
+import os
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+
+# Set METRICS_ENABLED=0 to turn every observe/inc into a no-op
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                state[idx] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', repr(bound))])} {cumulative}"
+                )
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name, help_text, collect, metric_type="gauge", labelnames=()):
+        """
+        collect() is called at scrape time and returns [(label values tuple, value), ...]
+        """
+        self._collectors.append((name, help_text, collect, metric_type, tuple(labelnames)))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, collect, metric_type, labelnames in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"❌ Metrics collector error ({name}): {e}")
+                continue
+            for key, value in samples:
+                lines.append(f"{name}{_format_labels(labelnames, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Flask request latency by route template.", ("method", "route", "status"),
+))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "execute_query statement latency by fingerprint.", ("statement",),
+))
+DB_POOL_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection.",
+))
+DB_QUERY_ROWS = REGISTRY.register(Counter(
+    "db_query_rows_total", "Rows returned or affected by fingerprint.", ("statement",),
+))
+DB_QUERIES = REGISTRY.register(Counter(
+    "db_queries_total", "execute_query statements by target server.", ("target",),
+))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    "db_query_errors_total", "Failed statements by fingerprint.", ("statement",),
+))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for an admission slot.", ("cost_class",),
+))
+ADMISSION_REJECTIONS = REGISTRY.register(Counter(
+    "admission_rejections_total", "Requests turned away by admission control.", ("route", "reason"),
+))
+COMPRESSION_BYTES = REGISTRY.register(Counter(
+    "http_compression_bytes_total", "Response bytes before (raw) and after (sent) compression.", ("encoding", "stage"),
+))
+COMPRESSION_CPU_SECONDS = REGISTRY.register(Histogram(
+    "http_compression_cpu_seconds", "Thread CPU spent compressing one response body.", ("encoding",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+))
+GEOCODE_SECONDS = REGISTRY.register(Histogram(
+    "geocode_request_duration_seconds", "Outbound geocoding latency.", ("backend", "outcome"),
+))
+
+_statements = {}
+_statements_lock = threading.Lock()
+
+
+def _collect_statements():
+    with _statements_lock:
+        return [((fp, sql), 1) for fp, sql in sorted(_statements.items())]
+
+
+REGISTRY.register_collector(
+    "db_statement_info",
+    "Maps statement fingerprints to their normalized SQL.",
+    _collect_statements,
+    labelnames=("statement", "sql"),
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def statement_fingerprint(query):
+    """
+    Short stable id for a SQL statement: whitespace collapsed, inline literals replaced by ?.
+    """
+    normalized = _LITERALS.sub("?", _WHITESPACE.sub(" ", query).strip())
+    fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    with _statements_lock:
+        _statements.setdefault(fingerprint, normalized[:300])
+    return fingerprint
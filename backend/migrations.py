@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""Versioned schema migrations.
+
+Run: python backend/migrations.py            # apply pending migrations
+     python backend/migrations.py --status   # show current/expected version
+
+Each migration runs once and is recorded in schema_migrations. Migrations
+marked transactional=False run in autocommit mode so they can use
+CREATE INDEX CONCURRENTLY without blocking writes.
+"""
+
+import hashlib
+import os
+from datetime import date
+import sys
+import tempfile
+
+import psycopg2
+
+from db import execute_query, get_db_connection, release_db_connection
+from partitions import SESSIONS_MONTHS_AHEAD, add_months, ensure_partitions, month_start
+from sync import SYNC_TABLES
+
+# Arbitrary key so two deploys never run migrations at the same time
+MIGRATION_LOCK_KEY = 727150001
+
+
+def _seed_admin(cursor):
+    from werkzeug.security import generate_password_hash
+
+    cursor.execute(
+        """
+        INSERT INTO users (email, password_hash, role)
+        VALUES (%s, %s, 'admin')
+        ON CONFLICT (email) DO NOTHING;
+        """,
+        ("admin@mail.mcgill.ca", generate_password_hash("admin123", method="pbkdf2:sha256")),
+    )
+
+
+def concurrent_index(name, definition):
+    """
+    Step that builds an index without blocking writes. An interrupted CONCURRENTLY build
+    leaves an INVALID index behind that IF NOT EXISTS would skip, so drop that first.
+    """
+    def step(cursor):
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND NOT i.indisvalid;
+            """,
+            (name,),
+        )
+        if cursor.fetchone():
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+        cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition};")
+    return step
+
+
+def _partition_sessions(cursor):
+    """
+    Swaps sessions for a copy range-partitioned by month on session_time. The primary key
+    has to include the partition key, so session_time becomes NOT NULL DEFAULT NOW().
+    """
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = 'sessions'::regclass;")
+    if cursor.fetchone()[0] == "p":
+        return
+
+    cursor.execute("SELECT pg_get_serial_sequence('sessions', 'session_id');")
+    sequence = cursor.fetchone()[0]
+    cursor.execute("UPDATE sessions SET session_time = COALESCE(created_at, NOW()) WHERE session_time IS NULL;")
+    cursor.execute("ALTER TABLE sessions RENAME TO sessions_unpartitioned;")
+    cursor.execute("ALTER TABLE sessions_unpartitioned RENAME CONSTRAINT sessions_pkey TO sessions_unpartitioned_pkey;")
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_created_at;")
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_lat_lng;")
+
+    cursor.execute(
+        """
+        CREATE TABLE sessions (LIKE sessions_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (session_time);
+        """
+    )
+    cursor.execute("ALTER TABLE sessions ALTER COLUMN session_time SET DEFAULT NOW();")
+    cursor.execute("ALTER TABLE sessions ALTER COLUMN session_time SET NOT NULL;")
+    cursor.execute("ALTER TABLE sessions ADD CONSTRAINT sessions_pkey PRIMARY KEY (session_id, session_time);")
+    if sequence:
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY sessions.session_id;")
+    cursor.execute(
+        "ALTER TABLE sessions ADD FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE SET NULL;"
+    )
+    cursor.execute(
+        "ALTER TABLE sessions ADD FOREIGN KEY (senior_id) REFERENCES seniors(senior_id) ON DELETE SET NULL;"
+    )
+    cursor.execute("CREATE TABLE sessions_default PARTITION OF sessions DEFAULT;")
+
+    cursor.execute("SELECT MIN(session_time) FROM sessions_unpartitioned;")
+    oldest = cursor.fetchone()[0]
+    this_month = month_start(date.today())
+    first = month_start(oldest) if oldest else this_month
+    ensure_partitions(cursor, min(first, this_month), add_months(this_month, SESSIONS_MONTHS_AHEAD))
+
+    cursor.execute("INSERT INTO sessions SELECT * FROM sessions_unpartitioned;")
+    cursor.execute("DROP TABLE sessions_unpartitioned;")
+
+
+# (version, name, steps, transactional) — a step is SQL text or a callable taking a cursor
+MIGRATIONS = [
+    (
+        1,
+        "auth tables, senior tasks, matches and default admin",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                user_id SERIAL PRIMARY KEY,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                role VARCHAR(20) NOT NULL,
+                student_id INT REFERENCES students(student_id) ON DELETE SET NULL,
+                senior_id INT REFERENCES seniors(senior_id) ON DELETE SET NULL,
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS auth_tokens (
+                token TEXT PRIMARY KEY,
+                user_id INT REFERENCES users(user_id) ON DELETE CASCADE,
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS senior_tasks (
+                task_id SERIAL PRIMARY KEY,
+                senior_id INT REFERENCES seniors(senior_id) ON DELETE CASCADE,
+                task_text TEXT NOT NULL,
+                status VARCHAR(20) DEFAULT 'open',
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                match_id SERIAL PRIMARY KEY,
+                student_id INT REFERENCES students(student_id) ON DELETE CASCADE,
+                senior_id INT REFERENCES seniors(senior_id) ON DELETE CASCADE,
+                status VARCHAR(20) DEFAULT 'selected',
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+            """,
+            _seed_admin,
+        ],
+        True,
+    ),
+    (
+        2,
+        "hot-path indexes",
+        [
+            # created_at trails the filter columns so the ORDER BY m.created_at DESC reads come pre-sorted
+            concurrent_index("idx_matches_student_status", "matches (student_id, status, created_at)"),
+            concurrent_index("idx_matches_senior_status", "matches (senior_id, status, created_at)"),
+            concurrent_index("idx_senior_tasks_senior_status", "senior_tasks (senior_id, status)"),
+            concurrent_index("idx_auth_tokens_user", "auth_tokens (user_id)"),
+            concurrent_index("idx_sessions_created_at", "sessions (created_at)"),
+        ],
+        False,
+    ),
+    (
+        3,
+        "notify listeners when a student selects a senior",
+        [
+            """
+            CREATE OR REPLACE FUNCTION notify_match_selected() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(
+                    'match_selected',
+                    json_build_object('match_id', NEW.match_id, 'senior_id', NEW.senior_id)::text
+                );
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            "DROP TRIGGER IF EXISTS matches_notify_selected ON matches;",
+            """
+            CREATE TRIGGER matches_notify_selected
+            AFTER INSERT ON matches
+            FOR EACH ROW WHEN (NEW.status = 'selected')
+            EXECUTE FUNCTION notify_match_selected();
+            """,
+        ],
+        True,
+    ),
+    (
+        4,
+        "change log for delta sync",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                change_id BIGSERIAL PRIMARY KEY,
+                txid BIGINT NOT NULL DEFAULT txid_current(),
+                table_name TEXT NOT NULL,
+                row_id INT NOT NULL,
+                op VARCHAR(6) NOT NULL,
+                student_id INT,
+                senior_id INT,
+                changed_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_change_log_txid ON change_log (txid);",
+            "CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log (changed_at);",
+            """
+            CREATE TABLE IF NOT EXISTS change_log_horizon (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                txid BIGINT NOT NULL
+            );
+            """,
+            # TG_ARGV[0] names the primary key; student_id / senior_id scope per-user deltas
+            """
+            CREATE OR REPLACE FUNCTION log_row_change() RETURNS trigger AS $$
+            DECLARE
+                rec jsonb;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    rec := to_jsonb(OLD);
+                ELSE
+                    rec := to_jsonb(NEW);
+                END IF;
+                INSERT INTO change_log (table_name, row_id, op, student_id, senior_id)
+                VALUES (
+                    TG_TABLE_NAME,
+                    (rec ->> TG_ARGV[0])::int,
+                    TG_OP,
+                    (rec ->> 'student_id')::int,
+                    (rec ->> 'senior_id')::int
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+        ]
+        + [
+            step
+            for table, key in SYNC_TABLES.items()
+            for step in (
+                f"DROP TRIGGER IF EXISTS {table}_change_log ON {table};",
+                f"""
+                CREATE TRIGGER {table}_change_log
+                AFTER INSERT OR UPDATE OR DELETE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION log_row_change('{key}');
+                """,
+            )
+        ],
+        True,
+    ),
+    (
+        5,
+        "coordinate indexes for map bbox queries",
+        [
+            concurrent_index("idx_students_lat_lng", "students (latitude, longitude)"),
+            concurrent_index("idx_seniors_lat_lng", "seniors (latitude, longitude)"),
+            concurrent_index("idx_sessions_lat_lng", "sessions (latitude, longitude)"),
+        ],
+        False,
+    ),
+    (
+        6,
+        "monthly partitioned sessions with BRIN and partial indexes",
+        [
+            # Partitions report their own TG_TABLE_NAME, so the parent name can be passed explicitly
+            """
+            CREATE OR REPLACE FUNCTION log_row_change() RETURNS trigger AS $$
+            DECLARE
+                rec jsonb;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    rec := to_jsonb(OLD);
+                ELSE
+                    rec := to_jsonb(NEW);
+                END IF;
+                INSERT INTO change_log (table_name, row_id, op, student_id, senior_id)
+                VALUES (
+                    COALESCE(TG_ARGV[1], TG_TABLE_NAME),
+                    (rec ->> TG_ARGV[0])::int,
+                    TG_OP,
+                    (rec ->> 'student_id')::int,
+                    (rec ->> 'senior_id')::int
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+            """,
+            _partition_sessions,
+            # Rows arrive roughly in time order, so BRIN stays tiny and still skips most blocks
+            "CREATE INDEX IF NOT EXISTS idx_sessions_session_time_brin ON sessions USING brin (session_time);",
+            "CREATE INDEX IF NOT EXISTS idx_sessions_created_at_brin ON sessions USING brin (created_at);",
+            """
+            CREATE INDEX IF NOT EXISTS idx_sessions_active
+            ON sessions (status, session_time)
+            WHERE status IN ('scheduled', 'active');
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_sessions_lat_lng ON sessions (latitude, longitude);",
+            "DROP TRIGGER IF EXISTS sessions_change_log ON sessions;",
+            """
+            CREATE TRIGGER sessions_change_log
+            AFTER INSERT OR UPDATE OR DELETE ON sessions
+            FOR EACH ROW EXECUTE FUNCTION log_row_change('session_id', 'sessions');
+            """,
+        ],
+        True,
+    ),
+    (
+        7,
+        "background job queue",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id BIGSERIAL PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload JSONB NOT NULL DEFAULT '{}',
+                dedup_key TEXT,
+                status TEXT NOT NULL DEFAULT 'queued'
+                    CHECK (status IN ('queued', 'running', 'done', 'failed', 'superseded')),
+                attempts INT NOT NULL DEFAULT 0,
+                max_attempts INT NOT NULL DEFAULT 5,
+                run_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                locked_until TIMESTAMPTZ,
+                last_error TEXT,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                finished_at TIMESTAMPTZ
+            );
+            """,
+            # At most one not-yet-started job per dedup key; a running one may have a queued successor
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedup_queued
+            ON jobs (dedup_key) WHERE status = 'queued';
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (run_at, job_id) WHERE status = 'queued';",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_leases ON jobs (locked_until) WHERE status = 'running';",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL;",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_failed_keys ON jobs (dedup_key, finished_at) WHERE status = 'failed';",
+        ],
+        True,
+    ),
+]
+
+LATEST_VERSION = max(version for version, _, _, _ in MIGRATIONS)
+
+
+def current_version():
+    """
+    Returns the applied schema version, or None when schema_migrations does not exist yet.
+    """
+    table = execute_query(
+        "SELECT to_regclass('schema_migrations') IS NOT NULL AS present;", fetch_one=True, use_primary=True
+    )
+    if not table or not table.get("present"):
+        return None
+    row = execute_query(
+        "SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations;", fetch_one=True, use_primary=True
+    )
+    return row.get("version") if row else None
+
+
+def check_schema_version():
+    """
+    Startup check: warns (never migrates) when the database is behind the code.
+    Returns True when the schema is current.
+    """
+    version = current_version()
+    if version is not None and version >= LATEST_VERSION:
+        return True
+    print(
+        f"⚠️ Database schema is at version {version or 0}, code expects {LATEST_VERSION}. "
+        "Run: python backend/migrations.py"
+    )
+    return False
+
+
+def schema_stamp_path():
+    """
+    Marker file shared by every worker on a host; its name changes with the target
+    database and the latest migration, so a new deploy checks again.
+    """
+    override = os.getenv("SCHEMA_STAMP_FILE")
+    if override:
+        return override
+    target = f"{os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}@v{LATEST_VERSION}"
+    digest = hashlib.sha1(target.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"marletmeets-schema-{digest}")
+
+
+def ensure_schema_ready(auto_migrate=False):
+    """
+    Verifies the schema once per deployment instead of once per process.
+    With auto_migrate, pending migrations are applied first.
+    """
+    stamp = schema_stamp_path()
+    if os.path.exists(stamp):
+        return True
+    if auto_migrate:
+        run_migrations()
+    if not check_schema_version():
+        return False
+    try:
+        with open(stamp, "w") as f:
+            f.write(str(LATEST_VERSION))
+    except OSError as e:
+        print(f"⚠️ Could not write schema stamp {stamp}: {e}")
+    return True
+
+
+def _run_step(cursor, step):
+    if callable(step):
+        step(cursor)
+    else:
+        cursor.execute(step)
+
+
+def run_migrations():
+    """
+    Applies pending migrations in order and returns the versions applied.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise psycopg2.OperationalError("Database unavailable")
+    applied = []
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_KEY,))
+        try:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT NOW()
+                );
+                """
+            )
+            cursor.execute("SELECT version FROM schema_migrations;")
+            done = {row[0] for row in cursor.fetchall()}
+
+            for version, name, steps, transactional in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"Applying migration {version}: {name}")
+                if transactional:
+                    conn.autocommit = False
+                    try:
+                        for step in steps:
+                            _run_step(cursor, step)
+                        cursor.execute(
+                            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                            (version, name),
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    finally:
+                        conn.autocommit = True
+                else:
+                    # Steps are idempotent, so a failed run can simply be retried
+                    for step in steps:
+                        _run_step(cursor, step)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                        (version, name),
+                    )
+                applied.append(version)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_KEY,))
+            cursor.close()
+    finally:
+        conn.autocommit = False
+        release_db_connection(conn)
+    return applied
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "--status" in argv:
+        print(f"Database schema version: {current_version() or 0} (latest: {LATEST_VERSION})")
+        return 0
+    try:
+        applied = run_migrations()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return 1
+    print(f"Applied migrations: {applied}" if applied else "Schema already up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+
+import metrics
+from db import connection_settings
+
+MATCH_SELECTED_CHANNEL = "match_selected"
+# How long a stream waits for an event before sending a keep-alive and re-checking
+SSE_HEARTBEAT_S = float(os.getenv("SSE_HEARTBEAT_S", "15"))
+# Each open stream holds a server thread, so cap them per process
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "200"))
+
+
+class MatchListener:
+    """
+    One LISTEN connection per process, shared by every open notification stream.
+    Subscribers get a queue that receives the match_id of each new selection for their senior.
+    """
+
+    def __init__(self, channel=MATCH_SELECTED_CHANNEL, max_clients=SSE_MAX_CLIENTS):
+        self.channel = channel
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._thread = None
+        self.delivered = 0
+        self.reconnects = 0
+
+    def subscribe(self, senior_id):
+        """
+        Returns a queue for senior_id, or None when the process already has max_clients streams.
+        """
+        with self._lock:
+            if self._count() >= self.max_clients:
+                return None
+            q = queue.Queue(maxsize=100)
+            self._subscribers.setdefault(senior_id, set()).add(q)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="match-listener", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, senior_id, q):
+        with self._lock:
+            queues = self._subscribers.get(senior_id)
+            if queues:
+                queues.discard(q)
+                if not queues:
+                    del self._subscribers[senior_id]
+
+    def _count(self):
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def client_count(self):
+        with self._lock:
+            return self._count()
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+            senior_id = int(event["senior_id"])
+        except (ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            queues = list(self._subscribers.get(senior_id, ()))
+        for q in queues:
+            try:
+                q.put_nowait(event.get("match_id"))
+                self.delivered += 1
+            except queue.Full:
+                # The stream re-reads everything newer than its last id, so a dropped wake-up is harmless
+                pass
+
+    def _has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def _should_stop(self):
+        # Checked and cleared under the lock so subscribe() never sees a thread that is about to exit
+        with self._lock:
+            if self._subscribers:
+                return False
+            self._thread = None
+            return True
+
+    def _run(self):
+        backoff = 1
+        while not self._should_stop():
+            conn = None
+            try:
+                conn = psycopg2.connect(**connection_settings())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel};")
+                print(f"✅ Listening for {self.channel} notifications")
+                backoff = 1
+                while self._has_subscribers():
+                    if select.select([conn], [], [], SSE_HEARTBEAT_S) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.dispatch(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"❌ Notification listener error: {e}")
+                self.reconnects += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+MATCH_LISTENER = MatchListener()
+
+metrics.REGISTRY.register_collector(
+    "notification_streams",
+    "Open senior notification streams and listener activity.",
+    lambda: [
+        (("open",), MATCH_LISTENER.client_count()),
+        (("delivered",), MATCH_LISTENER.delivered),
+        (("reconnects",), MATCH_LISTENER.reconnects),
+    ],
+    labelnames=("state",),
+)
+
+
+def sse_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,165 @@
+"""Compact encodings for lists of map points.
+
+Two formats, picked by the Accept header (see negotiate_points_format):
+
+PACKED_JSON  Columnar JSON. Coordinates are quantized to 1e-5 degrees (~1 m) and,
+             like ids, delta-encoded against the previous point in id order:
+             {"encoding": "delta-v1", "scale": 100000, "count": n,
+              "ids": [...], "lat": [...], "lng": [...], "<field>": [...]}
+             Rows without coordinates are sent as plain objects under "unplaced".
+
+BINARY       Little-endian typed arrays, coordinates only:
+             header  "MMPK" | version u16 | section count u16
+             section name length u16 | name utf-8 | padding to 4 bytes
+                     count u32 | scale u32 | ids i32[count] | lat i32[count] | lng i32[count]
+             Values are absolute (not delta) so a browser can wrap them in Int32Array as is.
+"""
+
+import struct
+import sys
+from array import array
+
+PACKED_JSON = "application/vnd.marletmeets.packed+json"
+BINARY = "application/vnd.marletmeets.points"
+ENCODING = "delta-v1"
+SCALE = 100000
+MAGIC = b"MMPK"
+BINARY_VERSION = 1
+
+
+def negotiate_points_format(accept_mimetypes, allow_binary=True):
+    """
+    Returns PACKED_JSON, BINARY or None (plain JSON) for a request's Accept header.
+    Plain JSON wins ties so existing clients never see a change.
+    """
+    offered = ["application/json", PACKED_JSON] + ([BINARY] if allow_binary else [])
+    best = accept_mimetypes.best_match(offered, default="application/json")
+    return None if best == "application/json" else best
+
+
+def _placed(rows, id_column):
+    placed, unplaced = [], []
+    for row in rows or []:
+        if row.get("latitude") is None or row.get("longitude") is None:
+            unplaced.append(row)
+        else:
+            placed.append(row)
+    placed.sort(key=lambda row: row[id_column])
+    return placed, unplaced
+
+
+def _quantize(value):
+    return int(round(float(value) * SCALE))
+
+
+def _deltas(values):
+    previous = 0
+    out = []
+    for value in values:
+        out.append(value - previous)
+        previous = value
+    return out
+
+
+def _undelta(deltas):
+    total = 0
+    out = []
+    for delta in deltas:
+        total += delta
+        out.append(total)
+    return out
+
+
+def pack_points(rows, id_column, fields=()):
+    """
+    Packs rows (dicts with id_column, latitude, longitude and fields) into the columnar form.
+    Unplaced rows are returned as-is for the caller to serialize.
+    """
+    placed, unplaced = _placed(rows, id_column)
+    packed = {
+        "encoding": ENCODING,
+        "scale": SCALE,
+        "id_column": id_column,
+        "count": len(placed),
+        "ids": _deltas([row[id_column] for row in placed]),
+        "lat": _deltas([_quantize(row["latitude"]) for row in placed]),
+        "lng": _deltas([_quantize(row["longitude"]) for row in placed]),
+        "unplaced": unplaced,
+    }
+    for field in fields:
+        packed[field] = [row.get(field) for row in placed]
+    return packed
+
+
+def unpack_points(packed):
+    """
+    Inverse of pack_points: rebuilds row dicts (placed rows first, in id order).
+    """
+    id_column = packed["id_column"]
+    scale = packed["scale"]
+    fields = [key for key in packed if key not in (
+        "encoding", "scale", "id_column", "count", "ids", "lat", "lng", "unplaced")]
+    ids = _undelta(packed["ids"])
+    lats = _undelta(packed["lat"])
+    lngs = _undelta(packed["lng"])
+    rows = []
+    for i, row_id in enumerate(ids):
+        row = {id_column: row_id, "latitude": lats[i] / scale, "longitude": lngs[i] / scale}
+        for field in fields:
+            row[field] = packed[field][i]
+        rows.append(row)
+    return rows + list(packed.get("unplaced") or [])
+
+
+def _int32_bytes(values):
+    column = array("i", values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode_binary(sections):
+    """
+    sections: list of (name, rows, id_column). Rows without coordinates are left out.
+    """
+    parts = [struct.pack("<4sHH", MAGIC, BINARY_VERSION, len(sections))]
+    for name, rows, id_column in sections:
+        placed, _ = _placed(rows, id_column)
+        encoded_name = name.encode("utf-8")
+        header = struct.pack("<H", len(encoded_name)) + encoded_name
+        header += b"\0" * (-len(header) % 4)
+        parts.append(header)
+        parts.append(struct.pack("<II", len(placed), SCALE))
+        parts.append(_int32_bytes([row[id_column] for row in placed]))
+        parts.append(_int32_bytes([_quantize(row["latitude"]) for row in placed]))
+        parts.append(_int32_bytes([_quantize(row["longitude"]) for row in placed]))
+    return b"".join(parts)
+
+
+def decode_binary(blob):
+    """
+    Returns {name: [(id, latitude, longitude), ...]} from encode_binary output.
+    """
+    magic, version, count = struct.unpack_from("<4sHH", blob, 0)
+    if magic != MAGIC or version != BINARY_VERSION:
+        raise ValueError("not a packed points payload")
+    offset = 8
+    sections = {}
+    for _ in range(count):
+        (name_length,) = struct.unpack_from("<H", blob, offset)
+        name = blob[offset + 2:offset + 2 + name_length].decode("utf-8")
+        offset += 2 + name_length
+        offset += -offset % 4
+        size, scale = struct.unpack_from("<II", blob, offset)
+        offset += 8
+        columns = []
+        for _ in range(3):
+            column = array("i")
+            column.frombytes(blob[offset:offset + 4 * size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            columns.append(column)
+            offset += 4 * size
+        ids, lats, lngs = columns
+        sections[name] = [(ids[i], lats[i] / scale, lngs[i] / scale) for i in range(size)]
+    return sections
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Monthly partition maintenance for the sessions table.
+
+Run: python backend/partitions.py                      # create the next months' partitions
+     python backend/partitions.py --retain-months 24   # also detach partitions older than that
+
+sessions is range-partitioned on session_time (migration 6), one partition per
+calendar month plus sessions_default for anything outside them. Run this from cron
+at least monthly so new sessions always land in a real monthly partition.
+Detached partitions stay in the database as ordinary tables until someone archives
+or drops them. Their rows are logged as deletes, so delta sync clients drop them too.
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import date
+
+from db import transaction
+
+SESSIONS_MONTHS_AHEAD = int(os.getenv("SESSIONS_MONTHS_AHEAD", "3"))
+PARTITION_NAME = re.compile(r"^sessions_(\d{4})_(\d{2})$")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"sessions_{month:%Y_%m}"
+
+
+def existing_partitions(cursor):
+    """
+    Returns {month: partition name} for the monthly partitions currently attached.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'sessions'::regclass;
+        """
+    )
+    months = {}
+    for row in cursor.fetchall():
+        name = row[0] if isinstance(row, tuple) else row["relname"]
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+
+def create_partition(cursor, month):
+    """
+    Adds the partition for month. Rows that already fell into sessions_default for that
+    range are moved across, and re-logged as updates so delta sync clients keep them.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    cursor.execute(f"CREATE TABLE {name} (LIKE sessions INCLUDING DEFAULTS);")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM sessions_default
+            WHERE session_time >= %s AND session_time < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved;
+        """,
+        (start, end),
+    )
+    moved = cursor.rowcount
+    cursor.execute(f"ALTER TABLE sessions ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s);", (start, end))
+    if moved:
+        cursor.execute(
+            f"""
+            INSERT INTO change_log (table_name, row_id, op, student_id, senior_id)
+            SELECT 'sessions', session_id, 'UPDATE', student_id, senior_id FROM {name};
+            """
+        )
+    return name, moved
+
+
+def ensure_partitions(cursor, first_month, last_month):
+    """
+    Creates every missing monthly partition from first_month through last_month.
+    """
+    existing = existing_partitions(cursor)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            created.append(create_partition(cursor, month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_old_partitions(cursor, retain_months, today=None):
+    """
+    Detaches monthly partitions that end more than retain_months before the current month.
+    Detaching fires no row triggers, so each removed session is logged as a delete here.
+    Returns [(name, rows)].
+    """
+    cutoff = add_months(month_start(today or date.today()), -retain_months)
+    detached = []
+    for month, name in sorted(existing_partitions(cursor).items()):
+        if month < cutoff:
+            cursor.execute(f"ALTER TABLE sessions DETACH PARTITION {name};")
+            cursor.execute(
+                f"""
+                INSERT INTO change_log (table_name, row_id, op, student_id, senior_id)
+                SELECT 'sessions', session_id, 'DELETE', student_id, senior_id FROM {name};
+                """
+            )
+            detached.append((name, cursor.rowcount))
+    return detached
+
+
+def maintain(months_ahead=SESSIONS_MONTHS_AHEAD, retain_months=None, today=None):
+    this_month = month_start(today or date.today())
+    with transaction() as cursor:
+        created = ensure_partitions(cursor, this_month, add_months(this_month, months_ahead))
+        detached = detach_old_partitions(cursor, retain_months, today) if retain_months else []
+    return created, detached
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create upcoming and detach expired sessions partitions.")
+    parser.add_argument("--months-ahead", type=int, default=SESSIONS_MONTHS_AHEAD)
+    parser.add_argument("--retain-months", type=int, help="detach partitions older than this many months")
+    args = parser.parse_args(argv)
+
+    try:
+        created, detached = maintain(args.months_ahead, args.retain_months)
+    except Exception as e:
+        print(f"❌ Partition maintenance failed: {e}")
+        return 1
+    for name, moved in created:
+        print(f"✅ Created {name}" + (f" ({moved} rows moved from sessions_default)" if moved else ""))
+    for name, rows in detached:
+        print(f"✅ Detached {name} ({rows} sessions logged as deleted)")
+    if not created and not detached:
+        print("Partitions already up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import metrics
+
+# Target parameters for new and upgraded hashes (werkzeug method string)
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+# hashlib's PBKDF2 releases the GIL, so these threads really run in parallel
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Hashes allowed to wait behind the busy workers before new ones are turned away
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", str(HASH_WORKERS * 4)))
+HASH_TIMEOUT_S = float(os.getenv("HASH_TIMEOUT_S", "10"))
+
+LOGIN_ATTEMPTS_PER_EMAIL = int(os.getenv("LOGIN_ATTEMPTS_PER_EMAIL", "10"))
+LOGIN_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "30"))
+SIGNUPS_PER_IP = int(os.getenv("SIGNUPS_PER_IP", "10"))
+THROTTLE_WINDOW_S = float(os.getenv("THROTTLE_WINDOW_S", "60"))
+
+
+class HashingOverloaded(Exception):
+    """Raised instead of queueing when the hashing pool is full, or a hash outlives HASH_TIMEOUT_S."""
+
+
+class HashingPool:
+    def __init__(self, workers=HASH_WORKERS, queue_depth=HASH_QUEUE_DEPTH, timeout_s=HASH_TIMEOUT_S):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.timeout_s = timeout_s
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingOverloaded()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        try:
+            return self.submit(fn, *args).result(timeout=self.timeout_s)
+        except FuturesTimeout:
+            # The hash keeps its slot until it finishes; the caller answers 503 now
+            raise HashingOverloaded() from None
+
+    def in_use(self):
+        # BoundedSemaphore keeps its counter in _value
+        return self.capacity - self._slots._value
+
+
+HASHING_POOL = HashingPool()
+
+metrics.REGISTRY.register_collector(
+    "password_hash_pool",
+    "Password hashing pool slots in use, capacity and rejected submissions.",
+    lambda: [
+        (("in_use",), HASHING_POOL.in_use()),
+        (("capacity",), HASHING_POOL.capacity),
+        (("rejected",), HASHING_POOL.rejected),
+    ],
+    labelnames=("state",),
+)
+
+
+def hash_password(password):
+    return HASHING_POOL.run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    return HASHING_POOL.run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return (password_hash or "").split("$", 1)[0] != PASSWORD_HASH_METHOD
+
+
+def upgrade_hash_later(password, on_hashed):
+    """
+    Re-hashes with the target parameters in the background and hands the result to on_hashed.
+    Skipped silently when the pool is busy; the next login tries again.
+    """
+    try:
+        future = HASHING_POOL.submit(generate_password_hash, password, PASSWORD_HASH_METHOD)
+    except HashingOverloaded:
+        return
+
+    def done(f):
+        if f.exception() is None:
+            try:
+                on_hashed(f.result())
+            except Exception as e:
+                print(f"❌ Password hash upgrade failed: {e}")
+
+    future.add_done_callback(done)
+
+
+class AttemptThrottle:
+    """
+    Fixed-window attempt counter per key. hit() returns 0 when allowed,
+    otherwise the seconds until the window resets.
+    """
+
+    def __init__(self, limit, window_s=THROTTLE_WINDOW_S):
+        self.limit = limit
+        self.window_s = window_s
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._windows) > 10000:
+                self._windows = {k: v for k, v in self._windows.items() if now - v[0] < self.window_s}
+            started, count = self._windows.get(key, (now, 0))
+            if now - started >= self.window_s:
+                started, count = now, 0
+            if count >= self.limit:
+                return max(1, math.ceil(self.window_s - (now - started)))
+            self._windows[key] = (started, count + 1)
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+LOGIN_EMAIL_THROTTLE = AttemptThrottle(LOGIN_ATTEMPTS_PER_EMAIL)
+LOGIN_IP_THROTTLE = AttemptThrottle(LOGIN_ATTEMPTS_PER_IP)
+SIGNUP_IP_THROTTLE = AttemptThrottle(SIGNUPS_PER_IP)
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""Memory-mapped roster snapshot shared by every worker process on a host.
+
+Publish:  python backend/roster_snapshot.py              # write one snapshot
+          python backend/roster_snapshot.py --watch 10   # republish whenever students/seniors change
+
+With --watch the writer checks for changes every interval. It also LISTENs for
+senior_needs_changed (sent by task edits and needs rebuilds), so a needs change is
+republished within a second rather than at the next check.
+
+The writer serializes the fields matching needs into one file with a fixed layout, and
+publishes it by atomic rename. Workers mmap it read-only and score straight from the
+mapped columns. Every process shares the same page-cache pages, so memory stays flat
+as workers are added, and a fresh worker can score as soon as it maps the file. A
+reader notices a new file (new inode) on its next check and swaps to it. Requests
+already scoring keep the old mapping until they finish.
+
+Layout (little-endian, every column 8-byte aligned):
+    header  "MMRS" | format u16 | reserved u16 | version u64 | built_at f64
+            students u32 | seniors u32 | tag words u32 | language words u32
+    vocab   length u32 | JSON {"tags": [...], "languages": [...]} | padding
+    section (students, then seniors), n rows:
+            lat_rad f64[n] | lng_rad f64[n] | cos_lat f64[n]
+            tag masks u64[tag words][n] | language masks u64[language words][n]
+            ids i32[n] | distinct tag count u32[n]
+            label offsets u32[n + 1] | label blob length u32 | labels utf-8 | padding
+
+Masks are stored word-major, so scoring only reads the words where the query has bits.
+The tag vocabulary holds every skill and need in the snapshot. A query term outside it
+therefore matches no row, and bitmask scores equal MatchingEngine.calculate_score
+exactly. Rows without coordinates can't be scored and are left out.
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import select
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+import metrics
+from matching import MatchingEngine
+
+ROSTER_SNAPSHOT_ENABLED = os.getenv("ROSTER_SNAPSHOT_ENABLED", "1") != "0"
+# How often a reader stats the file for a newer version
+ROSTER_SNAPSHOT_CHECK_S = float(os.getenv("ROSTER_SNAPSHOT_CHECK_S", "2"))
+# A snapshot the writer hasn't confirmed (rewritten or touched) for this long is ignored
+ROSTER_SNAPSHOT_MAX_AGE_S = float(os.getenv("ROSTER_SNAPSHOT_MAX_AGE_S", "120"))
+
+NEEDS_CHANGED_CHANNEL = "senior_needs_changed"
+# After a needs notification, wait this long so a burst of task edits becomes one republish
+NEEDS_CHANGE_SETTLE_S = 1.0
+
+MAGIC = b"MMRS"
+FORMAT = 1
+HEADER = struct.Struct("<4sHHQdIIII")
+EARTH_RADIUS_KM = 6371
+
+
+def snapshot_path():
+    """
+    One file per database target, so hosts running several environments don't mix rosters.
+    """
+    override = os.getenv("ROSTER_SNAPSHOT_PATH")
+    if override:
+        return override
+    target = f"{os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}"
+    digest = hashlib.sha1(target.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"marletmeets-roster-{digest}.snap")
+
+
+def _pad8(length):
+    return -length % 8
+
+
+def _column_bytes(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _mask_words(terms, vocab, words):
+    mask = 0
+    for term in terms:
+        bit = vocab.get(term)
+        if bit is not None:
+            mask |= 1 << bit
+    return [(mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(words)]
+
+
+def _encode_section(rows, id_column, tag_field, tag_vocab, tag_words, lang_vocab, lang_words):
+    rows = [r for r in rows if r.get("latitude") is not None and r.get("longitude") is not None]
+    rows.sort(key=lambda r: r[id_column])
+    lat_rad = [math.radians(float(r["latitude"])) for r in rows]
+    tag_masks = [_mask_words(r.get(tag_field) or [], tag_vocab, tag_words) for r in rows]
+    lang_masks = [_mask_words(r.get("languages") or [], lang_vocab, lang_words) for r in rows]
+
+    labels = [
+        json.dumps([r.get("first_name"), r.get("last_name"), list(r.get(tag_field) or [])],
+                   separators=(",", ":")).encode("utf-8")
+        for r in rows
+    ]
+    offsets = [0]
+    for label in labels:
+        offsets.append(offsets[-1] + len(label))
+    blob = b"".join(labels)
+
+    parts = [
+        _column_bytes("d", lat_rad),
+        _column_bytes("d", [math.radians(float(r["longitude"])) for r in rows]),
+        _column_bytes("d", [math.cos(lat) for lat in lat_rad]),
+    ]
+    parts += [_column_bytes("Q", [m[w] for m in tag_masks]) for w in range(tag_words)]
+    parts += [_column_bytes("Q", [m[w] for m in lang_masks]) for w in range(lang_words)]
+    parts += [
+        _column_bytes("i", [r[id_column] for r in rows]),
+        _column_bytes("I", [len(set(r.get(tag_field) or [])) for r in rows]),
+        _column_bytes("I", offsets),
+        struct.pack("<I", len(blob)),
+        blob,
+    ]
+    body = b"".join(parts)
+    return len(rows), body + b"\0" * _pad8(len(body))
+
+
+def encode_snapshot(students, seniors, version, built_at=None):
+    """
+    Builds the snapshot bytes from student and senior row dicts.
+    """
+    tags = sorted({t for r in students for t in r.get("skills") or []} | {t for r in seniors for t in r.get("needs") or []})
+    languages = sorted({t for r in students + seniors for t in r.get("languages") or []})
+    tag_vocab = {t: i for i, t in enumerate(tags)}
+    lang_vocab = {t: i for i, t in enumerate(languages)}
+    tag_words = max(1, math.ceil(len(tags) / 64))
+    lang_words = max(1, math.ceil(len(languages) / 64))
+
+    n_students, student_body = _encode_section(
+        students, "student_id", "skills", tag_vocab, tag_words, lang_vocab, lang_words)
+    n_seniors, senior_body = _encode_section(
+        seniors, "senior_id", "needs", tag_vocab, tag_words, lang_vocab, lang_words)
+
+    vocab = json.dumps({"tags": tags, "languages": languages}, separators=(",", ":")).encode("utf-8")
+    vocab_part = struct.pack("<I", len(vocab)) + vocab
+    header = HEADER.pack(MAGIC, FORMAT, 0, version, built_at or time.time(),
+                         n_students, n_seniors, tag_words, lang_words)
+    return b"".join([header, vocab_part, b"\0" * _pad8(len(header) + len(vocab_part)), student_body, senior_body])
+
+
+def publish(data, path=None):
+    """
+    Writes data next to path and renames it into place, so readers see either the old file or the new one.
+    """
+    path = path or snapshot_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+class RosterSection:
+    def __init__(self, view, offset, n, tag_words, lang_words):
+        self.n = n
+
+        def column(typecode, itemsize, count):
+            nonlocal offset
+            col = view[offset:offset + itemsize * count].cast(typecode)
+            offset += itemsize * count
+            return col
+
+        self.lat = column("d", 8, n)
+        self.lng = column("d", 8, n)
+        self.cos_lat = column("d", 8, n)
+        self.tag_words = [column("Q", 8, n) for _ in range(tag_words)]
+        self.lang_words = [column("Q", 8, n) for _ in range(lang_words)]
+        self.ids = column("i", 4, n)
+        self.tag_counts = column("I", 4, n)
+        self.label_offsets = column("I", 4, n + 1)
+        (blob_length,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        self.labels = view[offset:offset + blob_length]
+        offset += blob_length
+        self.end = offset + _pad8(offset)
+
+    def label(self, row):
+        """
+        Returns (first_name, last_name, tags in their original order) for a row.
+        """
+        start, end = self.label_offsets[row], self.label_offsets[row + 1]
+        return json.loads(bytes(self.labels[start:end]))
+
+
+class RosterSnapshot:
+    """
+    A mapped snapshot file. Sections are the students and seniors columns.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("mapped columns are little-endian")
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        (magic, fmt, _, self.version, self.built_at,
+         n_students, n_seniors, tag_words, lang_words) = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{path} is not a format {FORMAT} roster snapshot")
+        offset = HEADER.size
+        (vocab_length,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        vocab = json.loads(bytes(view[offset:offset + vocab_length]))
+        offset += vocab_length
+        offset += _pad8(offset)
+        self.tag_vocab = {t: i for i, t in enumerate(vocab["tags"])}
+        self.lang_vocab = {t: i for i, t in enumerate(vocab["languages"])}
+        self.tag_word_count = tag_words
+        self.lang_word_count = lang_words
+        self.students = RosterSection(view, offset, n_students, tag_words, lang_words)
+        self.seniors = RosterSection(view, self.students.end, n_seniors, tag_words, lang_words)
+
+    def _query_words(self, terms, vocab, words):
+        # Only the words where the query has bits are worth reading per row
+        return [(w, bits) for w, bits in enumerate(_mask_words(terms, vocab, words)) if bits]
+
+    def rank(self, section, query, query_tags_are_needs, limit=None, offset=0, min_score=None,
+             max_distance_km=None, engine=None):
+        """
+        Scores query (a student or senior row dict) against every row of section, with the
+        MatchingEngine formula. Returns ([(row, total_score, distance_km)], total_matching)
+        in select_top order.
+        """
+        engine = engine or MatchingEngine()
+        query_tags = set(query.get("needs" if query_tags_are_needs else "skills") or [])
+        tag_query = [(section.tag_words[w], bits) for w, bits in
+                     self._query_words(query_tags, self.tag_vocab, self.tag_word_count)]
+        lang_query = [(section.lang_words[w], bits) for w, bits in
+                      self._query_words(query.get("languages") or [], self.lang_vocab, self.lang_word_count)]
+        q_lat = math.radians(float(query["latitude"]))
+        q_lng = math.radians(float(query["longitude"]))
+        q_cos = math.cos(q_lat)
+        query_need_count = len(query_tags)
+        w_proximity, w_skills, w_language = engine.WEIGHT_PROXIMITY, engine.WEIGHT_SKILLS, engine.WEIGHT_LANGUAGE
+        lat, lng, cos_lat, tag_counts = section.lat, section.lng, section.cos_lat, section.tag_counts
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+
+        candidates = []
+        for row in range(section.n):
+            # Same operation order as MatchingEngine.harvesine_distance (senior first)
+            if query_tags_are_needs:
+                dlat, dlon = lat[row] - q_lat, lng[row] - q_lng
+                a = sin(dlat / 2) ** 2 + q_cos * cos_lat[row] * sin(dlon / 2) ** 2
+            else:
+                dlat, dlon = q_lat - lat[row], q_lng - lng[row]
+                a = sin(dlat / 2) ** 2 + cos_lat[row] * q_cos * sin(dlon / 2) ** 2
+            dist = 2 * asin(sqrt(a)) * EARTH_RADIUS_KM
+            proximity_score = max(0, 100 - (dist * 10))
+
+            shared = 0
+            for words, bits in tag_query:
+                common = words[row] & bits
+                if common:
+                    shared += bin(common).count("1")
+            need_count = query_need_count if query_tags_are_needs else tag_counts[row]
+            skills_score = 100 if not need_count else (shared / need_count) * 100
+
+            language_score = 0
+            for words, bits in lang_query:
+                if words[row] & bits:
+                    language_score = 100
+                    break
+
+            total = round(
+                (proximity_score * w_proximity) + (skills_score * w_skills) + (language_score * w_language), 1)
+            distance = round(dist, 2)
+            if min_score is not None and total < min_score:
+                continue
+            if max_distance_km is not None and distance > max_distance_km:
+                continue
+            candidates.append((row, total, distance))
+
+        total_matching = len(candidates)
+        if limit is None:
+            candidates.sort(key=lambda c: c[1], reverse=True)
+            return candidates[offset:], total_matching
+        top = heapq.nlargest(offset + limit, candidates, key=lambda c: c[1])
+        return top[offset:], total_matching
+
+    def student_matches_for_senior(self, senior, **page_args):
+        """
+        Same result shape as MatchingEngine.find_matches_page.
+        """
+        ranked, total = self.rank(self.students, senior, True, **page_args)
+        needs = set(senior.get("needs") or [])
+        matches = []
+        for row, score, distance in ranked:
+            first_name, last_name, skills = self.students.label(row)
+            matches.append({
+                "student_id": self.students.ids[row],
+                "name": f"{first_name} {last_name}",
+                "total_score": score,
+                "distance_km": distance,
+                "common_skills": list(needs.intersection(skills)),
+            })
+        return matches, total
+
+    def senior_matches_for_student(self, student, **page_args):
+        """
+        Same result shape as matching.score_seniors_for_student.
+        """
+        ranked, total = self.rank(self.seniors, student, False, **page_args)
+        skills = set(student.get("skills") or [])
+        matches = []
+        for row, score, distance in ranked:
+            first_name, last_name, needs = self.seniors.label(row)
+            matches.append({
+                "senior_id": self.seniors.ids[row],
+                "first_name": first_name,
+                "last_name": last_name,
+                "total_score": score,
+                "distance_km": distance,
+                "common_skills": list(set(needs).intersection(skills)),
+                "needs": needs,
+            })
+        return matches, total
+
+
+class SnapshotReader:
+    """
+    Hands out the current snapshot, remapping when the writer publishes a new file.
+    Returns None when there is no usable snapshot, so callers fall back to the database.
+    """
+
+    def __init__(self, path=None, check_s=ROSTER_SNAPSHOT_CHECK_S, max_age_s=ROSTER_SNAPSHOT_MAX_AGE_S):
+        self.path = path or snapshot_path()
+        self.check_s = check_s
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._mtime = 0.0
+        self.swaps = 0
+
+    def current(self):
+        now = time.time()
+        if now - self._checked_at >= self.check_s:
+            with self._lock:
+                if now - self._checked_at >= self.check_s:
+                    self._checked_at = now
+                    self._refresh()
+        if self._snapshot is None or now - self._mtime > self.max_age_s:
+            return None
+        return self._snapshot
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot = None
+            return
+        # The writer touches an unchanged file to vouch that it is still current
+        self._mtime = stat.st_mtime
+        loaded = self._snapshot
+        if loaded is not None and (loaded.stat.st_ino, loaded.stat.st_dev) == (stat.st_ino, stat.st_dev):
+            return
+        try:
+            # Swapping the reference is atomic; scorers holding the old one keep it mapped until done
+            self._snapshot = RosterSnapshot(self.path)
+            self.swaps += 1
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ Roster snapshot unusable, scoring from the database: {e}")
+            self._snapshot = None
+
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+
+ROSTER_SNAPSHOT = SnapshotReader()
+
+
+def current_snapshot():
+    return ROSTER_SNAPSHOT.current() if ROSTER_SNAPSHOT_ENABLED else None
+
+
+def _collect_snapshot():
+    snapshot = ROSTER_SNAPSHOT._snapshot
+    if snapshot is None:
+        return [(("loaded",), 0), (("swaps",), ROSTER_SNAPSHOT.swaps)]
+    return [
+        (("loaded",), 1),
+        (("version",), snapshot.version),
+        (("age_seconds",), round(time.time() - ROSTER_SNAPSHOT._mtime, 1)),
+        (("students",), snapshot.students.n),
+        (("seniors",), snapshot.seniors.n),
+        (("swaps",), ROSTER_SNAPSHOT.swaps),
+    ]
+
+
+metrics.REGISTRY.register_collector(
+    "roster_snapshot",
+    "Mapped roster snapshot state in this process.",
+    _collect_snapshot,
+    labelnames=("state",),
+)
+
+
+# Writer
+
+def build_snapshot():
+    """
+    Reads the roster and returns the snapshot bytes. The version is taken first, so any
+    change committed while reading shows up as newer than the snapshot and triggers a republish.
+    """
+    from db import execute_query
+
+    row = execute_query(
+        "SELECT txid_snapshot_xmin(txid_current_snapshot()) AS version;", fetch_one=True, use_primary=True
+    )
+    version = row["version"] if row else 0
+    students = execute_query(
+        "SELECT student_id, first_name, last_name, latitude, longitude, skills, languages FROM students;",
+        fetch_all=True,
+        use_primary=True,
+    )
+    seniors = execute_query(
+        "SELECT senior_id, first_name, last_name, latitude, longitude, needs, languages FROM seniors;",
+        fetch_all=True,
+        use_primary=True,
+    )
+    if students is None or seniors is None:
+        raise RuntimeError("could not read the roster")
+    return version, encode_snapshot(students, seniors, version)
+
+
+def roster_changed_since(version):
+    from sync import SyncExpired, changes_since
+
+    try:
+        _, changes = changes_since(version, ("students", "seniors"))
+    except SyncExpired:
+        return True
+    return bool(changes)
+
+
+def listen_for_needs_changes():
+    """
+    Returns a connection LISTENing on NEEDS_CHANGED_CHANNEL, or None when it can't connect.
+    """
+    import psycopg2
+    from db import connection_settings
+
+    try:
+        conn = psycopg2.connect(**connection_settings())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NEEDS_CHANGED_CHANNEL};")
+        return conn
+    except Exception as e:
+        print(f"⚠️ Not listening for {NEEDS_CHANGED_CHANNEL}, checking every interval only: {e}")
+        return None
+
+
+def wait_for_change(conn, timeout_s):
+    """
+    Waits up to timeout_s, returning early when a senior's needs change.
+    Returns conn, or None when the connection failed and should be reopened.
+    """
+    if conn is None:
+        time.sleep(timeout_s)
+        return None
+    try:
+        if select.select([conn], [], [], timeout_s) == ([], [], []):
+            return conn
+        time.sleep(NEEDS_CHANGE_SETTLE_S)
+        conn.poll()
+        conn.notifies.clear()
+        return conn
+    except Exception as e:
+        print(f"⚠️ Lost the {NEEDS_CHANGED_CHANNEL} listener: {e}")
+        conn.close()
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish the memory-mapped roster snapshot.")
+    parser.add_argument("--path", default=snapshot_path())
+    parser.add_argument("--watch", type=float, help="check for roster changes every this many seconds")
+    args = parser.parse_args(argv)
+
+    version = None
+    listener = None
+    while True:
+        try:
+            if version is None or not os.path.exists(args.path) or roster_changed_since(version):
+                started = time.perf_counter()
+                version, data = build_snapshot()
+                publish(data, args.path)
+                print(f"✅ Published roster snapshot v{version} ({len(data)} bytes, "
+                      f"{time.perf_counter() - started:.2f}s) to {args.path}")
+            else:
+                # Nothing changed: refresh the mtime so readers keep trusting the file
+                os.utime(args.path)
+        except Exception as e:
+            print(f"❌ Roster snapshot publish failed: {e}")
+            if not args.watch:
+                return 1
+        if not args.watch:
+            return 0
+        if listener is None:
+            listener = listen_for_needs_changes()
+        listener = wait_for_change(listener, args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+# Statements slower than this are logged; 0 turns the log off
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Share of slow read-only statements that also get an EXPLAIN (ANALYZE, BUFFERS)
+EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+# Minimum seconds between two plan captures for the same statement
+EXPLAIN_COOLDOWN_S = float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN_S", "300"))
+
+# EXPLAIN ANALYZE executes the statement, so only plain reads are ever explained
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|pg_notify|nextval|setval)\b", re.IGNORECASE)
+
+
+def _redact_value(value):
+    if isinstance(value, (list, tuple)):
+        return f"<list[{len(value)}]>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_params(params):
+    """
+    Keeps the shape of the parameters but never their values.
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: _redact_value(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_redact_value(v) for v in params]
+    return _redact_value(params)
+
+
+def is_read_only(query):
+    return bool(_READ_ONLY.match(query)) and not _WRITES.search(query)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, sample_rate=EXPLAIN_SAMPLE_RATE, cooldown_s=EXPLAIN_COOLDOWN_S):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.cooldown_s = cooldown_s
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._last_explain = {}
+
+    def is_slow(self, duration_s):
+        return self.threshold_ms > 0 and duration_s * 1000 >= self.threshold_ms
+
+    def should_explain(self, fingerprint, query):
+        if not is_read_only(query) or random.random() >= self.sample_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explain.get(fingerprint)
+            if last is not None and now - last < self.cooldown_s:
+                return False
+            self._last_explain[fingerprint] = now
+        return True
+
+    def record(self, fingerprint, query, params, duration_s, rows, plan=None):
+        duration_ms = duration_s * 1000
+        redacted = redact_params(params)
+        sql = " ".join(query.split())
+        print(f"🐢 Slow query {fingerprint} ({duration_ms:.1f} ms, {rows} rows): {sql[:200]} params={redacted}")
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                entry = self._entries[fingerprint] = {
+                    "statement": fingerprint,
+                    "sql": sql[:1000],
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "plan_captured_at": None,
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_ms"] = duration_ms
+            entry["last_rows"] = rows
+            entry["last_params"] = redacted
+            entry["last_seen"] = datetime.now(timezone.utc).isoformat()
+            if plan:
+                entry["plan"] = plan
+                entry["plan_captured_at"] = entry["last_seen"]
+
+    def top(self, limit=20, order_by="total_ms"):
+        with self._lock:
+            entries = [dict(e) for e in self._entries.values()]
+        entries.sort(key=lambda e: e.get(order_by, 0), reverse=True)
+        for e in entries:
+            e["total_ms"] = round(e["total_ms"], 2)
+            e["max_ms"] = round(e["max_ms"], 2)
+            e["avg_ms"] = round(e["total_ms"] / e["calls"], 2)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_explain.clear()
+
+
+SLOW_QUERIES = SlowQueryLog()
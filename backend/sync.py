@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Change log reads for delta sync, plus retention.
+
+Run: python backend/sync.py --prune-days 7
+
+Triggers (migration 4) append one change_log row per insert/update/delete on the
+synced tables. A sync cursor is the xmin of the reading statement's snapshot: every
+transaction below it has finished, so a later read with since=cursor cannot miss a
+change that committed late. Rows from transactions still in flight at read time may
+be sent twice, which clients absorb because upserts and tombstones are idempotent.
+"""
+
+import argparse
+import sys
+
+from db import execute_query
+
+# table -> primary key column, as passed to the change_log trigger
+SYNC_TABLES = {
+    "students": "student_id",
+    "seniors": "senior_id",
+    "senior_tasks": "task_id",
+    "sessions": "session_id",
+    "matches": "match_id",
+    "users": "user_id",
+}
+
+CHANGES_SQL = """
+WITH snap AS (
+    SELECT txid_snapshot_xmin(txid_current_snapshot()) AS version,
+           COALESCE((SELECT txid FROM change_log_horizon), 0) AS horizon
+)
+SELECT snap.version, snap.horizon, c.table_name, c.row_id, c.op
+FROM snap
+LEFT JOIN LATERAL (
+    SELECT DISTINCT ON (table_name, row_id) table_name, row_id, op
+    FROM change_log
+    WHERE txid >= %(since)s
+      AND (
+          (table_name = ANY(%(tables)s)
+           AND (%(student_id)s IS NULL OR student_id = %(student_id)s)
+           AND (%(senior_id)s IS NULL OR senior_id = %(senior_id)s))
+          OR (table_name = 'seniors' AND row_id IN (
+              SELECT senior_id FROM matches WHERE student_id = %(selected_by)s AND status = 'selected'
+          ))
+      )
+    ORDER BY table_name, row_id, change_id DESC
+) c ON TRUE;
+"""
+
+
+class SyncExpired(Exception):
+    """The cursor predates pruned change_log rows, so the client must reload in full."""
+
+
+def parse_cursor(value):
+    if value in (None, ""):
+        return None
+    cursor = int(value)
+    if cursor < 0:
+        raise ValueError("since must be a non-negative sync version")
+    return cursor
+
+
+def current_version():
+    row = execute_query("SELECT txid_snapshot_xmin(txid_current_snapshot()) AS version;", fetch_one=True)
+    return row["version"] if row else None
+
+
+def changes_since(since, tables, student_id=None, senior_id=None, selected_by=None):
+    """
+    Returns (version, {table: {"upserted": [ids], "deleted": [ids]}}) for rows of tables
+    changed at or after since, keeping only each row's latest operation. With student_id or
+    senior_id, only changes to rows carrying that id are returned. With selected_by (a
+    student_id), changes to the seniors that student has selected come back under "seniors".
+    Raises SyncExpired when since is older than the retained log.
+    """
+    rows = execute_query(
+        CHANGES_SQL,
+        {
+            "since": since,
+            "tables": list(tables),
+            "student_id": student_id,
+            "senior_id": senior_id,
+            "selected_by": selected_by,
+        },
+        fetch_all=True,
+        use_primary=True,
+    )
+    if not rows:
+        raise RuntimeError("Change log unavailable")
+    if since < rows[0]["horizon"]:
+        raise SyncExpired()
+
+    changes = {}
+    for row in rows:
+        if row["table_name"] is None:
+            continue
+        change = changes.setdefault(row["table_name"], {"upserted": [], "deleted": []})
+        change["deleted" if row["op"] == "DELETE" else "upserted"].append(row["row_id"])
+    return rows[0]["version"], changes
+
+
+def prune(days):
+    """
+    Deletes change_log rows older than days and moves the horizon past them.
+    Returns the number of rows removed.
+    """
+    row = execute_query(
+        """
+        WITH pruned AS (
+            DELETE FROM change_log
+            WHERE changed_at < NOW() - make_interval(days => %s)
+            RETURNING txid
+        ), horizon AS (
+            INSERT INTO change_log_horizon (id, txid)
+            SELECT TRUE, MAX(txid) + 1 FROM pruned HAVING COUNT(*) > 0
+            ON CONFLICT (id) DO UPDATE SET txid = GREATEST(change_log_horizon.txid, EXCLUDED.txid)
+        )
+        SELECT COUNT(*) AS removed FROM pruned;
+        """,
+        (days,),
+        commit=True,
+        fetch_one=True,
+    )
+    return row["removed"] if row else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune the delta sync change log.")
+    parser.add_argument("--prune-days", type=int, default=7, help="keep this many days of changes")
+    args = parser.parse_args(argv)
+
+    removed = prune(args.prune_days)
+    print(f"Removed {removed} change_log rows older than {args.prune_days} days.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,17 @@
 import { useEffect, useState } from "react";
-import { createSession, fetchAdminOverview, getMatchesForSenior, listSeniors } from "../services/api";
+import {
+  createSession,
+  fetchAdminOverview,
+  getMatchesForSenior,
+  getMatchesForSeniors,
+  listSeniors,
+} from "../services/api";
 
 function AdminPanel() {
   const [seniors, setSeniors] = useState([]);
   const [matchesBySenior, setMatchesBySenior] = useState({});
   const [loadingSeniorId, setLoadingSeniorId] = useState(null);
+  const [loadingAll, setLoadingAll] = useState(false);
   const [statusBySenior, setStatusBySenior] = useState({});
   const [error, setError] = useState("");
   const [overview, setOverview] = useState(null);
@@ -44,6 +51,24 @@ function AdminPanel() {
     }
   };
 
+  // One batch request scores every open senior against a single roster fetch
+  const handleFindAllMatches = async () => {
+    setLoadingAll(true);
+    setError("");
+    try {
+      const data = await getMatchesForSeniors("open");
+      const found = {};
+      (data.results || []).forEach((result) => {
+        found[result.senior.senior_id] = result.matches || [];
+      });
+      setMatchesBySenior((prev) => ({ ...prev, ...found }));
+    } catch (err) {
+      setError("Could not fetch matches.");
+    } finally {
+      setLoadingAll(false);
+    }
+  };
+
   const handleCreateSession = async (seniorId, studentId) => {
     setStatusBySenior((prev) => ({ ...prev, [seniorId]: "" }));
     try {
@@ -88,6 +113,10 @@ function AdminPanel() {
         </div>
       )}
 
+      <button className="btn-primary" onClick={handleFindAllMatches} disabled={loadingAll}>
+        {loadingAll ? "Loading..." : "Find Matches for Open Seniors"}
+      </button>
+
       <div className="admin-list">
         {seniors.map((senior) => (
           <div key={senior.senior_id} className="admin-card">
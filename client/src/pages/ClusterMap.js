@@ -0,0 +1,152 @@
+import React, { useCallback, useRef, useState } from "react";
+import { Circle, GoogleMap, InfoWindow, Marker } from "@react-google-maps/api";
+import { useGoogleMaps } from "../components/GoogleMapsProvider";
+import { fetchMapClusters } from "../services/api";
+
+const mapContainerStyle = {
+  width: "100%",
+  height: "520px",
+  borderRadius: "16px",
+};
+
+const center = {
+  lat: 45.5017, // Montreal
+  lng: -73.5673,
+};
+
+const options = {
+  disableDefaultUI: false,
+  zoomControl: true,
+  mapTypeControl: false,
+  streetViewControl: false,
+};
+
+const ICONS = {
+  student: "http://maps.google.com/mapfiles/ms/icons/blue-dot.png",
+  senior: "http://maps.google.com/mapfiles/ms/icons/red-dot.png",
+};
+
+const METERS_PER_DEGREE = 111320;
+
+// Server-side clustered map: the browser only ever draws the buckets for the visible area
+export default function ClusterMap() {
+  const { isLoaded, loadError } = useGoogleMaps();
+  const mapRef = useRef(null);
+  const requestRef = useRef(0);
+  const [data, setData] = useState({ clusters: [], heatmap: [], cell_degrees: 0 });
+  const [selected, setSelected] = useState(null);
+
+  const loadClusters = useCallback(async () => {
+    const map = mapRef.current;
+    const bounds = map?.getBounds();
+    if (!bounds) return;
+    const sw = bounds.getSouthWest();
+    const ne = bounds.getNorthEast();
+    const bbox = [sw.lng(), sw.lat(), ne.lng(), ne.lat()].map((v) => v.toFixed(5)).join(",");
+    const requestId = ++requestRef.current;
+    try {
+      const response = await fetchMapClusters({ bbox, zoom: map.getZoom() });
+      // Ignore answers for a viewport the user already panned away from
+      if (requestId === requestRef.current) setData(response);
+    } catch (err) {
+      // Keep the previous clusters on screen
+    }
+  }, []);
+
+  if (loadError) return <div className="status error">Error loading maps.</div>;
+  if (!isLoaded) return <div className="status">Loading map...</div>;
+
+  const maxWeight = Math.max(1, ...data.heatmap.map((cell) => cell.weight));
+
+  return (
+    <div style={{ position: "relative" }}>
+      <GoogleMap
+        mapContainerStyle={mapContainerStyle}
+        zoom={12}
+        center={center}
+        options={options}
+        onLoad={(map) => {
+          mapRef.current = map;
+        }}
+        onIdle={loadClusters}
+      >
+        {data.heatmap.map((cell) => (
+          <Circle
+            key={`heat-${cell.latitude}-${cell.longitude}`}
+            center={{ lat: cell.latitude, lng: cell.longitude }}
+            radius={(data.cell_degrees * METERS_PER_DEGREE) / 2}
+            options={{
+              strokeWeight: 0,
+              fillColor: "#2e7d32",
+              fillOpacity: 0.15 + 0.45 * (cell.weight / maxWeight),
+              clickable: false,
+            }}
+          />
+        ))}
+
+        {data.clusters.map((cluster) => (
+          <Marker
+            key={`${cluster.kind}-${cluster.latitude}-${cluster.longitude}`}
+            position={{ lat: cluster.latitude, lng: cluster.longitude }}
+            icon={ICONS[cluster.kind]}
+            label={cluster.count > 1 ? String(cluster.count) : undefined}
+            onClick={() => setSelected(cluster)}
+          />
+        ))}
+
+        {selected && (
+          <InfoWindow
+            position={{ lat: selected.latitude, lng: selected.longitude }}
+            onCloseClick={() => setSelected(null)}
+          >
+            <div style={{ padding: "5px" }}>
+              <h3 style={{ margin: 0, fontWeight: "bold" }}>
+                {selected.count > 1
+                  ? `${selected.count} ${selected.kind}s`
+                  : `${selected.kind === "student" ? "Student" : "Senior"} #${selected.id}`}
+              </h3>
+              {selected.count > 1 && (
+                <p style={{ margin: 0, color: "#666" }}>Zoom in to separate them.</p>
+              )}
+            </div>
+          </InfoWindow>
+        )}
+      </GoogleMap>
+
+      <div
+        style={{
+          position: "absolute",
+          bottom: "16px",
+          left: "16px",
+          background: "white",
+          padding: "10px 12px",
+          borderRadius: "10px",
+          boxShadow: "0 2px 4px rgba(0,0,0,0.2)",
+        }}
+      >
+        <div style={{ display: "flex", alignItems: "center", marginBottom: "5px" }}>
+          <img src={ICONS.senior} alt="Senior" style={{ width: "20px", marginRight: "5px" }} />
+          <span>Senior</span>
+        </div>
+        <div style={{ display: "flex", alignItems: "center", marginBottom: "5px" }}>
+          <img src={ICONS.student} alt="Student" style={{ width: "20px", marginRight: "5px" }} />
+          <span>Student</span>
+        </div>
+        <div style={{ display: "flex", alignItems: "center" }}>
+          <span
+            style={{
+              width: "14px",
+              height: "14px",
+              borderRadius: "50%",
+              background: "#2e7d32",
+              opacity: 0.5,
+              marginRight: "8px",
+              marginLeft: "3px",
+            }}
+          />
+          <span>Sessions</span>
+        </div>
+      </div>
+    </div>
+  );
+}
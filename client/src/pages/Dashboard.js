@@ -1,13 +1,11 @@
 import { useEffect, useMemo, useState } from "react";
-import DashboardMap from "./DashboardMap";
+import ClusterMap from "./ClusterMap";
 import { fetchDashboard } from "../services/api";
 
 function Dashboard() {
   const [data, setData] = useState({
     totals: null,
     recent_sessions: [],
-    students: [],
-    seniors: [],
   });
   const [status, setStatus] = useState({ type: "idle", message: "" });
 
@@ -16,13 +14,12 @@ function Dashboard() {
     const load = async () => {
       setStatus({ type: "loading", message: "Loading dashboard..." });
       try {
-        const response = await fetchDashboard();
+        // The map loads its own clusters for the visible area
+        const response = await fetchDashboard({ points: false });
         if (!active) return;
         setData({
           totals: response.totals,
           recent_sessions: response.recent_sessions || [],
-          students: response.students || [],
-          seniors: response.seniors || [],
         });
         setStatus({ type: "success", message: "" });
       } catch (error) {
@@ -80,7 +77,7 @@ function Dashboard() {
 
       <div className="dashboard__grid">
         <div className="dashboard__map">
-          <DashboardMap students={data.students} seniors={data.seniors} />
+          <ClusterMap />
         </div>
         <div className="dashboard__table">
           <h3>Recent Sessions</h3>
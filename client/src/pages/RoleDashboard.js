@@ -21,9 +21,11 @@ function RoleDashboard() {
 
   useEffect(() => {
     let active = true;
+    let syncVersion = null;
     const loadStudent = async () => {
       const data = await fetchStudentSelection();
       if (!active) return;
+      syncVersion = data.version ?? null;
       setSelections(data.selections || []);
       setStudentPhone(data.student_phone || "");
       if (!data.selections?.length) {
@@ -128,9 +130,28 @@ function RoleDashboard() {
     };
     window.addEventListener("selection-updated", handleSelectionUpdate);
 
+    // Polls only ask what changed since the last load; a full reload happens only when something did
+    const pollStudent = async () => {
+      if (syncVersion === null) {
+        await loadStudent();
+        return;
+      }
+      try {
+        const data = await fetchStudentSelection({ since: syncVersion });
+        if (!active) return;
+        if (data.changes && Object.keys(data.changes).length === 0 && !("student_phone" in data)) {
+          syncVersion = data.version;
+          return;
+        }
+      } catch (err) {
+        return;
+      }
+      await loadStudent();
+    };
+
     let intervalId = null;
     if (user?.role === "student") {
-      intervalId = setInterval(loadStudent, 5000);
+      intervalId = setInterval(pollStudent, 5000);
     }
     return () => {
       active = false;
@@ -6,6 +6,7 @@ import {
   fetchSeniorNotifications,
   fetchSeniorProfile,
   fetchSeniorTasks,
+  subscribeSeniorNotifications,
   updateSeniorProfile,
 } from "../services/api";
 import { formatPhone } from "../utils/formatPhone";
@@ -32,7 +33,7 @@ function SeniorHome() {
   const [languages, setLanguages] = useState([]);
   const [showPrefs, setShowPrefs] = useState(false);
   const [customTask, setCustomTask] = useState("");
-  const { user, loading } = useAuth();
+  const { user, token, loading } = useAuth();
 
   const formatLabel = (value) => {
     if (!value) return "";
@@ -56,6 +57,7 @@ function SeniorHome() {
 
   useEffect(() => {
     let active = true;
+    let unsubscribe = null;
     const load = async () => {
       if (loading || !user) return;
       try {
@@ -69,6 +71,11 @@ function SeniorHome() {
         if (!active) return;
         setNotifications(notifData.notifications || []);
         setSeniorPhone(notifData.senior_phone || "");
+        unsubscribe = subscribeSeniorNotifications(token, notifData.last_match_id, (note) => {
+          setNotifications((prev) =>
+            prev.some((n) => n.match_id === note.match_id) ? prev : [note, ...prev]
+          );
+        });
       } catch (err) {
         if (!active) return;
         setStatus({ type: "error", message: "Could not load tasks." });
@@ -77,8 +84,9 @@ function SeniorHome() {
     load();
     return () => {
       active = false;
+      if (unsubscribe) unsubscribe();
     };
-  }, [user, loading]);
+  }, [user, token, loading]);
 
   const removeTask = async (taskId) => {
     try {
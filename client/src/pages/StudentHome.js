@@ -19,9 +19,13 @@ const SKILLS = [
   { value: "translation", label: "translation" },
 ];
 const LANGUAGES = ["English", "French", "Mandarin", "Arabic", "Spanish"];
+const MATCH_PAGE_SIZE = 20;
 
 function StudentHome() {
   const [matches, setMatches] = useState([]);
+  const [matchTotal, setMatchTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [profile, setProfile] = useState({ skills: [], languages: [] });
   const [selectedSeniorIds, setSelectedSeniorIds] = useState([]);
   const [pendingSenior, setPendingSenior] = useState(null);
@@ -40,6 +44,28 @@ function StudentHome() {
       .map((word) => (word ? word[0].toUpperCase() + word.slice(1) : ""))
       .join(" ");
 
+  // The server returns one page at a time; next_cursor fetches the page after it
+  const showMatchPage = (matchData) => {
+    setMatches(matchData.matches || []);
+    setMatchTotal(matchData.total || 0);
+    setNextCursor(matchData.next_cursor || null);
+  };
+
+  const loadMoreMatches = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const matchData = await fetchStudentMatches({ limit: MATCH_PAGE_SIZE, cursor: nextCursor });
+      setMatches((prev) => [...prev, ...(matchData.matches || [])]);
+      setMatchTotal(matchData.total || 0);
+      setNextCursor(matchData.next_cursor || null);
+    } catch (err) {
+      setStatus({ type: "error", message: "Could not load more matches." });
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     let active = true;
     const load = async () => {
@@ -54,11 +80,14 @@ function StudentHome() {
           setSelectedSeniorIds(selectionData.selections.map((sel) => sel.senior_id));
         }
         if ((profileData.student?.skills || []).length > 0) {
-          const matchData = await fetchStudentMatches();
+          const matchData = await fetchStudentMatches({ limit: MATCH_PAGE_SIZE });
           if (!active) return;
           setMatches(matchData.matches || []);
+          setMatchTotal(matchData.total || 0);
+          setNextCursor(matchData.next_cursor || null);
         } else {
           setMatches([]);
+          setNextCursor(null);
         }
       } catch (err) {
         if (!active) return;
@@ -114,8 +143,8 @@ function StudentHome() {
       });
       setProfile(response.student);
       if ((response.student?.skills || []).length > 0) {
-        const matchData = await fetchStudentMatches();
-        setMatches(matchData.matches || []);
+        const matchData = await fetchStudentMatches({ limit: MATCH_PAGE_SIZE });
+        showMatchPage(matchData);
       }
       setStatus({ type: "success", message: "Preferences saved." });
       setShowPrefs(false);
@@ -248,6 +277,19 @@ function StudentHome() {
         </div>
       )}
 
+      {(profile.skills || []).length > 0 && matches.length > 0 && (
+        <div className="match-more">
+          <p className="match-meta">
+            Showing {matches.length} of {matchTotal} matches
+          </p>
+          {nextCursor && (
+            <button className="btn-secondary" type="button" onClick={loadMoreMatches} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load More"}
+            </button>
+          )}
+        </div>
+      )}
+
       {confirmOpen && pendingSenior &&
         createPortal(
           <div className="mm-modal-backdrop">
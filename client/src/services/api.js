@@ -1,4 +1,5 @@
 import axios from "axios";
+import { BINARY_POINTS, PACKED_JSON, decodeBinaryPoints, unpackPoints } from "../utils/packedPoints";
 
 const api = axios.create({
   baseURL: process.env.REACT_APP_API_URL || "http://localhost:5001/api",
@@ -33,8 +34,15 @@ export async function listSeniors() {
   return response.data;
 }
 
-export async function getMatchesForSenior(seniorId) {
-  const response = await api.get(`/matches/${seniorId}`);
+export async function getMatchesForSenior(seniorId, params = {}) {
+  const response = await api.get(`/matches/${seniorId}`, { params });
+  return response.data;
+}
+
+// seniors: an array of senior ids, or "open" for every senior nobody has selected yet
+export async function getMatchesForSeniors(seniors, params = {}) {
+  const body = seniors === "open" ? { seniors: "open" } : { senior_ids: seniors };
+  const response = await api.post("/matches/batch", { ...body, ...params });
   return response.data;
 }
 
@@ -43,8 +51,8 @@ export async function createSession(payload) {
   return response.data;
 }
 
-export async function fetchDashboard() {
-  const response = await api.get("/dashboard");
+export async function fetchDashboard(params = {}) {
+  const response = await api.get("/dashboard", { params });
   return response.data;
 }
 
@@ -78,21 +86,35 @@ export async function updateStudentProfile(payload) {
   return response.data;
 }
 
-export async function fetchStudentMatches() {
-  const response = await api.get("/student/matches");
+export async function fetchStudentMatches(params = {}) {
+  const response = await api.get("/student/matches", { params });
   return response.data;
 }
 
-export async function fetchStudentSelection() {
-  const response = await api.get("/student/selection");
+export async function fetchStudentSelection(params = {}) {
+  const response = await api.get("/student/selection", { params });
   return response.data;
 }
 
-export async function fetchStudentMapData() {
-  const response = await api.get("/student/map-data");
+export async function fetchMapClusters(params) {
+  const response = await api.get("/map/clusters", { params });
   return response.data;
 }
 
+export async function fetchStudentMapData() {
+  const response = await api.get("/student/map-data", { headers: { Accept: PACKED_JSON } });
+  return { ...response.data, seniors: unpackPoints(response.data.seniors) || [] };
+}
+
+// Coordinates only (no names) for every student and senior, as typed arrays
+export async function fetchDashboardPoints() {
+  const response = await api.get("/dashboard", {
+    headers: { Accept: BINARY_POINTS },
+    responseType: "arraybuffer",
+  });
+  return decodeBinaryPoints(response.data);
+}
+
 export async function selectSenior(payload) {
   const response = await api.post("/student/select", payload);
   return response.data;
@@ -103,8 +125,8 @@ export async function deselectSenior(seniorId) {
   return response.data;
 }
 
-export async function fetchSeniorTasks() {
-  const response = await api.get("/senior/tasks");
+export async function fetchSeniorTasks(params = {}) {
+  const response = await api.get("/senior/tasks", { params });
   return response.data;
 }
 
@@ -128,13 +150,60 @@ export async function deleteSeniorTask(taskId) {
   return response.data;
 }
 
-export async function fetchSeniorNotifications() {
-  const response = await api.get("/senior/notifications");
+export async function saveSeniorTasksBatch(operations) {
+  const response = await api.post("/senior/tasks/batch", { operations });
   return response.data;
 }
 
-export async function fetchAdminOverview() {
-  const response = await api.get("/admin/overview");
+export async function fetchSeniorNotifications(params = {}) {
+  const response = await api.get("/senior/notifications", { params });
+  return response.data;
+}
+
+// Live new-selection events. Falls back to polling with ?since when EventSource is unavailable
+// or the server refuses the stream. Returns a function that stops listening.
+export function subscribeSeniorNotifications(token, lastMatchId, onNotification) {
+  let since = lastMatchId || 0;
+  let timer = null;
+  let source = null;
+
+  const poll = async () => {
+    try {
+      const data = await fetchSeniorNotifications({ since });
+      (data.notifications || []).slice().reverse().forEach(onNotification);
+      since = data.last_match_id || since;
+    } catch (err) {
+      // Keep polling; the next tick retries
+    }
+    timer = setTimeout(poll, 30000);
+  };
+
+  if (typeof EventSource === "undefined") {
+    poll();
+  } else {
+    const url = `${api.defaults.baseURL}/senior/notifications/stream?token=${encodeURIComponent(token)}&since=${since}`;
+    source = new EventSource(url);
+    source.addEventListener("match_selected", (event) => {
+      since = Number(event.lastEventId) || since;
+      onNotification(JSON.parse(event.data));
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own unless the server rejected the stream outright
+      if (source.readyState === EventSource.CLOSED) {
+        source = null;
+        poll();
+      }
+    };
+  }
+
+  return () => {
+    if (source) source.close();
+    if (timer) clearTimeout(timer);
+  };
+}
+
+export async function fetchAdminOverview(params = {}) {
+  const response = await api.get("/admin/overview", { params });
   return response.data;
 }
 
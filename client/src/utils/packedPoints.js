@@ -0,0 +1,63 @@
+// Decoders for the compact map point formats served by backend/packed_points.py
+
+export const PACKED_JSON = "application/vnd.marletmeets.packed+json";
+export const BINARY_POINTS = "application/vnd.marletmeets.points";
+
+const undelta = (deltas) => {
+  let total = 0;
+  return deltas.map((delta) => {
+    total += delta;
+    return total;
+  });
+};
+
+// Columnar delta-encoded JSON -> array of point objects (placed points first, in id order)
+export function unpackPoints(packed) {
+  if (!packed || packed.encoding !== "delta-v1") return packed;
+  const { id_column: idColumn, scale } = packed;
+  const reserved = new Set(["encoding", "scale", "id_column", "count", "ids", "lat", "lng", "unplaced"]);
+  const fields = Object.keys(packed).filter((key) => !reserved.has(key));
+  const ids = undelta(packed.ids);
+  const lats = undelta(packed.lat);
+  const lngs = undelta(packed.lng);
+  const rows = ids.map((id, i) => {
+    const row = { [idColumn]: id, latitude: lats[i] / scale, longitude: lngs[i] / scale };
+    fields.forEach((field) => {
+      row[field] = packed[field][i];
+    });
+    return row;
+  });
+  return rows.concat(packed.unplaced || []);
+}
+
+// Binary typed-array payload -> { sectionName: { ids: Int32Array, latitude: Float64Array, longitude: Float64Array } }
+export function decodeBinaryPoints(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== "MMPK" || view.getUint16(4, true) !== 1) {
+    throw new Error("Not a packed points payload");
+  }
+  const sectionCount = view.getUint16(6, true);
+  let offset = 8;
+  const sections = {};
+  for (let s = 0; s < sectionCount; s += 1) {
+    const nameLength = view.getUint16(offset, true);
+    const name = new TextDecoder().decode(new Uint8Array(buffer, offset + 2, nameLength));
+    offset += 2 + nameLength;
+    offset += (4 - (offset % 4)) % 4;
+    const count = view.getUint32(offset, true);
+    const scale = view.getUint32(offset + 4, true);
+    offset += 8;
+    // Int32Array views assume a little-endian host, which covers every browser in practice
+    const ids = new Int32Array(buffer, offset, count);
+    const lat = new Int32Array(buffer, offset + 4 * count, count);
+    const lng = new Int32Array(buffer, offset + 8 * count, count);
+    offset += 12 * count;
+    sections[name] = {
+      ids,
+      latitude: Float64Array.from(lat, (v) => v / scale),
+      longitude: Float64Array.from(lng, (v) => v / scale),
+    };
+  }
+  return sections;
+}
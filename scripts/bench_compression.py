@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Bytes on the wire and server CPU for compressed API responses (backend/compression.py).
+
+Builds payloads shaped like the three large responses from a synthetic roster:
+/api/admin/overview, /api/student/matches with every senior, and the /api/dashboard
+map lists. For each one it reports:
+- raw size
+- compressed size and thread CPU per response for each gzip level and brotli quality
+- peak memory for building the body buffered versus streamed with iter_json
+Brotli rows appear only when the `brotli` package is installed.
+
+Run:
+    python scripts/bench_compression.py                          # 5000 students, 1000 seniors
+    python scripts/bench_compression.py --students 20000 --seniors 4000 --output bench_results/compression.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from compression import (  # noqa: E402
+    BROTLI_QUALITY,
+    GZIP_LEVEL,
+    _compress_stream,
+    brotli,
+    compress_bytes,
+    iter_json,
+)
+from matching import score_seniors_for_student  # noqa: E402
+from synthetic import PopulationGenerator  # noqa: E402
+
+GZIP_LEVELS = (1, 5, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 11)
+POINT_FIELDS = ("first_name", "last_name", "latitude", "longitude")
+
+
+def dumps(obj):
+    # Same output as the app's jsonify: sorted keys, compact, dates as ISO strings
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=lambda o: o.isoformat())
+
+
+def build_payloads(n_students, n_seniors, seed):
+    generator = PopulationGenerator(seed=seed)
+    students = list(generator.students(n_students))
+    seniors = list(generator.seniors(n_seniors))
+
+    by_neighbourhood = {}
+    for senior in seniors:
+        by_neighbourhood.setdefault(senior["neighbourhood"], []).append(senior["senior_id"])
+    matches = list(generator.matches(students, by_neighbourhood))
+    locations = {s["senior_id"]: (s["latitude"], s["longitude"]) for s in seniors}
+    sessions = [dict(session, session_id=i) for i, session in enumerate(generator.sessions(matches, locations), 1)]
+    tasks = [
+        dict(task, task_id=i, senior_id=senior["senior_id"])
+        for i, (senior, task) in enumerate(((s, t) for s in seniors for t in s["tasks"]), 1)
+    ]
+
+    student_rows = [{k: v for k, v in s.items() if k != "neighbourhood"} for s in students]
+    senior_rows = [{k: v for k, v in s.items() if k not in ("neighbourhood", "tasks")} for s in seniors]
+    all_matches, total = score_seniors_for_student(students[0], senior_rows)
+
+    return {
+        "admin_overview": {
+            "students": student_rows,
+            "seniors": senior_rows,
+            "tasks": tasks,
+            "sessions": sessions,
+            "matches": [dict(m, match_id=i) for i, m in enumerate(matches, 1)],
+            "version": 123456,
+        },
+        "student_matches": {"matches": all_matches, "total": total, "limit": None, "offset": 0, "next_cursor": None},
+        "dashboard_points": {
+            "students": [{"student_id": s["student_id"], **{f: s[f] for f in POINT_FIELDS}} for s in students],
+            "seniors": [{"senior_id": s["senior_id"], **{f: s[f] for f in POINT_FIELDS}} for s in seniors],
+            "version": 123456,
+        },
+    }
+
+
+def cpu_per_call(fn, repeats):
+    fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.thread_time()
+        fn()
+        samples.append(time.thread_time() - started)
+    return statistics.median(samples)
+
+
+def peak_bytes(fn):
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(payload, repeats):
+    body = dumps(payload).encode("utf-8")
+    result = {
+        "raw_bytes": len(body),
+        "serialize_ms": round(cpu_per_call(lambda: dumps(payload).encode("utf-8"), repeats) * 1000, 2),
+        "encodings": {},
+    }
+
+    settings = [("gzip", level, lambda level=level: _gzip(body, level)) for level in GZIP_LEVELS]
+    if brotli:
+        settings += [("br", quality, lambda quality=quality: brotli.compress(body, quality=quality))
+                     for quality in BROTLI_QUALITIES]
+    for encoding, level, fn in settings:
+        size = len(fn())
+        result["encodings"][f"{encoding}-{level}"] = {
+            "bytes": size,
+            "ratio": round(size / len(body), 3),
+            "cpu_ms": round(cpu_per_call(fn, repeats) * 1000, 2),
+        }
+
+    # What the app does by default: one buffered body versus the chunked stream
+    result["peak_memory"] = {
+        "buffered": peak_bytes(lambda: compress_bytes(dumps(payload).encode("utf-8"), "gzip")),
+        "streamed": peak_bytes(lambda: sum(len(chunk) for chunk in _compress_stream(
+            (text.encode("utf-8") for text in iter_json(payload, dumps)), "gzip"))),
+    }
+    return result
+
+
+def _gzip(body, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare response compression settings.")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--seniors", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    payloads = build_payloads(args.students, args.seniors, args.seed)
+    results = {
+        "benchmark": "compression",
+        "students": args.students,
+        "seniors": args.seniors,
+        "defaults": {"gzip": GZIP_LEVEL, "br": BROTLI_QUALITY if brotli else None},
+        "responses": {},
+    }
+    if not brotli:
+        print("brotli not installed: gzip only")
+    for name, payload in payloads.items():
+        row = results["responses"][name] = measure(payload, args.repeats)
+        print(f"{name}: {row['raw_bytes']} bytes raw, serialize {row['serialize_ms']} ms")
+        print(f"  {'setting':<10} {'bytes':>10} {'ratio':>7} {'cpu ms':>8}")
+        for setting, stats in row["encodings"].items():
+            print(f"  {setting:<10} {stats['bytes']:>10} {stats['ratio']:>7} {stats['cpu_ms']:>8}")
+        memory = row["peak_memory"]
+        print(f"  peak memory buffered {memory['buffered']} / streamed {memory['streamed']} bytes")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Size and round-trip check for the map point encodings (backend/packed_points.py).
+
+Builds a synthetic roster shaped like the /api/dashboard point lists, encodes it as
+plain JSON, packed columnar JSON and the binary typed-array format, verifies that
+both compact forms decode back to the same points (within the 1e-5 degree
+quantization), and reports bytes raw and gzipped plus encode/decode time.
+
+Run:
+    python scripts/bench_encoding.py                 # 100k points
+    python scripts/bench_encoding.py --points 20000 --output bench_results/encoding.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from packed_points import SCALE, decode_binary, encode_binary, pack_points, unpack_points  # noqa: E402
+from synthetic import PopulationGenerator  # noqa: E402
+
+POINT_FIELDS = ("first_name", "last_name")
+
+
+def point_rows(generator, n, id_column):
+    people = generator.students(n) if id_column == "student_id" else generator.seniors(n)
+    return [
+        {
+            id_column: person[id_column],
+            "first_name": person["first_name"],
+            "last_name": person["last_name"],
+            "latitude": person["latitude"],
+            "longitude": person["longitude"],
+        }
+        for person in people
+    ]
+
+
+def compact_json(payload):
+    # Matches Flask's jsonify output outside debug mode
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def check_round_trip(original, decoded, id_column):
+    tolerance = 0.5 / SCALE + 1e-12
+    by_id = {row[id_column]: row for row in decoded}
+    if len(by_id) != len(original):
+        return f"expected {len(original)} points, decoded {len(by_id)}"
+    for row in original:
+        other = by_id.get(row[id_column])
+        if other is None:
+            return f"{id_column} {row[id_column]} missing after decode"
+        if abs(other["latitude"] - row["latitude"]) > tolerance or abs(other["longitude"] - row["longitude"]) > tolerance:
+            return f"{id_column} {row[id_column]} moved beyond quantization"
+        for field in POINT_FIELDS:
+            if field in other and other[field] != row[field]:
+                return f"{id_column} {row[id_column]} field {field} changed"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare map point payload encodings.")
+    parser.add_argument("--points", type=int, default=100000, help="total points, split between students and seniors")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    generator = PopulationGenerator(seed=args.seed)
+    lists = {
+        "students": (point_rows(generator, args.points // 2, "student_id"), "student_id"),
+        "seniors": (point_rows(generator, args.points - args.points // 2, "senior_id"), "senior_id"),
+    }
+
+    plain, plain_s = timed(lambda: compact_json({name: rows for name, (rows, _) in lists.items()}))
+    packed, packed_s = timed(lambda: compact_json({
+        name: pack_points(rows, id_column, POINT_FIELDS) for name, (rows, id_column) in lists.items()
+    }))
+    binary, binary_s = timed(lambda: encode_binary([(name, rows, id_column) for name, (rows, id_column) in lists.items()]))
+
+    failures = []
+    decoded_packed, unpack_s = timed(lambda: {name: unpack_points(value) for name, value in json.loads(packed).items()})
+    decoded_binary, decode_s = timed(lambda: decode_binary(binary))
+    for name, (rows, id_column) in lists.items():
+        error = check_round_trip(rows, decoded_packed[name], id_column)
+        if error:
+            failures.append(f"packed json {name}: {error}")
+        as_rows = [{id_column: i, "latitude": lat, "longitude": lng} for i, lat, lng in decoded_binary[name]]
+        error = check_round_trip(rows, as_rows, id_column)
+        if error:
+            failures.append(f"binary {name}: {error}")
+
+    formats = {
+        "json": (plain, plain_s, None),
+        "packed_json": (packed, packed_s, unpack_s),
+        "binary": (binary, binary_s, decode_s),
+    }
+    result = {"benchmark": "encoding", "points": args.points, "formats": {}, "round_trip_failures": failures}
+    print(f"{args.points} points")
+    print(f"  {'format':<12} {'bytes':>12} {'gzip bytes':>12} {'vs json':>8} {'encode ms':>10} {'decode ms':>10}")
+    for name, (body, encode_s, decode_s) in formats.items():
+        gzipped = len(gzip.compress(body, compresslevel=6))
+        row = {
+            "bytes": len(body),
+            "gzip_bytes": gzipped,
+            "ratio_vs_json": round(len(body) / len(plain), 3),
+            "encode_ms": round(encode_s * 1000, 1),
+            "decode_ms": round(decode_s * 1000, 1) if decode_s is not None else None,
+        }
+        result["formats"][name] = row
+        decode_text = f"{row['decode_ms']:>10}" if decode_s is not None else f"{'-':>10}"
+        print(f"  {name:<12} {row['bytes']:>12} {row['gzip_bytes']:>12} {row['ratio_vs_json']:>8} "
+              f"{row['encode_ms']:>10} {decode_text}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ Round trip failed: {failure}")
+        return 1
+    print("✅ Packed JSON and binary round-trip match the source points")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
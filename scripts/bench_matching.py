@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Offline benchmark for the matching engine.
+
+Scores generated rosters (no database) at increasing sizes and reports:
+- per-pair cost of MatchingEngine.calculate_score (ns)
+- end-to-end top-K latency of find_matches (senior side) and
+  score_seniors_for_student (student side)
+- peak traced memory and retained allocations for one top-K run
+
+Run:
+    python scripts/bench_matching.py                       # 1k, 10k, 100k, 1M
+    python scripts/bench_matching.py --sizes 1000,10000 --output bench_results/matching.json
+    python scripts/bench_matching.py --compare bench_results/old.json bench_results/new.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from matching import MatchingEngine, score_seniors_for_student  # noqa: E402
+from synthetic import PopulationGenerator  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+PAIR_SAMPLE = 200000
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def timed_runs(fn, repeats):
+    """Wall-clock seconds for each of `repeats` calls (after one warm-up call)."""
+    fn()
+    samples = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def memory_profile(fn):
+    """Peak traced bytes while fn runs, and blocks still allocated while its result is held."""
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    del result
+    return peak, retained_blocks
+
+
+def latency_summary(samples):
+    ordered = sorted(samples)
+    return {
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "runs": len(ordered),
+    }
+
+
+def bench_size(n, top_k, repeats, seed):
+    gen = PopulationGenerator(seed=seed)
+    students = list(gen.students(n))
+    seniors = list(gen.seniors(n))
+    senior = seniors[0]
+    student = students[0]
+    engine = MatchingEngine()
+
+    # Per-pair cost on a fixed-size sample so large rosters don't dominate the runtime
+    sample = students[:min(n, PAIR_SAMPLE)]
+
+    def score_pairs():
+        for s in sample:
+            engine.calculate_score(senior, s)
+
+    pair_seconds = min(timed_runs(score_pairs, repeats))
+
+    find_matches = lambda: engine.find_matches(senior, students, limit=top_k)  # noqa: E731
+    student_side = lambda: score_seniors_for_student(student, seniors, limit=top_k)  # noqa: E731
+
+    find_samples = timed_runs(find_matches, repeats)
+    student_samples = timed_runs(student_side, repeats)
+    find_peak, find_blocks = memory_profile(find_matches)
+    student_peak, student_blocks = memory_profile(student_side)
+
+    return {
+        "candidates": n,
+        "top_k": top_k,
+        "calculate_score_ns_per_pair": round(pair_seconds / len(sample) * 1e9, 1),
+        "find_matches": {
+            **latency_summary(find_samples),
+            "peak_bytes": find_peak,
+            "retained_blocks": find_blocks,
+        },
+        "score_seniors_for_student": {
+            **latency_summary(student_samples),
+            "peak_bytes": student_peak,
+            "retained_blocks": student_blocks,
+        },
+    }
+
+
+def print_row(result):
+    fm = result["find_matches"]
+    ss = result["score_seniors_for_student"]
+    print(
+        f"{result['candidates']:>9} | {result['calculate_score_ns_per_pair']:>9.1f} ns/pair"
+        f" | find_matches {fm['median_ms']:>10.2f} ms, peak {fm['peak_bytes'] / 1e6:>8.2f} MB"
+        f" | student top-K {ss['median_ms']:>10.2f} ms, peak {ss['peak_bytes'] / 1e6:>8.2f} MB"
+    )
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {r["candidates"]: r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new_doc = json.load(f)
+    new = {r["candidates"]: r for r in new_doc["results"]}
+
+    def delta(a, b):
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    print(f"{'size':>9} | {'ns/pair':>16} | {'find_matches':>16} | {'student top-K':>16}")
+    for n in sorted(set(old) & set(new)):
+        o, c = old[n], new[n]
+        print(
+            f"{n:>9} | {delta(o['calculate_score_ns_per_pair'], c['calculate_score_ns_per_pair']):>16}"
+            f" | {delta(o['find_matches']['median_ms'], c['find_matches']['median_ms']):>16}"
+            f" | {delta(o['score_seniors_for_student']['median_ms'], c['score_seniors_for_student']['median_ms']):>16}"
+        )
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the matching engine on generated rosters.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated roster sizes")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results here (default: bench_results/matching_<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        return compare(*args.compare)
+
+    commit = git_commit()
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    results = []
+    print(f"Matching benchmark @ {commit} (top_k={args.top_k}, repeats={args.repeats})")
+    for n in sizes:
+        result = bench_size(n, args.top_k, args.repeats, args.seed)
+        print_row(result)
+        results.append(result)
+
+    output = args.output or os.path.join(ROOT, "bench_results", f"matching_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "benchmark": "matching",
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark: how long does `import app` take in a fresh interpreter?
+
+Each run starts a new Python process in backend/ and times the import. The
+database points at a closed local port, so any import-time network work shows
+up as a failure or a stall instead of hiding behind a fast local Postgres.
+
+Run:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 20 --output bench_results/startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, "backend")
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app; "
+    "print('IMPORT_SECONDS', time.perf_counter() - started)"
+)
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\s*)(\S+)")
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_once(env, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", IMPORT_SNIPPET]
+    proc = subprocess.run(cmd, cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{proc.stderr[-2000:]}")
+    seconds = float(next(line.split()[1] for line in proc.stdout.splitlines() if line.startswith("IMPORT_SECONDS")))
+    return seconds, proc.stderr
+
+
+def slowest_imports(importtime_output, top):
+    """Top-level-ish modules by cumulative import time (microseconds)."""
+    rows = []
+    for line in importtime_output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, module = match.groups()
+            rows.append((int(cumulative), len(indent) // 2, module))
+    rows.sort(reverse=True)
+    return [{"module": m, "cumulative_ms": round(c / 1000, 2), "depth": d} for c, d, m in rows[:top]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure backend import (cold start) time.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    env = {
+        **os.environ,
+        "PG_HOST": "127.0.0.1",
+        "PG_PORT": str(closed_port()),
+        "PG_DB": "unreachable",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    run_once(env)  # warm the OS page cache / bytecode
+    samples = [run_once(env)[0] for _ in range(args.runs)]
+    _, importtime_output = run_once(env, importtime=True)
+    slowest = slowest_imports(importtime_output, args.top)
+
+    result = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+        "slowest_imports": slowest,
+    }
+    print(f"import app: median {result['median_ms']} ms (min {result['min_ms']}, max {result['max_ms']}) "
+          f"over {args.runs} runs")
+    for row in slowest:
+        print(f"  {row['cumulative_ms']:>9.2f} ms  {'  ' * row['depth']}{row['module']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
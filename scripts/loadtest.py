@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""HTTP load test for the Flask API.
+
+Replays a mixed workload (logins, student matches, dashboard polling, task
+edits, selections, notifications) at increasing concurrency and reports
+throughput, p50/p95/p99 per route and error rates for each stage.
+
+By default it starts everything it needs locally:
+- a throwaway Postgres cluster (initdb/pg_ctl must be on PATH)
+- the app with GEOCODER_BACKEND=fake so no request leaves the machine
+
+Run:
+    python scripts/loadtest.py --local-postgres --students 20000 --seniors 4000
+    python scripts/loadtest.py --local-postgres --server-cmd "gunicorn -w 4 -b 127.0.0.1:{port} app:app"
+    python scripts/loadtest.py --url http://localhost:5001   # existing app + database, no seeding
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, "backend")
+
+PASSWORD = "loadtest-pass"
+
+# (action, weight)
+TRAFFIC_MIX = [
+    ("student_matches", 25),
+    ("dashboard", 20),
+    ("student_selection", 10),
+    ("senior_notifications", 10),
+    ("senior_tasks", 8),
+    ("task_edit", 12),
+    ("student_select", 5),
+    ("login", 10),
+]
+
+# Columns the app writes/reads that scripts/schema_and_seed.py does not create yet
+SCHEMA_FIXUPS = [
+    "ALTER TABLE sessions ADD COLUMN IF NOT EXISTS notes TEXT;",
+    "ALTER TABLE sessions ALTER COLUMN task_type DROP NOT NULL;",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(check, timeout, what):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {what}")
+
+
+class LocalPostgres:
+    """Throwaway cluster in a temp dir, trust auth, removed on exit."""
+
+    def __init__(self, user="marlet", dbname="marlet_load"):
+        self.user = user
+        self.dbname = dbname
+        self.port = free_port()
+        self.dir = None
+
+    def __enter__(self):
+        for tool in ("initdb", "pg_ctl", "createdb"):
+            if not shutil.which(tool):
+                raise RuntimeError(f"{tool} not found on PATH; install Postgres or pass --url with PG_* set")
+        self.dir = tempfile.mkdtemp(prefix="marlet-pg-")
+        data = os.path.join(self.dir, "data")
+        subprocess.run(["initdb", "-D", data, "-U", self.user, "--auth=trust"], check=True, capture_output=True)
+        subprocess.run(
+            ["pg_ctl", "-D", data, "-l", os.path.join(self.dir, "postgres.log"), "-w",
+             "-o", f"-p {self.port} -k {self.dir} -c max_connections=200", "start"],
+            check=True, capture_output=True,
+        )
+        subprocess.run(
+            ["createdb", "-h", "localhost", "-p", str(self.port), "-U", self.user, self.dbname],
+            check=True, capture_output=True,
+        )
+        return self
+
+    def env(self):
+        return {
+            "PG_HOST": "localhost",
+            "PG_PORT": str(self.port),
+            "PG_DB": self.dbname,
+            "PG_USER": self.user,
+            "PG_PASSWORD": "",
+        }
+
+    def __exit__(self, *exc):
+        subprocess.run(["pg_ctl", "-D", os.path.join(self.dir, "data"), "-m", "fast", "stop"], capture_output=True)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prepare_schema(env):
+    import psycopg2
+    from schema_and_seed import SCHEMA_SQL
+
+    conn = psycopg2.connect(host=env["PG_HOST"], port=env["PG_PORT"], dbname=env["PG_DB"], user=env["PG_USER"])
+    conn.autocommit = True
+    cur = conn.cursor()
+    for stmt in SCHEMA_SQL + SCHEMA_FIXUPS:
+        cur.execute(stmt)
+    cur.close()
+    conn.close()
+
+
+def seed_population(env, students, seniors, seed):
+    import psycopg2
+    from seed import seed_synthetic
+    from synthetic import DEFAULT_CENTER
+
+    conn = psycopg2.connect(host=env["PG_HOST"], port=env["PG_PORT"], dbname=env["PG_DB"], user=env["PG_USER"])
+    seed_synthetic(conn, students, seniors, seed, DEFAULT_CENTER, 50000)
+    conn.close()
+
+
+def start_app(server_cmd, port, env):
+    cmd = server_cmd.format(port=port)
+    proc = subprocess.Popen(
+        shlex.split(cmd),
+        cwd=BACKEND,
+        env={
+            **os.environ,
+            **env,
+            "GEOCODER_BACKEND": "fake",
+            "AUTO_MIGRATE": "1",
+            "PORT": str(port),
+            # Every virtual user shares 127.0.0.1, so per-IP auth throttles would cap the run
+            "SIGNUPS_PER_IP": "1000000",
+            "LOGIN_ATTEMPTS_PER_IP": "1000000",
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return proc
+
+
+class Client:
+    """One keep-alive connection per virtual user."""
+
+    def __init__(self, base_url, timeout=30):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body) if body is not None else None
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+                return resp.status, data
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        return None, None
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, ok):
+        with self.lock:
+            self.latencies[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def create_accounts(base_url, run_id, n_students, n_seniors):
+    client = Client(base_url)
+    students, seniors = [], []
+    for role, count, bucket in (("student", n_students, students), ("senior", n_seniors, seniors)):
+        for i in range(count):
+            email = f"load.{run_id}.{role}{i}@mail.mcgill.ca"
+            status, data = client.request("POST", f"/api/auth/signup/{role}", {
+                "email": email,
+                "password": PASSWORD,
+                "first_name": "Load",
+                "last_name": f"{role.title()}{i}",
+                "phone": "555-0000",
+                "address": f"{100 + i} Rue Milton",
+            })
+            if status != 201:
+                raise RuntimeError(f"Signup failed for {email}: {status} {data[:200]!r}")
+            bucket.append({"email": email, "token": json.loads(data)["token"], "task_ids": []})
+
+    for senior in seniors:
+        for text in ("companionship", "grocery"):
+            status, data = client.request("POST", "/api/senior/tasks", {"task_text": text}, senior["token"])
+            if status == 201:
+                senior["task_ids"].append(json.loads(data)["task"]["task_id"])
+        client.request("POST", "/api/senior/profile", {"languages": ["english", "french"]}, senior["token"])
+    for student in students:
+        client.request(
+            "POST", "/api/student/profile",
+            {"skills": ["companionship", "tech_help"], "languages": ["english"]},
+            student["token"],
+        )
+
+    status, data = client.request("GET", "/api/seniors")
+    senior_ids = [s["senior_id"] for s in json.loads(data)["seniors"]] if status == 200 else []
+    return students, seniors, senior_ids
+
+
+def run_action(client, rng, action, accounts):
+    """Returns (route label, http status)."""
+    students, seniors, senior_ids = accounts
+    if action == "login":
+        account = rng.choice(students + seniors)
+        status, _ = client.request("POST", "/api/auth/login", {"email": account["email"], "password": PASSWORD})
+        return "POST /api/auth/login", status
+    if action == "dashboard":
+        return "GET /api/dashboard", client.request("GET", "/api/dashboard")[0]
+    if action == "student_matches":
+        token = rng.choice(students)["token"]
+        return "GET /api/student/matches", client.request("GET", "/api/student/matches", token=token)[0]
+    if action == "student_selection":
+        token = rng.choice(students)["token"]
+        return "GET /api/student/selection", client.request("GET", "/api/student/selection", token=token)[0]
+    if action == "student_select":
+        token = rng.choice(students)["token"]
+        senior_id = rng.choice(senior_ids)
+        if rng.random() < 0.3:
+            status, _ = client.request("DELETE", f"/api/student/select/{senior_id}", token=token)
+            return "DELETE /api/student/select/<id>", status
+        status, _ = client.request("POST", "/api/student/select", {"senior_id": senior_id}, token=token)
+        return "POST /api/student/select", status
+    if action == "senior_notifications":
+        token = rng.choice(seniors)["token"]
+        return "GET /api/senior/notifications", client.request("GET", "/api/senior/notifications", token=token)[0]
+    if action == "senior_tasks":
+        token = rng.choice(seniors)["token"]
+        return "GET /api/senior/tasks", client.request("GET", "/api/senior/tasks", token=token)[0]
+
+    # task_edit: toggle an existing task most of the time, sometimes add/remove one
+    senior = rng.choice(seniors)
+    roll = rng.random()
+    if roll < 0.2 or not senior["task_ids"]:
+        status, data = client.request("POST", "/api/senior/tasks", {"task_text": "errands"}, senior["token"])
+        if status == 201:
+            senior["task_ids"].append(json.loads(data)["task"]["task_id"])
+        return "POST /api/senior/tasks", status
+    if roll < 0.3 and len(senior["task_ids"]) > 2:
+        task_id = senior["task_ids"].pop()
+        status, _ = client.request("DELETE", f"/api/senior/tasks/{task_id}", token=senior["token"])
+        return "DELETE /api/senior/tasks/<id>", status
+    task_id = rng.choice(senior["task_ids"])
+    status, _ = client.request(
+        "PUT", f"/api/senior/tasks/{task_id}",
+        {"status": rng.choice(["open", "done"])}, senior["token"],
+    )
+    return "PUT /api/senior/tasks/<id>", status
+
+
+def run_stage(base_url, concurrency, duration, accounts, seed):
+    stats = Stats()
+    stop_at = time.perf_counter() + duration
+    actions = [a for a, _ in TRAFFIC_MIX]
+    weights = [w for _, w in TRAFFIC_MIX]
+
+    def worker(i):
+        rng = random.Random(f"{seed}:{concurrency}:{i}")
+        client = Client(base_url)
+        while time.perf_counter() < stop_at:
+            action = rng.choices(actions, weights=weights)[0]
+            started = time.perf_counter()
+            try:
+                route, status = run_action(client, rng, action, accounts)
+                ok = status is not None and status < 400
+            except Exception:
+                route, ok = action, False
+            stats.record(route, time.perf_counter() - started, ok)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, samples in sorted(stats.latencies.items()):
+        ordered = sorted(samples)
+        routes[route] = {
+            "requests": len(ordered),
+            "errors": stats.errors[route],
+            "error_rate": round(stats.errors[route] / len(ordered), 4),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        }
+    total = sum(r["requests"] for r in routes.values())
+    errors = sum(r["errors"] for r in routes.values())
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "routes": routes,
+    }
+
+
+def print_stage(stage):
+    print(
+        f"\n== concurrency {stage['concurrency']}: {stage['throughput_rps']} req/s, "
+        f"{stage['requests']} requests, error rate {stage['error_rate'] * 100:.2f}%"
+    )
+    print(f"  {'route':<36} {'reqs':>7} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in stage["routes"].items():
+        print(
+            f"  {route:<36} {r['requests']:>7} {r['error_rate'] * 100:>6.2f}"
+            f" {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mixed-traffic load test for the MarletMeets API.")
+    parser.add_argument("--url", help="target an already running app instead of starting one")
+    parser.add_argument("--local-postgres", action="store_true", help="start a throwaway Postgres cluster")
+    parser.add_argument("--server-cmd", default=f"{sys.executable} -m flask --app app run --port {{port}} --with-threads",
+                        help="command that starts the app from backend/ ({port} is substituted)")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated concurrency stages")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per stage")
+    parser.add_argument("--students", type=int, default=5000, help="synthetic students to seed (local Postgres only)")
+    parser.add_argument("--seniors", type=int, default=1000, help="synthetic seniors to seed (local Postgres only)")
+    parser.add_argument("--accounts", type=int, default=50, help="student and senior logins created per run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pg = LocalPostgres() if args.local_postgres else None
+    app_proc = None
+    try:
+        env = {}
+        if pg:
+            pg.__enter__()
+            env = pg.env()
+            print(f"Local Postgres on port {pg.port}")
+            prepare_schema(env)
+
+        base_url = args.url
+        if not base_url:
+            port = free_port()
+            app_proc = start_app(args.server_cmd, port, env)
+            base_url = f"http://127.0.0.1:{port}"
+            wait_for(lambda: Client(base_url).request("GET", "/api/health")[0] == 200, 60, "app health check")
+            print(f"App running at {base_url}")
+
+        if pg and (args.students or args.seniors):
+            # Auth tables exist once the app has started
+            print(f"Seeding {args.students} students / {args.seniors} seniors...")
+            seed_population(env, args.students, args.seniors, args.seed)
+
+        run_id = f"{int(time.time())}{random.randint(100, 999)}"
+        accounts = create_accounts(base_url, run_id, args.accounts, args.accounts)
+        print(f"Created {args.accounts} student and {args.accounts} senior logins")
+
+        stages = []
+        for concurrency in (int(c) for c in args.concurrency.split(",") if c):
+            stage = run_stage(base_url, concurrency, args.duration, accounts, args.seed)
+            print_stage(stage)
+            stages.append(stage)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"benchmark": "loadtest", "target": base_url, "stages": stages}, f, indent=2)
+            print(f"\nResults written to {args.output}")
+        return 0
+    finally:
+        if app_proc:
+            app_proc.terminate()
+            try:
+                app_proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                app_proc.kill()
+        if pg and pg.dir:
+            pg.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,23 @@
 """Seed the database with realistic test data.
 
 Run: python scripts/seed.py
+
+Capacity testing (synthetic population, loaded with COPY):
+    python scripts/seed.py --synthetic --students 1000000 --seniors 200000 --seed 42
+    python scripts/seed.py --reset-synthetic
 """
 
+import argparse
+import io
 import os
 import sys
+import time
+from array import array
+from datetime import datetime
 from dotenv import load_dotenv
 
+from synthetic import DEFAULT_CENTER, PopulationGenerator
+
 load_dotenv()
 
 try:
@@ -396,10 +407,169 @@ def verify(conn):
     cur.close()
 
 
-def main():
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, (list, tuple)):
+        return "{" + ",".join(str(v) for v in value) + "}"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def copy_rows(conn, table, columns, rows, chunk_size):
+    """
+    Streams rows into table with COPY FROM STDIN, chunk_size rows per COPY call,
+    so memory stays flat no matter how many rows the generator produces.
+    """
+    cur = conn.cursor()
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    total = 0
+    buf = io.StringIO()
+    pending = 0
+    for row in rows:
+        buf.write("\t".join(copy_value(row[c]) for c in columns))
+        buf.write("\n")
+        pending += 1
+        if pending == chunk_size:
+            buf.seek(0)
+            cur.copy_expert(sql, buf)
+            total += pending
+            buf = io.StringIO()
+            pending = 0
+    if pending:
+        buf.seek(0)
+        cur.copy_expert(sql, buf)
+        total += pending
+    cur.close()
+    return total
+
+
+def next_id(conn, table, column):
+    cur = conn.cursor()
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table};")
+    value = cur.fetchone()[0]
+    cur.close()
+    return value
+
+
+def sync_sequence(conn, table, column):
+    run_sql(
+        conn,
+        f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), COALESCE(MAX({column}), 1)) FROM {table};",
+    )
+
+
+class SeniorCoords:
+    """senior_id -> (lat, lng) backed by two float arrays instead of a dict of tuples."""
+
+    def __init__(self, start_id):
+        self.start_id = start_id
+        self.lats = array("d")
+        self.lngs = array("d")
+
+    def add(self, lat, lng):
+        self.lats.append(lat)
+        self.lngs.append(lng)
+
+    def __getitem__(self, senior_id):
+        i = senior_id - self.start_id
+        return self.lats[i], self.lngs[i]
+
+
+def seed_synthetic(conn, n_students, n_seniors, seed, center, chunk_size):
+    gen = PopulationGenerator(seed=seed, center=center)
+    student_start = next_id(conn, "students", "student_id")
+    senior_start = next_id(conn, "seniors", "senior_id")
+
+    timings = {}
+    started = time.perf_counter()
+
+    # Seniors first: remember who lives where so matches can stay local
+    seniors_by_neighbourhood = {i: array("l") for i in range(len(gen.neighbourhoods))}
+    coords = SeniorCoords(senior_start)
+
+    def seniors_stream():
+        for senior in gen.seniors(n_seniors, senior_start):
+            seniors_by_neighbourhood[senior["neighbourhood"]].append(senior["senior_id"])
+            coords.add(senior["latitude"], senior["longitude"])
+            yield senior
+
+    def tasks_stream():
+        for senior in gen.seniors(n_seniors, senior_start):
+            for task in senior["tasks"]:
+                yield {"senior_id": senior["senior_id"], **task}
+
+    def matches_stream():
+        return gen.matches(gen.students(n_students, student_start), seniors_by_neighbourhood)
+
+    steps = [
+        ("seniors", ["senior_id", "email", "first_name", "last_name", "phone", "address",
+                     "latitude", "longitude", "needs", "languages"], seniors_stream),
+        ("students", ["student_id", "mcgill_email", "first_name", "last_name", "phone", "address",
+                      "latitude", "longitude", "skills", "languages", "hours_completed"],
+         lambda: gen.students(n_students, student_start)),
+        ("senior_tasks", ["senior_id", "task_text", "status"], tasks_stream),
+        ("matches", ["student_id", "senior_id", "status", "created_at"], matches_stream),
+        ("sessions", ["student_id", "senior_id", "session_time", "duration_minutes", "status",
+                      "latitude", "longitude", "notes", "created_at"],
+         lambda: gen.sessions(matches_stream(), coords)),
+    ]
+    for table, columns, rows in steps:
+        step_started = time.perf_counter()
+        count = copy_rows(conn, table, columns, rows(), chunk_size)
+        timings[table] = (count, time.perf_counter() - step_started)
+        print(f"  {table}: {count} rows in {timings[table][1]:.1f}s")
+
+    sync_sequence(conn, "students", "student_id")
+    sync_sequence(conn, "seniors", "senior_id")
+    conn.commit()
+    total_rows = sum(count for count, _ in timings.values())
+    print(f"Loaded {total_rows} rows in {time.perf_counter() - started:.1f}s (seed={seed})")
+    return timings
+
+
+def delete_synthetic_data(conn):
+    # matches and senior_tasks cascade from students/seniors
+    run_sql(conn, "DELETE FROM sessions WHERE notes LIKE 'synth:%';")
+    run_sql(conn, "DELETE FROM students WHERE mcgill_email LIKE 'synth.student%';")
+    run_sql(conn, "DELETE FROM seniors WHERE email LIKE 'synth.senior%';")
+
+
+def parse_center(value):
+    lat, lng = (float(part) for part in value.split(","))
+    return lat, lng
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the MarletMeets database.")
+    parser.add_argument("--synthetic", action="store_true", help="load a generated population with COPY")
+    parser.add_argument("--reset-synthetic", action="store_true", help="delete previously generated rows")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--seniors", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--center", type=parse_center, default=DEFAULT_CENTER, help="lat,lng of the city centre")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per COPY call")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     dsn = dict(host=PG['host'], port=PG['port'], dbname=PG['dbname'], user=PG['user'], password=PG['password'])
     try:
         conn = psycopg2.connect(**dsn)
+
+        if args.synthetic or args.reset_synthetic:
+            print("Connected to DB. Removing previous synthetic data...")
+            delete_synthetic_data(conn)
+            conn.commit()
+            if args.synthetic:
+                print(f"Generating {args.students} students and {args.seniors} seniors...")
+                seed_synthetic(conn, args.students, args.seniors, args.seed, args.center, args.chunk_size)
+            conn.close()
+            print("Done.")
+            return 0
+
         conn.autocommit = True
         print("Connected to DB. Seeding data...")
 
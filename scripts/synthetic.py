@@ -0,0 +1,238 @@
+"""Synthetic population generator for capacity testing.
+
+Builds students, seniors, tasks, matches and sessions clustered around a city
+centre. Nothing here touches the database; scripts/seed.py loads the rows and
+the benchmarks use them as offline rosters. The same seed (and anchor time)
+always produces the same population.
+"""
+
+import math
+import random
+from bisect import bisect
+from itertools import accumulate
+from datetime import datetime, timedelta
+
+DEFAULT_CENTER = (45.5048, -73.5772)  # McGill downtown campus
+KM_PER_DEG_LAT = 111.32
+
+# (tag, weight) — shared by student skills and senior needs so the matcher finds overlaps
+TAGS = [
+    ("companionship", 18),
+    ("shopping", 14),
+    ("grocery", 12),
+    ("tech_help", 12),
+    ("errands", 10),
+    ("walking", 9),
+    ("meal_prep", 8),
+    ("medication_pickup", 6),
+    ("light_housekeeping", 5),
+    ("translation", 4),
+    ("tutoring", 3),
+    ("gardening", 3),
+    ("administrative", 2),
+]
+
+LANGUAGES = [
+    ("english", 70),
+    ("french", 65),
+    ("spanish", 8),
+    ("arabic", 7),
+    ("mandarin", 6),
+    ("italian", 4),
+    ("portuguese", 3),
+    ("korean", 2),
+    ("urdu", 2),
+    ("german", 2),
+]
+
+FIRST_NAMES = [
+    "Maya", "Julien", "Lina", "Sam", "Noah", "Claire", "Mateo", "Aisha", "Olivia", "Eva",
+    "Helen", "Robert", "Fatima", "Lucas", "Sofia", "Jean", "Chloe", "Liam", "Emma", "Yusuf",
+]
+LAST_NAMES = [
+    "Patel", "Roy", "Ahmed", "Chen", "Kim", "Ng", "Garcia", "Khan", "Martin", "Schmidt",
+    "Dupont", "Miller", "Elhadi", "Tremblay", "Rossi", "Dupuis", "Gagnon", "Lee", "Nguyen", "Cohen",
+]
+STREETS = [
+    "Rue Milton", "Ave du Parc", "Rue Prince Arthur", "Sherbrooke St W", "Rue St-Urbain",
+    "Rue Saint-Denis", "Ave des Pins", "Rue Jeanne-Mance", "Rue Hutchison", "Boul Saint-Laurent",
+]
+
+SESSION_STATUSES = [("completed", 80), ("scheduled", 12), ("active", 3), ("cancelled", 5)]
+
+
+class WeightedPicker:
+    """Weighted choice with precomputed cumulative weights (random.choices rebuilds them per call)."""
+
+    def __init__(self, weighted):
+        self.values = [v for v, _ in weighted]
+        self.cum_weights = list(accumulate(w for _, w in weighted))
+        self.total = self.cum_weights[-1]
+
+    def pick(self, rng):
+        return self.values[bisect(self.cum_weights, rng.random() * self.total)]
+
+    def sample(self, rng, k):
+        """Picks k distinct values with probability proportional to weight."""
+        picked = []
+        while len(picked) < min(k, len(self.values)):
+            choice = self.pick(rng)
+            if choice not in picked:
+                picked.append(choice)
+        return picked
+
+
+TAG_PICKER = WeightedPicker(TAGS)
+LANGUAGE_PICKER = WeightedPicker(LANGUAGES)
+STATUS_PICKER = WeightedPicker(SESSION_STATUSES)
+SKILL_COUNT = WeightedPicker([(1, 30), (2, 35), (3, 25), (4, 10)])
+NEED_COUNT = WeightedPicker([(0, 5), (1, 25), (2, 35), (3, 25), (4, 10)])
+LANGUAGE_COUNT = WeightedPicker([(1, 35), (2, 55), (3, 10)])
+SELECTION_COUNT = WeightedPicker([(1, 80), (2, 20)])
+SESSION_COUNT = WeightedPicker([(0, 30), (1, 40), (2, 20), (3, 10)])
+
+
+class PopulationGenerator:
+    def __init__(self, seed=42, center=DEFAULT_CENTER, neighbourhoods=12, city_radius_km=8.0,
+                 neighbourhood_km=0.8, anchor=None):
+        self.seed = seed
+        self.center = center
+        self.anchor = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        rng = self._rng("neighbourhoods")
+        self.neighbourhood_km = neighbourhood_km
+        # Neighbourhood centres sit closer to downtown more often (sqrt keeps the disc uniform,
+        # the extra power pulls density towards the centre)
+        self.neighbourhoods = []
+        for _ in range(neighbourhoods):
+            r = city_radius_km * rng.random() ** 0.8
+            theta = rng.uniform(0, 2 * math.pi)
+            self.neighbourhoods.append(self._offset(center, r * math.cos(theta), r * math.sin(theta)))
+        # Some neighbourhoods are much denser than others
+        self.neighbourhood_picker = WeightedPicker(
+            [(i, rng.paretovariate(1.5)) for i in range(neighbourhoods)]
+        )
+
+    def _rng(self, stream):
+        return random.Random(f"{self.seed}:{stream}")
+
+    @staticmethod
+    def _offset(origin, dx_km, dy_km):
+        lat = origin[0] + dy_km / KM_PER_DEG_LAT
+        lng = origin[1] + dx_km / (KM_PER_DEG_LAT * math.cos(math.radians(origin[0])))
+        return lat, lng
+
+    def _place(self, rng):
+        idx = self.neighbourhood_picker.pick(rng)
+        lat, lng = self._offset(
+            self.neighbourhoods[idx],
+            rng.gauss(0, self.neighbourhood_km),
+            rng.gauss(0, self.neighbourhood_km),
+        )
+        return idx, round(lat, 6), round(lng, 6)
+
+    def _person(self, rng):
+        return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    def _languages(self, rng):
+        return LANGUAGE_PICKER.sample(rng, LANGUAGE_COUNT.pick(rng))
+
+    def students(self, n, start_id=1):
+        rng = self._rng("students")
+        for student_id in range(start_id, start_id + n):
+            first, last = self._person(rng)
+            neighbourhood, lat, lng = self._place(rng)
+            yield {
+                "student_id": student_id,
+                "mcgill_email": f"synth.student{student_id}@mail.mcgill.ca",
+                "first_name": first,
+                "last_name": last,
+                "phone": f"555-{student_id % 10000:04d}",
+                "address": f"{rng.randint(1, 4999)} {rng.choice(STREETS)}",
+                "latitude": lat,
+                "longitude": lng,
+                "skills": TAG_PICKER.sample(rng, SKILL_COUNT.pick(rng)),
+                "languages": self._languages(rng),
+                "hours_completed": int(rng.expovariate(1 / 8)),
+                "neighbourhood": neighbourhood,
+            }
+
+    def seniors(self, n, start_id=1):
+        """Each senior carries its task list; needs are the open task texts, as the app keeps them."""
+        rng = self._rng("seniors")
+        for senior_id in range(start_id, start_id + n):
+            first, last = self._person(rng)
+            neighbourhood, lat, lng = self._place(rng)
+            tasks = [
+                {"task_text": tag, "status": "open" if rng.random() < 0.8 else "done"}
+                for tag in TAG_PICKER.sample(rng, NEED_COUNT.pick(rng))
+            ]
+            yield {
+                "senior_id": senior_id,
+                "email": f"synth.senior{senior_id}@example.com",
+                "first_name": first,
+                "last_name": last,
+                "phone": f"(514)-{senior_id // 10000 % 1000:03d}-{senior_id % 10000:04d}",
+                "address": f"{rng.randint(1, 4999)} {rng.choice(STREETS)}",
+                "latitude": lat,
+                "longitude": lng,
+                "needs": [t["task_text"] for t in tasks if t["status"] == "open"],
+                "languages": self._languages(rng),
+                "tasks": tasks,
+                "neighbourhood": neighbourhood,
+            }
+
+    def matches(self, students, seniors_by_neighbourhood, select_rate=0.3):
+        """
+        A share of students select one or two seniors, mostly from their own neighbourhood.
+        seniors_by_neighbourhood maps neighbourhood index -> list of senior ids.
+        """
+        rng = self._rng("matches")
+        all_neighbourhoods = [k for k, ids in seniors_by_neighbourhood.items() if ids]
+        if not all_neighbourhoods:
+            return
+        for student in students:
+            if rng.random() >= select_rate:
+                continue
+            for _ in range(SELECTION_COUNT.pick(rng)):
+                pool = seniors_by_neighbourhood.get(student["neighbourhood"])
+                if not pool or rng.random() < 0.1:
+                    pool = seniors_by_neighbourhood[rng.choice(all_neighbourhoods)]
+                yield {
+                    "student_id": student["student_id"],
+                    "senior_id": rng.choice(pool),
+                    "status": "selected",
+                    "created_at": self.anchor - timedelta(minutes=rng.randint(0, 90 * 24 * 60)),
+                }
+
+    def sessions(self, matches, seniors_location, history_days=365):
+        """
+        Sessions for selected pairs, spread over the last history_days.
+        seniors_location maps senior_id -> (lat, lng).
+        """
+        rng = self._rng("sessions")
+        for match in matches:
+            lat, lng = seniors_location[match["senior_id"]]
+            for _ in range(SESSION_COUNT.pick(rng)):
+                status = STATUS_PICKER.pick(rng)
+                if status in ("scheduled", "active"):
+                    when = self.anchor + timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+                else:
+                    when = self.anchor - timedelta(minutes=rng.randint(0, history_days * 24 * 60))
+                yield {
+                    "student_id": match["student_id"],
+                    "senior_id": match["senior_id"],
+                    "session_time": when,
+                    "duration_minutes": rng.choice([30, 45, 60, 60, 90, 120]),
+                    "status": status,
+                    "latitude": lat,
+                    "longitude": lng,
+                    "notes": "synth: generated session",
+                    "created_at": min(when, self.anchor) - timedelta(days=rng.randint(0, 7)),
+                }
+
+
+def generate_rosters(n_students, n_seniors, seed=42, center=DEFAULT_CENTER):
+    """In-memory rosters shaped like the students/seniors rows the matcher reads."""
+    gen = PopulationGenerator(seed=seed, center=center)
+    return list(gen.students(n_students)), list(gen.seniors(n_seniors))
@@ -0,0 +1,54 @@
+import os
+import sys
+
+# Backend modules import each other by bare name, the way app.py runs them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+import pytest  # noqa: E402
+
+
+class QueryLog:
+    """
+    Stands in for db.execute_query: records every statement and answers from canned results.
+    responses maps a substring of the SQL to the value execute_query should return, or to a
+    function of the statement's params that returns it.
+    """
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.statements = []
+        self.primary_reads = []
+
+    def __call__(self, query, params=None, commit=False, fetch_one=False, fetch_all=False, use_primary=False):
+        self.statements.append((" ".join(query.split()), params))
+        if use_primary:
+            self.primary_reads.append(" ".join(query.split()))
+        for needle, result in self.responses.items():
+            if needle in query:
+                return result(params) if callable(result) else result
+        return [] if fetch_all else None
+
+    def sql(self):
+        return [statement for statement, _ in self.statements]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    Flask test client with the database stubbed. Set api.user to act as a signed-in user,
+    and api.db.responses to script query results; api.db.statements records what ran.
+    """
+    import app
+    import jobs
+
+    monkeypatch.setattr(app, "_schema_checked", True)
+    db = QueryLog()
+    monkeypatch.setattr(app, "execute_query", db)
+    # Enqueues run through jobs' own import; count them as round-trips too
+    monkeypatch.setattr(jobs, "execute_query", db)
+    client = app.app.test_client()
+    client.db = db
+    client.user = None
+    monkeypatch.setattr(app, "get_current_user", lambda token=None: dict(client.user) if client.user else None)
+    return client
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from admission import COST_CLASSES, AdmissionController, Rejected, cost_class_for
+
+EXPENSIVE = COST_CLASSES["expensive"]
+STANDARD = COST_CLASSES["standard"]
+PRIORITY = COST_CLASSES["priority"]
+AUTH = COST_CLASSES["auth"]
+
+
+@pytest.mark.parametrize("capacity, reserved", [(2, 2), (3, 2), (5, 2)])
+def test_small_pool_still_admits_expensive_routes(capacity, reserved):
+    controller = AdmissionController(capacity=capacity, reserved=reserved, route_limits={})
+    assert controller._limit(EXPENSIVE) < EXPENSIVE.weight
+
+    ticket = controller.acquire("dashboard", EXPENSIVE)
+
+    assert controller.snapshot() == (controller._limit(EXPENSIVE), 0)
+    # The expensive request fills the non-reserved units: the next one sheds, priority still gets in
+    with pytest.raises(Rejected) as excinfo:
+        controller.acquire("signup_student", EXPENSIVE)
+    assert excinfo.value.status == 503
+    controller.release(controller.acquire("health_check", PRIORITY))
+
+    controller.release(ticket)
+    assert controller.snapshot() == (0, 0)
+
+
+def test_full_weight_when_it_fits():
+    controller = AdmissionController(capacity=20, reserved=2, route_limits={})
+
+    ticket = controller.acquire("dashboard", EXPENSIVE)
+
+    assert controller.snapshot() == (EXPENSIVE.weight, 0)
+    controller.release(ticket)
+
+
+def test_route_limit_is_429():
+    controller = AdmissionController(capacity=20, reserved=2, route_limits={"get_matches_batch": 1})
+    ticket = controller.acquire("get_matches_batch", EXPENSIVE)
+
+    with pytest.raises(Rejected) as excinfo:
+        controller.acquire("get_matches_batch", EXPENSIVE)
+
+    assert excinfo.value.status == 429
+    controller.release(ticket)
+
+
+def test_waiter_is_admitted_on_release():
+    controller = AdmissionController(capacity=3, reserved=2, route_limits={})
+    ticket = controller.acquire("student_matches", STANDARD)
+    admitted = []
+
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire("student_matches", STANDARD)))
+    waiter.start()
+    controller.release(ticket)
+    waiter.join(timeout=STANDARD.queue_timeout_s)
+
+    assert len(admitted) == 1
+    controller.release(admitted[0])
+
+
+def test_login_is_admitted_when_expensive_routes_are_saturated():
+    assert cost_class_for("login") is AUTH
+    controller = AdmissionController(capacity=20, reserved=2, route_limits={}, class_reserves={"auth": 2})
+    impatient = EXPENSIVE._replace(queue_timeout_s=0.01)
+    tickets = []
+    while True:
+        try:
+            tickets.append(controller.acquire("dashboard", impatient))
+        except Rejected as e:
+            assert e.status == 503
+            break
+    assert controller.snapshot() == (16, 0)
+
+    # Logins still get in on their own units, and the priority reserve is still free
+    logins = [controller.acquire("login", AUTH) for _ in range(2)]
+    health = controller.acquire("health_check", PRIORITY)
+    assert controller.snapshot() == (19, 0)
+
+    for ticket in tickets + logins + [health]:
+        controller.release(ticket)
+    assert controller.snapshot() == (0, 0)
+
+
+def test_class_reserves_leave_standard_routes_a_unit():
+    controller = AdmissionController(capacity=4, reserved=2, route_limits={}, class_reserves={"auth": 5})
+
+    assert controller.class_reserves == {"auth": 1}
+    controller.release(controller.acquire("student_matches", STANDARD._replace(queue_timeout_s=0.01)))
@@ -0,0 +1,117 @@
+import pytest
+
+import jobs
+from conftest import QueryLog
+
+
+def claimed(job_id, kind="rebuild_needs", attempts=1, payload=None):
+    return {"job_id": job_id, "kind": kind, "payload": payload or {"senior_id": job_id},
+            "attempts": attempts, "max_attempts": 5}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    log = QueryLog()
+    monkeypatch.setattr(jobs, "execute_query", log)
+    return log
+
+
+def test_each_lease_is_renewed_just_before_its_job_runs(db, monkeypatch):
+    order = []
+    db.responses = {"SET locked_until": lambda params: order.append("renew") or [{"job_id": params["job_ids"][0]}]}
+    monkeypatch.setattr(jobs, "run_job", lambda job: order.append(f"run {job['job_id']}"))
+    monkeypatch.setattr(jobs, "claim", lambda kinds, limit: [claimed(1), claimed(2)] if not order else [])
+
+    jobs.work(["rebuild_needs"], once=True)
+
+    assert order == ["renew", "run 1", "renew", "run 2"]
+    renewals = [params for sql, params in db.statements if "SET locked_until" in sql]
+    assert [(p["job_ids"], p["attempts"]) for p in renewals] == [([1], [1]), ([2], [1])]
+
+
+def test_job_taken_over_while_waiting_is_skipped(db, monkeypatch):
+    # Job 2's lease lapsed behind job 1 and another worker re-claimed it, so the fenced renew returns nothing
+    db.responses = {"SET locked_until": lambda params: [] if params["job_ids"] == [2] else [{"job_id": 1}]}
+    ran = []
+    monkeypatch.setattr(jobs, "run_job", lambda job: ran.append(job["job_id"]))
+    monkeypatch.setattr(jobs, "claim", lambda kinds, limit: [claimed(1), claimed(2)] if not db.statements else [])
+
+    jobs.work(["rebuild_needs"], once=True)
+
+    assert ran == [1]
+
+
+class CountingBackend:
+    def __init__(self, results):
+        self.results = results
+        self.lookups = []
+
+    def lookup(self, address):
+        self.lookups.append(address)
+        return self.results.get(address, (None, None, "ZERO_RESULTS"))
+
+
+@pytest.fixture
+def geocoder(monkeypatch):
+    from geocoding import GeocodingService
+
+    backend = CountingBackend({
+        "845 Sherbrooke St W": (45.504, -73.577, None),
+        "1 Rue Sainte-Catherine": (45.5, -73.6, None),
+    })
+    monkeypatch.setattr(jobs, "_geocoder", GeocodingService(backend, max_workers=2))
+    return backend
+
+
+def test_geocode_batch_looks_up_each_address_once(db, geocoder, monkeypatch):
+    batch = [
+        claimed(1, "geocode_row", payload={"table": "students", "id": 7}),
+        claimed(2, "geocode_row", payload={"table": "students", "id": 8}),
+        claimed(3, "geocode_row", payload={"table": "seniors", "id": 5}),
+        claimed(4, "geocode_row", payload={"table": "seniors", "id": 6}),
+    ]
+    db.responses = {
+        "FROM students": [{"id": 7, "address": "845 Sherbrooke St W"}, {"id": 8, "address": "845 sherbrooke st w "}],
+        "FROM seniors": [{"id": 5, "address": "1 Rue Sainte-Catherine"}, {"id": 6, "address": "Nowhere"}],
+        "SET locked_until": lambda params: [{"job_id": job_id} for job_id in params["job_ids"]],
+        "RETURNING t.": lambda params: [{"id": row_id} for row_id in params[0]],
+        "SET status = CASE": {"status": "queued"},
+    }
+    monkeypatch.setattr(jobs, "claim", lambda kinds, limit: batch if len(db.statements) == 0 else [])
+
+    jobs.work(["geocode_row"], once=True)
+
+    assert sorted(geocoder.lookups) == ["1 Rue Sainte-Catherine", "845 Sherbrooke St W", "Nowhere"]
+    sql = db.sql()
+    assert sum("SET locked_until" in statement for statement in sql) == 1
+    updates = [params for statement, params in db.statements if statement.startswith("UPDATE students t")]
+    assert updates == [([7, 8], [45.504, 45.504], [-73.577, -73.577])]
+    failed = [params["job_id"] for statement, params in db.statements if "SET status = CASE" in statement]
+    completed = [params[0] for statement, params in db.statements if "SET status = 'done'" in statement]
+    assert failed == [4]
+    assert completed == [1, 2, 3]
+
+
+def test_backfill_places_a_chunk_and_queues_the_next(db, geocoder, monkeypatch):
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", lambda kind, payload, dedup_key: queued.append((kind, payload, dedup_key)))
+    db.responses = {
+        "FROM students": [{"id": 7, "address": "845 Sherbrooke St W"}, {"id": 9, "address": "845 Sherbrooke St W"}],
+        "RETURNING t.": lambda params: [{"id": row_id} for row_id in params[0]],
+    }
+
+    jobs.backfill_geocode({})
+
+    assert geocoder.lookups == ["845 Sherbrooke St W"]
+    assert queued == [("backfill_geocode", {"table": "students", "after": 9}, "backfill_geocode:students:9")]
+
+
+def test_backfill_moves_to_the_next_table_then_stops(db, geocoder, monkeypatch):
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", lambda kind, payload, dedup_key: queued.append(payload))
+
+    jobs.backfill_geocode({"table": "students", "after": 9})
+    jobs.backfill_geocode({"table": "seniors", "after": 0})
+
+    assert queued == [{"table": "seniors", "after": 0}]
+    assert geocoder.lookups == []
@@ -0,0 +1,30 @@
+import pytest
+
+from map_clusters import MAX_ZOOM, parse_bbox, parse_zoom
+
+
+@pytest.mark.parametrize("value", ["", "abc", "3.5", None])
+def test_malformed_zoom_has_a_readable_message(value):
+    with pytest.raises(ValueError) as excinfo:
+        parse_zoom(value)
+    assert str(excinfo.value) == f"zoom must be an integer between 0 and {MAX_ZOOM}"
+
+
+def test_zoom_range():
+    assert parse_zoom("12") == 12
+    with pytest.raises(ValueError):
+        parse_zoom(str(MAX_ZOOM + 1))
+
+
+def test_clusters_endpoint_rejects_bad_zoom(api):
+    response = api.get("/api/map/clusters?bbox=-73.7,45.4,-73.5,45.6&zoom=near")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": f"zoom must be an integer between 0 and {MAX_ZOOM}"}
+    assert api.db.statements == []
+
+
+def test_bbox_order():
+    assert parse_bbox("-73.7,45.4,-73.5,45.6")["west"] == -73.7
+    with pytest.raises(ValueError):
+        parse_bbox("-73.5,45.4,-73.7,45.6")
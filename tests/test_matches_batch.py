@@ -0,0 +1,44 @@
+import pytest
+
+import app
+
+ADMIN = {"user_id": 1, "email": "admin@marletmeets.ca", "role": "admin", "student_id": None, "senior_id": None}
+STUDENT = {"user_id": 2, "email": "s@mail.mcgill.ca", "role": "student", "student_id": 7, "senior_id": None}
+
+SENIOR = {"senior_id": 5, "first_name": "Rose", "last_name": "Tremblay", "latitude": 45.5, "longitude": -73.6,
+          "needs": ["groceries"], "languages": ["French"]}
+STUDENTS = [
+    {"student_id": 7, "first_name": "Ana", "last_name": "Roy", "latitude": 45.504, "longitude": -73.577,
+     "skills": ["groceries"], "languages": ["French"]},
+]
+
+
+@pytest.fixture
+def roster(monkeypatch):
+    loads = []
+    monkeypatch.setattr(app, "current_snapshot", lambda: None)
+    monkeypatch.setattr(app, "get_open_seniors", lambda limit: loads.append("seniors") or [SENIOR])
+    monkeypatch.setattr(app, "get_all_students", lambda: loads.append("students") or STUDENTS)
+    return loads
+
+
+@pytest.mark.parametrize("user", [None, STUDENT])
+def test_batch_requires_admin(api, roster, user):
+    api.user = user
+
+    response = api.post("/api/matches/batch", json={"seniors": "open"})
+
+    assert response.status_code == 401
+    assert roster == []
+
+
+def test_admin_batch_scores_from_one_roster_fetch(api, roster):
+    api.user = ADMIN
+
+    response = api.post("/api/matches/batch", json={"seniors": "open"})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [result["senior"]["senior_id"] for result in body["results"]] == [5]
+    assert body["results"][0]["matches"][0]["student_id"] == 7
+    assert roster == ["seniors", "students"]
@@ -0,0 +1,53 @@
+import queue
+
+import app
+
+SENIOR = {"user_id": 2, "email": "r@example.com", "role": "senior", "student_id": None, "senior_id": 5}
+
+MATCH_ROW = {
+    "match_id": 41, "created_at": None, "first_name": "Ana", "last_name": "Roy", "student_phone": "514-555-0101",
+}
+
+
+class SilentListener:
+    """A listener whose NOTIFYs were all lost, as while it reconnects."""
+
+    def __init__(self):
+        self.unsubscribed = False
+
+    def subscribe(self, senior_id):
+        return queue.Queue()
+
+    def unsubscribe(self, senior_id, q):
+        self.unsubscribed = True
+
+
+def test_row_without_wakeup_arrives_on_the_next_heartbeat(api, monkeypatch):
+    listener = SilentListener()
+    monkeypatch.setattr(app, "MATCH_LISTENER", listener)
+    monkeypatch.setattr(app, "SSE_HEARTBEAT_S", 0.01)
+    reads = []
+
+    def new_matches(params):
+        # Empty on the catch-up read; the match commits during the first quiet interval
+        reads.append(params)
+        return [MATCH_ROW] if len(reads) == 2 else []
+
+    api.user = SENIOR
+    api.db.responses = {"m.match_id > %s": new_matches}
+
+    response = api.get("/api/senior/notifications/stream?since=40")
+    chunks = []
+    body = response.response
+    for chunk in body:
+        chunks.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+        # Give up after a few heartbeats rather than stream forever
+        if "match_selected" in chunks[-1] or len(chunks) > 10:
+            break
+    body.close()
+
+    assert any(chunk.startswith(": keep-alive") for chunk in chunks)
+    assert "id: 41" in chunks[-1] and "514-555-0101" in chunks[-1]
+    assert reads == [(5, 40), (5, 40)]
+    assert all("m.match_id > %s" in sql for sql in api.db.primary_reads) and len(api.db.primary_reads) == 2
+    assert listener.unsubscribed
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from werkzeug.datastructures import MIMEAccept
+
+from packed_points import (
+    BINARY,
+    PACKED_JSON,
+    SCALE,
+    decode_binary,
+    encode_binary,
+    negotiate_points_format,
+    pack_points,
+    unpack_points,
+)
+
+CLIENT_DECODER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "client", "src", "utils", "packedPoints.js"
+)
+
+SENIORS = [
+    {"senior_id": 12, "latitude": 45.5017, "longitude": -73.5673, "first_name": "Rose"},
+    {"senior_id": 3, "latitude": 45.508888, "longitude": -73.561668, "first_name": "Marc"},
+    {"senior_id": 7, "latitude": None, "longitude": -73.6, "first_name": "Lise"},
+    {"senior_id": 9, "latitude": 45.49, "longitude": None, "first_name": "Paul"},
+]
+PLACED = [SENIORS[1], SENIORS[0]]
+
+
+def close_to(a, b):
+    # Quantization rounds to the nearest 1/SCALE degree
+    return abs(a - b) <= 0.5 / SCALE + 1e-12
+
+
+def test_packed_json_round_trip():
+    packed = pack_points(SENIORS, "senior_id", ("first_name",))
+    rows = unpack_points(json.loads(json.dumps(packed)))
+
+    assert packed["count"] == 2
+    assert [row["senior_id"] for row in rows] == [3, 12, 7, 9]
+    for original, row in zip(PLACED, rows):
+        assert close_to(row["latitude"], original["latitude"])
+        assert close_to(row["longitude"], original["longitude"])
+        assert row["first_name"] == original["first_name"]
+    # Rows missing either coordinate travel untouched
+    assert rows[2:] == SENIORS[2:]
+
+
+def test_binary_round_trip_leaves_out_unplaced_rows():
+    students = [{"student_id": 1, "latitude": -33.8688, "longitude": 151.2093}]
+    decoded = decode_binary(encode_binary([("seniors", SENIORS, "senior_id"), ("students", students, "student_id")]))
+
+    assert [point[0] for point in decoded["seniors"]] == [3, 12]
+    for (_, lat, lng), original in zip(decoded["seniors"], PLACED):
+        assert close_to(lat, original["latitude"]) and close_to(lng, original["longitude"])
+    assert decoded["students"] == [(1, -33.8688, 151.2093)]
+
+
+@pytest.mark.parametrize("rows", [[], None])
+def test_empty_input(rows):
+    packed = pack_points(rows, "senior_id", ("first_name",))
+
+    assert packed["count"] == 0 and packed["ids"] == [] and packed["first_name"] == []
+    assert unpack_points(packed) == []
+    assert decode_binary(encode_binary([("seniors", rows, "senior_id")])) == {"seniors": []}
+    assert decode_binary(encode_binary([])) == {}
+
+
+def test_only_unplaced_rows():
+    rows = SENIORS[2:]
+
+    assert unpack_points(pack_points(rows, "senior_id")) == rows
+    assert decode_binary(encode_binary([("seniors", rows, "senior_id")])) == {"seniors": []}
+
+
+@pytest.mark.parametrize("lat, lng", [
+    (45.123456, -73.654321),   # finer than 1e-5 rounds to the nearest step
+    (45.000005, -73.000005),   # exactly half a step
+    (0.0, 0.0),
+    (90.0, 180.0),             # extremes still fit in int32 at this scale
+    (-90.0, -180.0),
+    ("45.50170", "-73.56730"),  # Decimal-ish strings from the driver
+])
+def test_precision_limits(lat, lng):
+    row = {"senior_id": 1, "latitude": lat, "longitude": lng}
+    (unpacked,) = unpack_points(pack_points([row], "senior_id"))
+    ((_, binary_lat, binary_lng),) = decode_binary(encode_binary([("seniors", [row], "senior_id")]))["seniors"]
+
+    for decoded_lat, decoded_lng in ((unpacked["latitude"], unpacked["longitude"]), (binary_lat, binary_lng)):
+        assert close_to(decoded_lat, float(lat)) and close_to(decoded_lng, float(lng))
+        # Never finer than the quantization step
+        assert round(decoded_lat * SCALE) == decoded_lat * SCALE
+
+
+def test_odd_section_names_stay_aligned():
+    rows = [{"id": i, "latitude": 45 + i / 1000, "longitude": -73 - i / 1000} for i in range(1, 4)]
+    sections = [(name, rows, "id") for name in ("a", "abc", "abcde", "séniors")]
+
+    decoded = decode_binary(encode_binary(sections))
+
+    assert list(decoded) == ["a", "abc", "abcde", "séniors"]
+    assert all([point[0] for point in points] == [1, 2, 3] for points in decoded.values())
+
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        decode_binary(b"PK\x03\x04" + b"\0" * 8)
+
+
+@pytest.mark.parametrize("accept, allow_binary, expected", [
+    ([], True, None),
+    ([("*/*", 1)], True, None),
+    ([("application/json", 1), (PACKED_JSON, 1)], True, None),
+    ([(PACKED_JSON, 1)], True, PACKED_JSON),
+    ([("application/json", 0.5), (PACKED_JSON, 1)], True, PACKED_JSON),
+    ([(BINARY, 1), (PACKED_JSON, 0.8)], True, BINARY),
+    ([(BINARY, 1), (PACKED_JSON, 0.8)], False, PACKED_JSON),
+    ([(BINARY, 1)], False, None),
+    ([("text/html", 1)], True, None),
+])
+def test_negotiate_points_format(accept, allow_binary, expected):
+    assert negotiate_points_format(MIMEAccept(accept), allow_binary=allow_binary) == expected
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_client_decoder_reads_what_the_server_packs(tmp_path):
+    # The decoder is an ES module inside a CRA app; node loads it as-is from an .mjs copy
+    module = tmp_path / "packedPoints.mjs"
+    shutil.copy(CLIENT_DECODER, module)
+    packed = tmp_path / "packed.json"
+    packed.write_text(json.dumps(pack_points(SENIORS, "senior_id", ("first_name",))))
+    binary = tmp_path / "points.bin"
+    binary.write_bytes(encode_binary([("seniors", SENIORS, "senior_id")]))
+    script = tmp_path / "decode.mjs"
+    script.write_text(
+        "import { readFileSync } from 'fs';\n"
+        "import { unpackPoints, decodeBinaryPoints } from './packedPoints.mjs';\n"
+        "const bytes = readFileSync(process.argv[3]);\n"
+        "const buffer = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);\n"
+        "const { seniors } = decodeBinaryPoints(buffer);\n"
+        "console.log(JSON.stringify({\n"
+        "  packed: unpackPoints(JSON.parse(readFileSync(process.argv[2], 'utf8'))),\n"
+        "  binary: { ids: Array.from(seniors.ids), latitude: Array.from(seniors.latitude),\n"
+        "            longitude: Array.from(seniors.longitude) },\n"
+        "}));\n"
+    )
+
+    result = subprocess.run(
+        ["node", str(script), str(packed), str(binary)], capture_output=True, text=True, check=True, timeout=30
+    )
+    decoded = json.loads(result.stdout)
+
+    assert decoded["packed"] == unpack_points(json.loads(packed.read_text()))
+    assert decoded["binary"]["ids"] == [3, 12]
+    assert decoded["binary"]["latitude"] == [lat for _, lat, _ in decode_binary(binary.read_bytes())["seniors"]]
+    assert decoded["binary"]["longitude"] == [lng for _, _, lng in decode_binary(binary.read_bytes())["seniors"]]
@@ -0,0 +1,44 @@
+from datetime import date
+
+from partitions import detach_old_partitions
+
+
+class PartitionCursor:
+    """Answers the partition listing and records everything else."""
+
+    def __init__(self, partitions, rows_per_partition):
+        self.partitions = partitions
+        self.rows_per_partition = rows_per_partition
+        self.statements = []
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        sql = " ".join(query.split())
+        self.statements.append(sql)
+        self.rowcount = self.rows_per_partition if sql.startswith("INSERT INTO change_log") else -1
+
+    def fetchall(self):
+        return [(name,) for name in self.partitions]
+
+
+def test_detached_sessions_are_logged_as_deletes():
+    cursor = PartitionCursor(["sessions_2023_11", "sessions_2023_12", "sessions_2024_01", "sessions_default"], 40)
+
+    detached = detach_old_partitions(cursor, retain_months=24, today=date(2026, 1, 15))
+
+    assert detached == [("sessions_2023_11", 40), ("sessions_2023_12", 40)]
+    writes = cursor.statements[1:]
+    assert writes[0] == "ALTER TABLE sessions DETACH PARTITION sessions_2023_11;"
+    # Tombstones come from the detached table itself, inside the same transaction as the detach
+    assert writes[1].startswith("INSERT INTO change_log (table_name, row_id, op, student_id, senior_id)")
+    assert "'sessions', session_id, 'DELETE', student_id, senior_id FROM sessions_2023_11;" in writes[1]
+    assert writes[2] == "ALTER TABLE sessions DETACH PARTITION sessions_2023_12;"
+    assert writes[3].endswith("FROM sessions_2023_12;")
+    assert len(writes) == 4
+
+
+def test_nothing_to_detach_writes_nothing():
+    cursor = PartitionCursor(["sessions_2025_06"], 0)
+
+    assert detach_old_partitions(cursor, retain_months=24, today=date(2025, 12, 15)) == []
+    assert len(cursor.statements) == 1
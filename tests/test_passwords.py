@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import app
+from passwords import AttemptThrottle, HashingOverloaded, HashingPool
+
+SIGNUP = {
+    "email": "new@mail.mcgill.ca", "password": "hunter22", "first_name": "Ana", "last_name": "Roy",
+    "phone": "514-555-0101", "address": "845 Sherbrooke St W", "latitude": 45.504, "longitude": -73.577,
+}
+
+
+def test_slow_hash_times_out_as_overloaded():
+    release = threading.Event()
+    pool = HashingPool(workers=1, queue_depth=0, timeout_s=0.01)
+    try:
+        with pytest.raises(HashingOverloaded):
+            pool.run(release.wait)
+    finally:
+        release.set()
+
+
+def test_slow_hasher_answers_503_with_retry_after(api, monkeypatch):
+    release = threading.Event()
+    pool = HashingPool(workers=1, queue_depth=0, timeout_s=0.01)
+    monkeypatch.setattr(app, "hash_password", lambda password: pool.run(release.wait))
+    monkeypatch.setattr(app, "SIGNUP_IP_THROTTLE", AttemptThrottle(10))
+    try:
+        response = api.post("/api/auth/signup/student", json=SIGNUP)
+    finally:
+        release.set()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_throttle_keys_on_the_forwarded_client(api, monkeypatch):
+    monkeypatch.setattr(app.app, "wsgi_app", ProxyFix(app.app.wsgi_app, x_for=1))
+    monkeypatch.setattr(app, "SIGNUP_IP_THROTTLE", AttemptThrottle(1))
+    monkeypatch.setattr(app, "hash_password", lambda password: "hash")
+    monkeypatch.setattr(app, "signup", lambda role, data, email, password_hash: (None, None))
+
+    def signup_from(client_ip):
+        return api.post("/api/auth/signup/student", json=SIGNUP, headers={"X-Forwarded-For": client_ip})
+
+    assert signup_from("203.0.113.5").status_code == 409
+    assert signup_from("203.0.113.5").status_code == 429
+    # Same proxy address, different client: not locked out
+    assert signup_from("198.51.100.7").status_code == 409
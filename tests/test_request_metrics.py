@@ -0,0 +1,45 @@
+import app
+import metrics
+from admission import Rejected
+
+
+def timed(route, status):
+    """Observations so far for one (route, status) on GET."""
+    state = metrics.HTTP_REQUEST_SECONDS._values.get(("GET", route, status))
+    return state[-1] if state else 0
+
+
+def test_admission_rejection_is_timed(api, monkeypatch):
+    def reject(route, cost):
+        raise Rejected(503, "queue_full", 2)
+
+    monkeypatch.setattr(app.ADMISSION, "acquire", reject)
+    before = timed("/api/seniors", "503")
+
+    response = api.get("/api/seniors")
+
+    assert response.status_code == 503
+    assert timed("/api/seniors", "503") == before + 1
+
+
+def test_schema_check_failure_is_timed(api, monkeypatch):
+    def schema_down(auto_migrate=False):
+        raise RuntimeError("database unreachable")
+
+    monkeypatch.setattr(app, "_schema_checked", False)
+    monkeypatch.setattr(app, "ensure_schema_ready", schema_down)
+    before = timed("/api/seniors", "500")
+
+    response = api.get("/api/seniors")
+
+    assert response.status_code == 500
+    assert timed("/api/seniors", "500") == before + 1
+
+
+def test_nothing_is_recorded_when_metrics_are_off(api, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    seen = []
+    monkeypatch.setattr(metrics.HTTP_REQUEST_SECONDS, "observe", lambda *a, **labels: seen.append(labels))
+
+    assert api.get("/api/seniors").status_code == 200
+    assert seen == []
@@ -0,0 +1,123 @@
+"""Write paths that must stay at one round-trip (the signed-in user lookup is stubbed out)."""
+
+import pytest
+
+import app
+
+STUDENT = {"user_id": 1, "email": "s@mail.mcgill.ca", "role": "student", "student_id": 7, "senior_id": None}
+SENIOR = {"user_id": 2, "email": "r@example.com", "role": "senior", "student_id": None, "senior_id": 5}
+
+STUDENT_ROW = {
+    "student_id": 7, "first_name": "Ana", "last_name": "Roy", "phone": "514-555-0101",
+    "address": "845 Sherbrooke St W", "latitude": 45.504, "longitude": -73.577,
+}
+SENIOR_ROW = {
+    "senior_id": 5, "first_name": "Rose", "last_name": "Tremblay", "phone": "514-555-0100",
+    "address": "1 Rue Sainte-Catherine", "latitude": 45.5, "longitude": -73.6,
+}
+
+SIGNUP = {
+    "email": "New@Mail.McGill.ca", "password": "correct horse", "first_name": "Ana", "last_name": "Roy",
+    "phone": "514-555-0101", "address": "845 Sherbrooke St W", "latitude": 45.504, "longitude": -73.577,
+}
+
+
+def select_result(student=STUDENT_ROW, senior=SENIOR_ROW, existing=None, inserted=41):
+    return {"student": student, "senior": senior, "existing_match_id": existing, "match_id": inserted}
+
+
+def test_select_is_one_statement(api):
+    api.user = STUDENT
+    api.db.responses = {"WITH student AS": select_result()}
+
+    response = api.post("/api/student/select", json={"senior_id": 5})
+
+    assert response.status_code == 201
+    assert len(api.db.statements) == 1
+    assert api.db.statements[0][1] == {"student_id": 7, "senior_id": 5}
+    body = response.get_json()
+    assert body["senior"] == {"senior_id": 5, "first_name": "Rose", "last_name": "Tremblay", "phone": "514-555-0100"}
+    assert body["student"]["student_id"] == 7
+
+
+def test_select_existing_is_one_statement(api):
+    api.user = STUDENT
+    api.db.responses = {"WITH student AS": select_result(existing=40, inserted=None)}
+
+    response = api.post("/api/student/select", json={"senior_id": 5})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"message": "Already selected."}
+    assert len(api.db.statements) == 1
+
+
+@pytest.mark.parametrize("missing, message", [
+    ("senior", "Senior not found."),
+    ("student", "Student profile not found."),
+])
+def test_select_missing_profile_is_404(api, missing, message):
+    api.user = STUDENT
+    api.db.responses = {"WITH student AS": select_result(inserted=None, **{missing: None})}
+
+    response = api.post("/api/student/select", json={"senior_id": 5})
+
+    assert response.status_code == 404
+    assert response.get_json() == {"error": message}
+    assert len(api.db.statements) == 1
+
+
+@pytest.mark.parametrize("role, user_id_column", [("student", "student_id"), ("senior", "senior_id")])
+def test_signup_writes_in_one_statement(api, monkeypatch, role, user_id_column):
+    monkeypatch.setattr(app, "hash_password", lambda password: "pbkdf2:sha256:600000$salt$hash")
+    monkeypatch.setattr(app.SIGNUP_IP_THROTTLE, "hit", lambda key: 0)
+    account = {"user_id": 3, "email": "new@mail.mcgill.ca", "role": role, "student_id": None, "senior_id": None}
+    account[user_id_column] = 9
+    api.db.responses = {"WITH profile AS": lambda params: dict(account, token=params["token"])}
+
+    response = api.post(f"/api/auth/signup/{role}", json=SIGNUP)
+
+    assert response.status_code == 201
+    assert response.get_json()["token"] == api.db.statements[1][1]["token"]
+    # The email pre-check keeps duplicates away from geocoding and PBKDF2; every row is written by the next statement
+    pre_check, write = api.db.sql()
+    assert pre_check.startswith("SELECT user_id FROM users WHERE email")
+    assert write.startswith("WITH profile AS ( INSERT INTO")
+    assert "INSERT INTO users" in write and "INSERT INTO auth_tokens" in write
+    assert api.db.statements[1][1]["email"] == "new@mail.mcgill.ca"
+
+
+def test_duplicate_signup_stops_at_the_pre_check(api, monkeypatch):
+    monkeypatch.setattr(app, "hash_password", lambda password: pytest.fail("hashed a duplicate"))
+    monkeypatch.setattr(app.SIGNUP_IP_THROTTLE, "hit", lambda key: 0)
+    api.db.responses = {"FROM users WHERE email": {"user_id": 3}}
+
+    response = api.post("/api/auth/signup/student", json=SIGNUP)
+
+    assert response.status_code == 409
+    assert len(api.db.statements) == 1
+
+
+def test_student_profile_post_is_one_statement(api):
+    api.user = STUDENT
+    updated = {"student_id": 7, "first_name": "Ana", "last_name": "Roy", "skills": ["groceries"], "languages": ["French"]}
+    api.db.responses = {"UPDATE students": updated}
+
+    response = api.post("/api/student/profile", json={"skills": ["groceries"], "languages": ["French"]})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"student": updated}
+    assert len(api.db.statements) == 1
+    assert "RETURNING" in api.db.sql()[0]
+
+
+def test_senior_profile_post_is_one_statement(api):
+    api.user = SENIOR
+    updated = {"senior_id": 5, "first_name": "Rose", "last_name": "Tremblay", "email": "r@example.com",
+               "phone": "514-555-0100", "address": "1 Rue Sainte-Catherine", "languages": ["French"]}
+    api.db.responses = {"UPDATE seniors": updated}
+
+    response = api.post("/api/senior/profile", json={"languages": ["French"]})
+
+    assert response.status_code == 200
+    assert response.get_json()["senior"] == updated
+    assert len(api.db.statements) == 1
@@ -0,0 +1,42 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def unchecked(monkeypatch):
+    monkeypatch.setattr(app, "_schema_checked", False)
+
+
+def test_failed_check_is_retried(unchecked, monkeypatch):
+    results = iter([False, True])
+    calls = []
+
+    def fake_ensure_schema_ready(auto_migrate=False):
+        calls.append(auto_migrate)
+        return next(results)
+
+    monkeypatch.setattr(app, "ensure_schema_ready", fake_ensure_schema_ready)
+    for _ in range(3):
+        app.verify_schema_once()
+
+    assert len(calls) == 2
+    assert app._schema_checked is True
+
+
+def test_raising_check_is_retried(unchecked, monkeypatch):
+    calls = []
+
+    def fake_ensure_schema_ready(auto_migrate=False):
+        calls.append(auto_migrate)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return True
+
+    monkeypatch.setattr(app, "ensure_schema_ready", fake_ensure_schema_ready)
+    with pytest.raises(RuntimeError):
+        app.verify_schema_once()
+    app.verify_schema_once()
+    app.verify_schema_once()
+
+    assert len(calls) == 2
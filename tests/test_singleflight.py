@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+
+import singleflight
+from singleflight import SingleFlight
+
+CALLERS = 16
+# Upper bound on any single wait, so a broken build fails instead of hanging
+TIMEOUT_S = 5
+
+
+class WatchedEvent(threading.Event):
+    """An Event that reports each thread that starts waiting on it."""
+
+    def __init__(self, waiting):
+        super().__init__()
+        self.waiting = waiting
+
+    def wait(self, timeout=None):
+        self.waiting.release()
+        return super().wait(timeout)
+
+
+@pytest.fixture
+def waiting(monkeypatch):
+    """
+    Semaphore released once per follower parked on an in-flight call.
+    """
+    waiting = threading.Semaphore(0)
+
+    class WatchedCall(singleflight._Call):
+        def __init__(self):
+            super().__init__()
+            self.done = WatchedEvent(waiting)
+
+    monkeypatch.setattr(singleflight, "_Call", WatchedCall)
+    return waiting
+
+
+class Gate:
+    """Holds the leader's fetch open until the test releases it."""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.opened = threading.Event()
+
+    def hold(self):
+        self.entered.set()
+        assert self.opened.wait(TIMEOUT_S)
+
+
+def run_burst(call, gate, waiting):
+    """
+    Runs call on CALLERS threads: one leader whose fetch is held at gate, then the rest,
+    which are all parked on the leader's call before it is released. Returns their results.
+    """
+    results = [None] * CALLERS
+
+    def caller(i):
+        results[i] = call()
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    threads[0].start()
+    assert gate.entered.wait(TIMEOUT_S)
+    for t in threads[1:]:
+        t.start()
+    for _ in threads[1:]:
+        assert waiting.acquire(timeout=TIMEOUT_S)
+    gate.opened.set()
+    for t in threads:
+        t.join(timeout=TIMEOUT_S)
+    return results
+
+
+def held_fetch(gate, calls, rows):
+    def fetch():
+        calls.append(threading.get_ident())
+        gate.hold()
+        return rows
+    return fetch
+
+
+def test_burst_runs_one_fetch(waiting):
+    flight = SingleFlight()
+    gate = Gate()
+    calls = []
+    rows = [{"senior_id": 1}]
+
+    results = run_burst(lambda: flight.do("seniors", held_fetch(gate, calls, rows)), gate, waiting)
+
+    assert len(calls) == 1
+    assert flight.executed == 1
+    assert flight.coalesced == CALLERS - 1
+    assert all(result is rows for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_next_burst_fetches_again(waiting):
+    flight = SingleFlight()
+    calls = []
+
+    for gate in (Gate(), Gate()):
+        run_burst(lambda: flight.do("seniors", held_fetch(gate, calls, [])), gate, waiting)
+
+    assert len(calls) == 2
+    assert flight.executed == 2
+    assert flight.coalesced == 2 * (CALLERS - 1)
+
+
+def test_error_reaches_every_caller(waiting):
+    flight = SingleFlight()
+    gate = Gate()
+
+    def fetch():
+        gate.hold()
+        raise RuntimeError("pool exhausted")
+
+    def call():
+        try:
+            flight.do("seniors", fetch)
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_burst(call, gate, waiting) == ["pool exhausted"] * CALLERS
+    assert flight.executed == 1
+
+
+def test_roster_burst_hits_the_database_once(monkeypatch, waiting):
+    import app
+
+    gate = Gate()
+    calls = []
+    rows = [{"senior_id": 1}]
+
+    def fake_execute_query(query, params=None, **kwargs):
+        calls.append(query)
+        gate.hold()
+        return rows
+
+    monkeypatch.setattr(app, "execute_query", fake_execute_query)
+    monkeypatch.setattr(app, "roster_flight", SingleFlight())
+
+    results = run_burst(app.load_senior_roster, gate, waiting)
+
+    assert calls == ["SELECT * FROM seniors;"]
+    assert app.roster_flight.executed == 1
+    assert app.roster_flight.coalesced == CALLERS - 1
+    assert all(result is rows for result in results)
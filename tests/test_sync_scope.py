@@ -0,0 +1,58 @@
+import app
+
+STUDENT = {"user_id": 1, "email": "s@mail.mcgill.ca", "role": "student", "student_id": 7, "senior_id": None}
+
+SELECTION_ROW = {
+    "match_id": 30, "senior_id": 5, "status": "selected", "created_at": None,
+    "first_name": "Rose", "last_name": "Tremblay", "phone": "514-555-0100",
+    "latitude": 45.5, "longitude": -73.6, "address": "1 Rue Sainte-Catherine",
+}
+
+
+def test_selected_senior_edit_is_in_the_delta(api, monkeypatch):
+    scopes = []
+
+    def fake_changes_since(since, tables, **scope):
+        scopes.append((since, tables, scope))
+        return 101, {"seniors": {"upserted": [5], "deleted": []}}
+
+    monkeypatch.setattr(app, "changes_since", fake_changes_since)
+    api.user = STUDENT
+    api.db.responses = {"m.senior_id = ANY": [SELECTION_ROW]}
+
+    response = api.get("/api/student/selection?since=100")
+
+    assert response.status_code == 200
+    assert scopes == [(100, ("matches", "students"), {"student_id": 7, "selected_by": 7})]
+    body = response.get_json()
+    assert body["version"] == 101
+    assert body["changes"]["selections"]["upserted"][0]["phone"] == "514-555-0100"
+    assert body["changes"]["selections"]["deleted"] == []
+
+
+def test_quiet_poll_reads_only_the_change_log(api, monkeypatch):
+    monkeypatch.setattr(app, "changes_since", lambda since, tables, **scope: (101, {}))
+    api.user = STUDENT
+
+    response = api.get("/api/student/selection?since=100")
+
+    assert response.get_json() == {"version": 101, "changes": {}}
+    assert api.db.statements == []
+
+
+def test_full_load_queues_each_ungeocoded_row_once(api, monkeypatch):
+    monkeypatch.setattr(app, "current_version", lambda: 101)
+    api.user = STUDENT
+    unplaced = dict(SELECTION_ROW, latitude=None, longitude=None)
+    api.db.responses = {"ORDER BY m.created_at DESC": [unplaced], "FROM students": {"phone": None, "address": "x"}}
+
+    for path in ("/api/student/selection", "/api/student/map-data"):
+        api.db.statements.clear()
+        assert api.get(path).status_code == 200
+
+        # Only enqueues write, at most one per key; the insert skips keys already queued
+        # or in their failed cooldown, so later polls of the same rows add nothing
+        writes = [(sql, params) for sql, params in api.db.statements if not sql.startswith("SELECT")]
+        assert all(sql.startswith("INSERT INTO jobs") and "f.status = 'failed'" in sql for sql, _ in writes)
+        keys = [key for _, params in writes for key in params["dedup_keys"]]
+        assert sorted(keys) == ["geocode:seniors:5", "geocode:students:7"]
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+import pytest
+
+import app
+
+SENIOR = {"user_id": 2, "email": "r@example.com", "role": "senior", "student_id": None, "senior_id": 5}
+
+
+@pytest.mark.parametrize("operation, error", [
+    ({"op": "create", "task_text": 5}, "task_text must be a string"),
+    ({"op": "create", "task_text": ["Groceries"]}, "task_text must be a string"),
+    ({"op": "update", "task_id": 3, "task_text": {"x": 1}}, "task_text must be a string"),
+    ({"op": "create", "task_text": "   "}, "task_text is required"),
+    ({"op": "update", "task_id": True, "status": "done"}, "task_id is required"),
+    ({"op": "delete", "task_id": False}, "task_id is required"),
+    ({"op": "delete", "task_id": "3"}, "task_id is required"),
+    ({"op": "update", "task_id": 3, "status": "archived"}, "status must be one of open, done"),
+    ({"op": "update", "task_id": 3, "status": ["open"]}, "status must be one of open, done"),
+    ({"op": "update", "task_id": 3}, "nothing to update"),
+    ({"op": "rename", "task_id": 3}, "op must be one of"),
+])
+def test_malformed_operation_is_a_400(api, operation, error):
+    api.user = SENIOR
+
+    response = api.post("/api/senior/tasks/batch", json={"operations": [{"op": "create", "task_text": "Walk"}, operation]})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Operation 1: " + error)
+    assert api.db.statements == []
+
+
+def test_well_formed_operations_pass():
+    assert app.validate_task_operations([
+        {"op": "create", "task_text": "Groceries"},
+        {"op": "update", "task_id": 3, "status": "done"},
+        {"op": "delete", "task_id": 4},
+    ]) is None
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return {"task_id": 9}
+
+    def fetchall(self):
+        return [{"task_id": 9, "task_text": "Groceries", "status": "open"}]
+
+
+def test_batch_rebuilds_needs_in_its_own_transaction(api, monkeypatch):
+    cursor = RecordingCursor()
+    monkeypatch.setattr(app, "transaction", contextmanager(lambda: (yield cursor)))
+    api.user = SENIOR
+
+    response = api.post("/api/senior/tasks/batch", json={"operations": [
+        {"op": "create", "task_text": "Groceries"},
+        {"op": "update", "task_id": 3, "status": "done"},
+    ]})
+
+    assert response.status_code == 200
+    sql = [statement for statement, _ in cursor.statements]
+    rebuilds = [i for i, statement in enumerate(sql) if statement.startswith("UPDATE seniors SET needs")]
+    # Once, after every task write and before the read-back, with nothing left for a worker
+    assert rebuilds == [2]
+    assert cursor.statements[2][1] == {"senior_id": 5}
+    assert "pg_notify('senior_needs_changed'" in sql[2]
+    assert not any("INSERT INTO jobs" in statement for statement in sql + api.db.sql())